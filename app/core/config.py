@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Any, List
+from typing import Any, List, Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -46,6 +46,12 @@ class Settings(BaseSettings):
     redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
     # When True, run schedule_campaign_background in the API process (no Redis/Worker). Useful for dev.
     run_schedule_in_process: bool = Field(default=False, alias="RUN_SCHEDULE_IN_PROCESS")
+    # When True, process uploaded recipient lists inside the upload request instead of the ARQ worker. Useful for dev.
+    run_list_processing_in_process: bool = Field(default=False, alias="RUN_LIST_PROCESSING_IN_PROCESS")
+    # When True, run bulk verification jobs inside the request instead of the ARQ worker. Useful for dev.
+    run_verification_in_process: bool = Field(default=False, alias="RUN_VERIFICATION_IN_PROCESS")
+    # When True, run bulk enrichment jobs inside the request instead of the ARQ worker. Useful for dev.
+    run_enrichment_in_process: bool = Field(default=False, alias="RUN_ENRICHMENT_IN_PROCESS")
 
     # Google OAuth
     google_client_id: str = Field(default="", alias="GOOGLE_CLIENT_ID")
@@ -71,6 +77,10 @@ class Settings(BaseSettings):
     storage_local_path: str = Field(default="./uploads", alias="STORAGE_LOCAL_PATH")
     gcs_bucket_name: str | None = Field(default=None, alias="GCS_BUCKET_NAME")
 
+    # Prometheus: worker / API serve metrics on their own port (0 = disabled), never on the public API
+    worker_metrics_port: int = Field(default=0, alias="WORKER_METRICS_PORT")
+    api_metrics_port: int = Field(default=0, alias="API_METRICS_PORT")
+
     # Sentry
     sentry_dsn: str | None = Field(default=None, alias="SENTRY_DSN")
 
@@ -93,6 +103,66 @@ class Settings(BaseSettings):
 
     # Gmail sending
     gmail_daily_cap: int = 250
+    # Per-account send token bucket (Redis, shared by all workers); over-limit emails are deferred, not failed
+    gmail_sends_per_minute: int = Field(default=20, alias="GMAIL_SENDS_PER_MINUTE")
+    # Parallel draft creation per Gmail account in the schedule job (worker pool size)
+    gmail_draft_concurrency: int = Field(default=4, alias="GMAIL_DRAFT_CONCURRENCY")
+    # Max Gmail API calls per second per account (drafts.create costs 10 of the 250 quota units/user/s)
+    gmail_api_qps_per_account: float = Field(default=10.0, alias="GMAIL_API_QPS_PER_ACCOUNT")
+    # Gmail API clients: cached service per account (TTL + LRU) and executor threads for blocking calls
+    gmail_client_cache_size: int = Field(default=512, alias="GMAIL_CLIENT_CACHE_SIZE")
+    gmail_client_cache_ttl_seconds: int = Field(default=900, alias="GMAIL_CLIENT_CACHE_TTL_SECONDS")
+    gmail_executor_workers: int = Field(default=32, alias="GMAIL_EXECUTOR_WORKERS")
+    # Sub-requests per Gmail HTTP batch call (max 100)
+    gmail_batch_size: int = Field(default=50, alias="GMAIL_BATCH_SIZE")
+    # Send cycle: Gmail accounts dispatched concurrently (sends within one account stay serial)
+    send_account_concurrency: int = Field(default=16, alias="SEND_ACCOUNT_CONCURRENCY")
+    # Upload rows parsed, deduped, suppression-checked and inserted (insert_many) per batch
+    recipient_upload_batch_size: int = Field(default=1000, alias="RECIPIENT_UPLOAD_BATCH_SIZE")
+    # CSV parser for uploads: "python" (csv module) or "pyarrow" (optional dependency, ~2x faster on large files)
+    recipient_csv_engine: Literal["python", "pyarrow"] = Field(default="python", alias="RECIPIENT_CSV_ENGINE")
+    # Recipients read per page (keyset) when counting / scheduling a list
+    recipient_page_size: int = Field(default=500, alias="RECIPIENT_PAGE_SIZE")
+    # Verification DNS: MX lookups in flight per process, per-lookup timeout, and the per-process MX cache
+    # (positive answers kept for the record TTL clamped to [min, max], NXDOMAIN / no MX for negative_ttl)
+    verify_dns_concurrency: int = Field(default=50, alias="VERIFY_DNS_CONCURRENCY")
+    verify_dns_timeout_seconds: float = Field(default=5.0, alias="VERIFY_DNS_TIMEOUT_SECONDS")
+    # Enrichment: items loaded / written per batch; larger selections than the threshold run as a job
+    enrich_batch_size: int = Field(default=1000, alias="ENRICH_BATCH_SIZE")
+    enrich_async_threshold: int = Field(default=1000, alias="ENRICH_ASYNC_THRESHOLD")
+    # Bulk verification job: emails verified and persisted per chunk (insert_many, bulk upserts, progress)
+    verify_job_chunk_size: int = Field(default=1000, alias="VERIFY_JOB_CHUNK_SIZE")
+    mx_cache_size: int = Field(default=100_000, alias="MX_CACHE_SIZE")
+    mx_cache_min_ttl_seconds: float = Field(default=60.0, alias="MX_CACHE_MIN_TTL_SECONDS")
+    mx_cache_max_ttl_seconds: float = Field(default=3600.0, alias="MX_CACHE_MAX_TTL_SECONDS")
+    mx_cache_negative_ttl_seconds: float = Field(default=300.0, alias="MX_CACHE_NEGATIVE_TTL_SECONDS")
+    # Shared DomainInfo collection behind the MX cache: resolved domains reused by every process until expiry
+    domain_info_store_enabled: bool = Field(default=True, alias="DOMAIN_INFO_STORE_ENABLED")
+    domain_info_ttl_seconds: float = Field(default=86400.0, alias="DOMAIN_INFO_TTL_SECONDS")
+    # Extra disposable domains (one per line), merged with the bundled app/data/disposable_domains.txt
+    disposable_domains_file: str | None = Field(default=None, alias="DISPOSABLE_DOMAINS_FILE")
+    # Global suppression list cached per process as a Bloom filter; version checked every refresh interval,
+    # full rebuild periodically (covers removals)
+    suppression_cache_enabled: bool = Field(default=True, alias="SUPPRESSION_CACHE_ENABLED")
+    suppression_cache_refresh_seconds: float = Field(default=5.0, alias="SUPPRESSION_CACHE_REFRESH_SECONDS")
+    suppression_cache_full_rebuild_seconds: float = Field(default=3600.0, alias="SUPPRESSION_CACHE_FULL_REBUILD_SECONDS")
+    # Credit balance cache: per-process L1 (how long another process's charge can go unseen) over Redis
+    credit_balance_cache_enabled: bool = Field(default=True, alias="CREDIT_BALANCE_CACHE_ENABLED")
+    credit_balance_l1_ttl_seconds: float = Field(default=1.0, alias="CREDIT_BALANCE_L1_TTL_SECONDS")
+    credit_balance_cache_ttl_seconds: int = Field(default=300, alias="CREDIT_BALANCE_CACHE_TTL_SECONDS")
+    # Worker send mode: False = cron every minute; True = long-running loop that drains due emails
+    # continuously and sleeps until the next send_at (woken early via Redis when rows are scheduled)
+    send_loop_enabled: bool = Field(default=False, alias="SEND_LOOP_ENABLED")
+    send_loop_max_idle_seconds: float = Field(default=30.0, alias="SEND_LOOP_MAX_IDLE_SECONDS")
+    # Lease on claimed rows; a "sending" row whose lease expired is returned to drafted/queued
+    send_lease_seconds: int = Field(default=300, alias="SEND_LEASE_SECONDS")
+    # SMTP (app password accounts): pooled connection per sender
+    smtp_idle_timeout_seconds: float = Field(default=60.0, alias="SMTP_IDLE_TIMEOUT_SECONDS")
+    smtp_max_messages_per_connection: int = Field(default=90, alias="SMTP_MAX_MESSAGES_PER_CONNECTION")
+    # Schedule job writes: ScheduledEmail insert_many batch size; campaign progress every N rows or T ms
+    schedule_insert_batch_size: int = Field(default=100, alias="SCHEDULE_INSERT_BATCH_SIZE")
+    schedule_progress_every: int = Field(default=25, alias="SCHEDULE_PROGRESS_EVERY")
+    schedule_progress_interval_ms: int = Field(default=1000, alias="SCHEDULE_PROGRESS_INTERVAL_MS")
 
 
 @lru_cache
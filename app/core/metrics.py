@@ -0,0 +1,17 @@
+"""Prometheus metrics, served on WORKER_METRICS_PORT (worker) and API_METRICS_PORT (API) when set."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+SEND_CYCLE_SECONDS = Histogram(
+    "send_cycle_seconds",
+    "Duration of one send_due_emails cycle",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+EMAILS_SENT = Counter("emails_sent_total", "Scheduled emails processed by the send cycle", ["result"])
+SEND_CYCLE_THROUGHPUT = Gauge("send_cycle_throughput_per_second", "Emails processed per second in the last send cycle")
+SEND_CYCLE_ACCOUNTS = Gauge("send_cycle_accounts", "Gmail accounts dispatched in the last send cycle")
+SEND_LAG_SECONDS = Histogram(
+    "send_lag_seconds",
+    "Delay between a scheduled email's send_at and when it was actually sent",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 3600),
+)
@@ -0,0 +1,15 @@
+"""Shared async Redis client for the API and worker (rate limits, pub/sub)."""
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Process-wide Redis client (lazy; connection pool shared by all callers)."""
+    global _client
+    if _client is None:
+        _client = Redis.from_url(get_settings().redis_url, decode_responses=True)
+    return _client
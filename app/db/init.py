@@ -2,7 +2,7 @@ import logging
 
 import certifi
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
@@ -13,12 +13,17 @@ logging.getLogger("pymongo").setLevel(logging.WARNING)
 logging.getLogger("motor").setLevel(logging.WARNING)
 from app.models.audit_log import AuditLog
 from app.models.campaign import Campaign
+from app.models.counter import Counter
 from app.models.credit_balance import CreditBalance
 from app.models.credit_ledger import CreditLedgerEntry
+from app.models.credit_rollup import CreditRollup
+from app.models.domain_info import DomainInfo
 from app.models.email_verification_result import EmailVerificationResult
+from app.models.enrichment_job import EnrichmentJob
 from app.models.enrichment_result import EnrichmentResult
 from app.models.failed_job import FailedJob
 from app.models.gmail_account import GmailAccount
+from app.models.lease import Lease
 from app.models.payment_order import PaymentOrder
 from app.models.recipient_item import RecipientItem
 from app.models.recipient_list import RecipientList
@@ -28,6 +33,7 @@ from app.models.suppression_entry import SuppressionEntry
 from app.models.system_recipient import SystemRecipient
 from app.models.template import Template
 from app.models.user import User
+from app.models.verification_job import VerificationJob
 
 DOCUMENT_MODELS = [
     User,
@@ -47,6 +53,12 @@ DOCUMENT_MODELS = [
     SystemRecipient,
     AuditLog,
     FailedJob,
+    Counter,
+    VerificationJob,
+    DomainInfo,
+    EnrichmentJob,
+    CreditRollup,
+    Lease,
 ]
 
 
@@ -56,14 +68,20 @@ def _use_tls(uri: str) -> bool:
     return "mongodb+srv://" in uri or "tls=true" in uri.lower()
 
 
-async def init_db() -> None:
-    log.info("init_db_start")
+def get_database() -> AsyncIOMotorDatabase:
+    """Motor database from settings, without Beanie (scripts that must run before indexes build)."""
     settings = get_settings()
     kwargs = {}
     if _use_tls(settings.mongodb_uri):
         kwargs["tlsCAFile"] = certifi.where()
         kwargs["tlsDisableOCSPEndpointCheck"] = True
     client = AsyncIOMotorClient(settings.mongodb_uri, **kwargs)
-    database = client[settings.mongodb_db_name]
+    return client[settings.mongodb_db_name]
+
+
+async def init_db() -> None:
+    log.info("init_db_start")
+    settings = get_settings()
+    database = get_database()
     await init_beanie(database=database, document_models=DOCUMENT_MODELS)
     log.info("init_db_ok", db_name=settings.mongodb_db_name)
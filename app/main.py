@@ -30,6 +30,7 @@ from app.routers import (
     templates,
     verify,
 )
+from app.services import balance_cache
 
 settings = get_settings()
 configure_logging(debug=settings.debug)
@@ -54,8 +55,12 @@ async def request_id_middleware(request, call_next):
     request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
     request.state.request_id = request_id
     bind_request_id(request_id)
+    balance_scope = balance_cache.begin_request_scope()
     start = time.perf_counter()
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        balance_cache.end_request_scope(balance_scope)
     duration_ms = (time.perf_counter() - start) * 1000
     # 401 on GET /v1/auth/me is expected when not logged in; log at DEBUG to reduce noise
     is_unauth_me = (
@@ -112,6 +117,15 @@ async def startup():
         log.info("startup", msg="Sentry enabled")
     await init_db()
     log.info("startup", msg="DB connected")
+    from app.services.suppression_cache import get_global_suppression_cache
+    cache = get_global_suppression_cache()
+    if cache:
+        cache.start_warmup()
+    if settings.api_metrics_port:
+        # Separate listener, not a public route: bind it to the internal network only
+        from prometheus_client import start_http_server
+        start_http_server(settings.api_metrics_port)
+        log.info("api_metrics_started", port=settings.api_metrics_port)
 
 
 @app.get("/health")
@@ -21,6 +21,7 @@ class Campaign(Document):
     # Background scheduling: "idle" | "in_progress" | "completed"
     scheduling_status: Literal["idle", "in_progress", "completed"] = "idle"
     scheduling_total: int = 0  # total recipients to schedule (set when job starts)
+    scheduling_failed_count: int = 0  # recipients whose draft could not be created
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
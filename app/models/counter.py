@@ -0,0 +1,28 @@
+"""Named monotonic counters (e.g. global suppression list version)."""
+
+from beanie import Document
+from pymongo import ReturnDocument
+
+
+class Counter(Document):
+    id: str  # counter name
+    value: int = 0
+
+    class Settings:
+        name = "counters"
+
+    @classmethod
+    async def next_value(cls, name: str) -> int:
+        """Atomically increment and return the counter (created at 1)."""
+        doc = await cls.get_motor_collection().find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["value"])
+
+    @classmethod
+    async def current_value(cls, name: str) -> int:
+        doc = await cls.get_motor_collection().find_one({"_id": name}, {"value": 1})
+        return int(doc["value"]) if doc else 0
@@ -1,12 +1,17 @@
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
+from pydantic import Field
 
 from app.models.user import User
 
 
 class CreditBalance(Document):
-    """Current balance per user; updated atomically with ledger."""
+    """Current balance per user; changed only by conditional $inc in app/services/credits.py."""
     user: Link[User]
     balance: int = 0
+    # Bumped with every balance change; the balance cache only ever replaces an entry with a newer version
+    version: int = 0
+    # Recent ledger entry ids already counted in balance (makes replaying a pending entry a no-op)
+    applied_entries: list[PydanticObjectId] = Field(default_factory=list)
 
     class Settings:
         name = "credit_balances"
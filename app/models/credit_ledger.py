@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
 from pydantic import Field
+from pymongo import IndexModel
 
 from app.models.user import User
 
@@ -14,11 +15,24 @@ class CreditLedgerEntry(Document):
     reference_type: str | None = None  # campaign_id, payment_id, etc.
     reference_id: str | None = None
     idempotency_key: str | None = None
+    # pending: written ahead of the balance $inc; applied once the balance reflects it
+    status: str = "applied"
+    # Counted in CreditRollup (set together with status "applied"; older entries by the one-off backfill)
+    rolled_up: bool = False
+    # Backfill batch that claimed this entry; cleared when the batch is flagged rolled_up
+    rollup_batch: PydanticObjectId | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "credit_ledger"
         indexes = [
-            [("user", 1), ("created_at", -1)],
-            [("idempotency_key", 1)],  # unique in practice per user+reason
+            # Ledger history, keyset-paginated on (created_at, _id)
+            [("user", 1), ("created_at", -1), ("_id", -1)],
+            IndexModel(
+                [("user.$id", 1), ("idempotency_key", 1)],
+                unique=True,
+                partialFilterExpression={"idempotency_key": {"$type": "string"}},
+            ),
+            IndexModel([("created_at", 1)], partialFilterExpression={"status": "pending"}),
+            IndexModel([("rollup_batch", 1)], partialFilterExpression={"rollup_batch": {"$type": "objectId"}}),
         ]
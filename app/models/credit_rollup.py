@@ -0,0 +1,22 @@
+"""Per-user, per-reason ledger totals by month ("YYYY-MM") and all time ("all"), kept by apply_ledger_entry."""
+
+from datetime import datetime
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+
+
+class CreditRollup(Document):
+    id: str  # "<user_id>:<reason>:<month>"
+    user_id: PydanticObjectId
+    reason: str
+    month: str  # "YYYY-MM" or "all"
+    total: int = 0  # sum of amounts (credits positive, debits negative)
+    entries: int = 0
+    # Recent ledger entry ids (or backfill batch ids) already counted: replaying one is a no-op
+    applied_ids: list[PydanticObjectId] = Field(default_factory=list)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "credit_rollups"
+        indexes = [[("user_id", 1), ("month", 1)]]
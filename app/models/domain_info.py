@@ -0,0 +1,20 @@
+"""Shared per-domain verification facts (MX, disposable), refreshed lazily after expires_at."""
+
+from datetime import datetime
+
+from beanie import Document
+from pydantic import Field
+
+
+class DomainInfo(Document):
+    id: str  # lowercased domain
+    has_mx: bool = False
+    mx_hosts: list[str] = Field(default_factory=list)  # by preference, at most a few
+    disposable: bool = False
+    # Hint for result interpretation: True/False once known (e.g. from SMTP probes), None = not checked
+    catch_all: bool | None = None
+    checked_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "domain_info"
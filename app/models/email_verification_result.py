@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any, Literal
 
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
 from pydantic import Field
 
 from app.models.recipient_item import RecipientItem
@@ -15,8 +15,13 @@ class EmailVerificationResult(Document):
     result: Literal["valid", "invalid", "unknown", "disposable"] = "unknown"
     mx_valid: bool = False
     syntax_valid: bool = False
+    job_id: PydanticObjectId | None = None  # VerificationJob that produced this result (bulk)
     metadata: dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "email_verification_results"
+        indexes = [
+            [("job_id", 1), ("_id", 1)],
+            [("email", 1)],  # known-good role addresses for enrichment (RoleAddressIndex)
+        ]
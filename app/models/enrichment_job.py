@@ -0,0 +1,30 @@
+"""Bulk enrichment job (large selection or a whole list); processed by the worker (enrich_bulk_job)."""
+
+from datetime import datetime
+from typing import Literal
+
+from beanie import Document, Link, PydanticObjectId
+from pydantic import Field
+
+from app.models.user import User
+
+
+class EnrichmentJob(Document):
+    user: Link[User]
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    recipient_item_ids: list[PydanticObjectId] = Field(default_factory=list)
+    list_id: PydanticObjectId | None = None  # whole-list mode: every item of this list, in _id order
+    last_item_id: PydanticObjectId | None = None  # list mode: keyset cursor after the last persisted chunk
+    total: int = 0
+    processed_count: int = 0
+    enriched_count: int = 0  # items that got a chosen_email (others: missing or not the user's)
+    chunk_size: int = 1000
+    chunks_done: int = 0  # chunks fully persisted: resume point
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+    class Settings:
+        name = "enrichment_jobs"
+        indexes = [[("user.$id", 1), ("created_at", -1)]]
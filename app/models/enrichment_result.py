@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
 from pydantic import Field
 
 from app.models.recipient_item import RecipientItem
@@ -12,7 +12,10 @@ class EnrichmentResult(Document):
     recipient_item: Link[RecipientItem]
     chosen_email: str
     role: str = ""
+    job_id: PydanticObjectId | None = None  # EnrichmentJob that produced this result
+    job_chunk: int | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "enrichment_results"
+        indexes = [[("job_id", 1), ("job_chunk", 1)]]
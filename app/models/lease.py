@@ -0,0 +1,15 @@
+"""Named expiring leases for one-off background work (one holder at a time, taken over once expired)."""
+
+from datetime import datetime
+
+from beanie import Document
+
+
+class Lease(Document):
+    id: str  # lease name
+    owner: str | None = None
+    expires_at: datetime | None = None
+    done: bool = False  # the work finished; the lease is never granted again
+
+    class Settings:
+        name = "leases"
@@ -3,6 +3,7 @@ from typing import Literal
 
 from beanie import Document, Link
 from pydantic import Field
+from pymongo import IndexModel
 
 from app.models.recipient_list import RecipientList
 
@@ -16,10 +17,18 @@ class RecipientItem(Document):
     raw_row: dict = Field(default_factory=dict)
     verification_status: Literal["pending", "valid", "invalid", "unknown"] = "pending"
     chosen_email: str | None = None  # after enrichment
+    row_index: int | None = None  # 0-based data row in the uploaded file (idempotent resume)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "recipient_items"
         indexes = [
             [("list", 1), ("email", 1)],
+            # Keyset pagination of a list's items (app/services/recipients.iter_list_item_pages)
+            [("list.$id", 1), ("_id", 1)],
+            IndexModel(
+                [("list.$id", 1), ("row_index", 1)],
+                unique=True,
+                partialFilterExpression={"row_index": {"$type": "number"}},
+            ),
         ]
@@ -13,6 +13,10 @@ class RecipientList(Document):
     storage_path: str
     status: Literal["processing", "ready", "failed"] = "processing"
     total_count: int = 0
+    processed_count: int = 0  # rows read from the file and committed (upload progress / resume offset)
+    # Progress denominator known at upload time (total_count is only known once the file is read)
+    size_bytes: int = 0
+    bytes_read: int = 0
     valid_count: int = 0
     invalid_count: int = 0
     duplicate_count: int = 0
@@ -3,6 +3,7 @@ from typing import Literal
 
 from beanie import Document, Link
 from pydantic import Field
+from pymongo import IndexModel
 
 from app.models.campaign import Campaign
 from app.models.gmail_account import GmailAccount
@@ -12,6 +13,7 @@ class ScheduledEmail(Document):
     campaign: Link[Campaign]
     gmail_account: Link[GmailAccount]
     recipient_email: str
+    recipient_item_id: str | None = None  # source RecipientItem; one ScheduledEmail per item per campaign
     subject: str
     body_html: str
     send_at: datetime
@@ -20,6 +22,9 @@ class ScheduledEmail(Document):
     gmail_message_id: str | None = None
     idempotency_key: str | None = None
     failure_reason: str | None = None
+    # Send lease: set atomically when a worker claims the row (status -> "sending")
+    lease_owner: str | None = None
+    lease_expires_at: datetime | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -27,6 +32,15 @@ class ScheduledEmail(Document):
         name = "scheduled_emails"
         indexes = [
             [("send_at", 1), ("status", 1)],
+            [("status", 1), ("send_at", 1)],  # send loop peek: next due send_at per status
             [("campaign", 1)],
+            # One row per recipient per campaign; lets the schedule job resume without duplicates
+            IndexModel(
+                [("campaign", 1), ("recipient_item_id", 1)],
+                unique=True,
+                partialFilterExpression={"recipient_item_id": {"$type": "string"}},
+            ),
             [("idempotency_key", 1)],
+            [("lease_owner", 1)],
+            [("status", 1), ("lease_expires_at", 1)],
         ]
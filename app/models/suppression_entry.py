@@ -10,6 +10,7 @@ class SuppressionEntry(Document):
     email: str
     user_id: str | None = None  # None = global
     source: str = "verification"  # verification | manual
+    seq: int | None = None  # global entries: value of the "suppression_global" counter when added
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
@@ -17,4 +18,5 @@ class SuppressionEntry(Document):
         indexes = [
             [("email", 1), ("user_id", 1)],  # unique in practice: one (email, user_id)
             [("user_id", 1)],
+            [("user_id", 1), ("seq", 1)],  # incremental refresh of the global suppression cache
         ]
@@ -0,0 +1,39 @@
+"""Bulk verification job: input, progress and counts; processed by the worker (verify_bulk_job)."""
+
+from datetime import datetime
+from typing import Literal
+
+from beanie import Document, Link, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel
+
+from app.models.user import User
+
+
+class VerificationJob(Document):
+    user: Link[User]
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    emails: list[str] = Field(default_factory=list)  # explicit emails, or empty when verifying a list
+    list_id: PydanticObjectId | None = None  # verify a recipient list's items (updates their status)
+    total: int = 0
+    processed_count: int = 0
+    chunk_size: int = 1000
+    chunks_done: int = 0  # chunks fully persisted (results, suppressions, items, counts): resume point
+    last_item_id: PydanticObjectId | None = None  # list mode: keyset cursor after the last persisted chunk
+    counts: dict[str, int] = Field(default_factory=dict)  # result -> count (valid/invalid/unknown/disposable)
+    idempotency_key: str | None = None
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+
+    class Settings:
+        name = "verification_jobs"
+        indexes = [
+            [("user.$id", 1), ("created_at", -1)],
+            IndexModel(
+                [("user.$id", 1), ("idempotency_key", 1)],
+                unique=True,
+                partialFilterExpression={"idempotency_key": {"$type": "string"}},
+            ),
+        ]
@@ -3,8 +3,8 @@ from pydantic import BaseModel, Field
 
 from app.core.logging import get_logger
 from app.deps import get_current_user
-from app.models.credit_ledger import CreditLedgerEntry
 from app.models.user import User
+from app.services import credit_rollups
 from app.services import credits as credits_service
 
 router = APIRouter()
@@ -46,17 +46,11 @@ async def credits_balance(user: User = Depends(get_current_user)):
 async def credits_ledger(
     user: User = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
+    after: str | None = None,
 ):
-    """Return ledger entries for current user (newest first)."""
-    log.info("credits_ledger", user_id=str(user.id), limit=limit, offset=offset)
-    entries = (
-        await CreditLedgerEntry.find(CreditLedgerEntry.user.ref == user.id)
-        .sort(-CreditLedgerEntry.created_at)
-        .skip(offset)
-        .limit(limit)
-        .to_list()
-    )
+    """Return ledger entries for current user (newest first); pass `next_after` from the previous page as `after`."""
+    log.info("credits_ledger", user_id=str(user.id), limit=limit, after=after)
+    entries = await credits_service.list_ledger(user.id, limit=limit, after=after)
     out = [
         {
             "id": str(e.id),
@@ -70,4 +64,21 @@ async def credits_ledger(
         for e in entries
     ]
     log.info("credits_ledger_ok", user_id=str(user.id), count=len(out))
-    return {"entries": out, "limit": limit, "offset": offset}
+    return {
+        "entries": out,
+        "limit": limit,
+        "next_after": credits_service.ledger_cursor(entries[-1]) if len(entries) == limit else None,
+    }
+
+
+@router.get("/summary")
+async def credits_summary(
+    user: User = Depends(get_current_user),
+    month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$"),
+):
+    """Per-reason totals and entry counts for one month (YYYY-MM) or all time, from the ledger rollups."""
+    rollups = await credit_rollups.get_summary(user.id, month or credit_rollups.ALL_TIME)
+    return {
+        "month": month,
+        "reasons": [{"reason": r.reason, "total": r.total, "entries": r.entries} for r in rollups],
+    }
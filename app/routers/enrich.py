@@ -1,6 +1,10 @@
+from beanie import PydanticObjectId
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from app.core.config import get_settings
+from app.core.exceptions import BadRequestError
 from app.deps import get_current_user
 from app.models.user import User
 from app.services import enrichment as enrichment_service
@@ -12,22 +16,61 @@ class EnrichBulkRequest(BaseModel):
     recipient_item_ids: list[str]
 
 
+def _job_out(job) -> dict:
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "total": job.total,
+        "processed_count": job.processed_count,
+        "enriched_count": job.enriched_count,
+        "list_id": str(job.list_id) if job.list_id else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
 @router.post("/bulk")
 async def enrich_bulk(
     body: EnrichBulkRequest,
     user: User = Depends(get_current_user),
 ):
-    """Enrich recipient items with role-based emails (careers@, hr@, etc.)."""
-    from beanie import PydanticObjectId
+    """
+    Enrich recipient items with role-based emails (careers@, hr@, etc.). Selections larger than
+    ENRICH_ASYNC_THRESHOLD run as a background job: 202 with job_id, poll GET /enrich/jobs/{job_id}.
+    """
     ids = [PydanticObjectId(x) for x in body.recipient_item_ids]
+    if len(ids) > get_settings().enrich_async_threshold:
+        job = await enrichment_service.start_enrichment_job(user.id, ids)
+        return JSONResponse(status_code=202 if job.status in ("queued", "running") else 200, content=_job_out(job))
     results = await enrichment_service.enrich_bulk(user.id, ids)
     return {
         "results": [
             {
-                "recipient_item_id": str(r.recipient_item.ref),
+                "recipient_item_id": str(r.recipient_item.ref.id),
                 "chosen_email": r.chosen_email,
                 "role": r.role,
             }
             for r in results
         ]
     }
+
+
+@router.post("/lists/{list_id}")
+async def enrich_list(list_id: str, user: User = Depends(get_current_user)):
+    """
+    Enrich every item of a list in one background pass, preferring known role addresses for each
+    domain (system recipients, verified addresses). 202 with job_id; poll GET /enrich/jobs/{job_id}.
+    """
+    job = await enrichment_service.start_list_enrichment(user.id, PydanticObjectId(list_id))
+    return JSONResponse(status_code=202 if job.status in ("queued", "running") else 200, content=_job_out(job))
+
+
+@router.get("/jobs/{job_id}")
+async def enrich_job_status(job_id: str, user: User = Depends(get_current_user)):
+    """Progress of a bulk enrichment job."""
+    job = await enrichment_service.get_enrichment_job(user.id, PydanticObjectId(job_id))
+    if not job:
+        raise BadRequestError("Enrichment job not found")
+    return _job_out(job)
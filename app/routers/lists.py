@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, File, Query, UploadFile
+from datetime import datetime
 
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile
+
+from app.core.config import get_settings
 from app.core.exceptions import BadRequestError
 from app.core.logging import get_logger
 from app.deps import get_current_user
@@ -32,6 +35,7 @@ async def lists_list(user: User = Depends(get_current_user)):
                 "name": r.name,
                 "status": r.status,
                 "total_count": r.total_count,
+                "processed_count": r.processed_count,
                 "valid_count": r.valid_count,
                 "invalid_count": r.invalid_count,
                 "duplicate_count": getattr(r, "duplicate_count", 0),
@@ -46,26 +50,48 @@ async def lists_list(user: User = Depends(get_current_user)):
 
 @router.post("/lists/upload")
 async def lists_upload(
+    response: Response,
     user: User = Depends(get_current_user),
     name: str | None = None,
     file: UploadFile = File(...),
 ):
-    """Upload recipients list (CSV/XLSX); create list and process synchronously so status is ready before response."""
+    """
+    Upload recipients list (CSV/XLSX). The upload is streamed to storage and processed by the worker:
+    returns 202 with status=processing; poll GET /lists/{id}/status for progress.
+    With RUN_LIST_PROCESSING_IN_PROCESS the list is processed before the response (200, status=ready).
+    """
     log.info("lists_upload", user_id=str(user.id), filename=file.filename)
     if not file.filename:
         raise BadRequestError("Missing filename")
-    content = await file.read()
-    rlist = await recipients_service.upload_list(user, name or file.filename, content, file.filename)
+    # file.file is the spooled multipart body (disk-backed when large); streamed, never read whole
+    rlist = await recipients_service.upload_list(user, name or file.filename, file.file, file.filename)
     log.info("lists_upload_ok", user_id=str(user.id), list_id=str(rlist.id))
-    await recipients_service.process_recipient_list_upload(str(rlist.id))
-    rlist = await recipients_service.get_list(user.id, rlist.id)
-    if not rlist:
-        raise BadRequestError("List not found after processing")
+    if get_settings().run_list_processing_in_process:
+        await recipients_service.process_recipient_list_upload(str(rlist.id))
+        rlist = await recipients_service.get_list(user.id, rlist.id)
+        if not rlist:
+            raise BadRequestError("List not found after processing")
+    else:
+        # avoid circular import at module load
+        from app.worker.tasks import enqueue_process_recipient_list
+
+        try:
+            await enqueue_process_recipient_list(str(rlist.id))
+        except Exception as e:
+            log.warning("lists_upload_enqueue_failed", list_id=str(rlist.id), error=str(e)[:200])
+            rlist.status = "failed"
+            rlist.updated_at = datetime.utcnow()
+            await rlist.save()
+            raise BadRequestError(
+                "Could not queue list processing. Is Redis running and REDIS_URL set? Start the Worker (ARQ) to process jobs."
+            ) from e
+        response.status_code = 202
     return {
         "id": str(rlist.id),
         "name": rlist.name,
         "status": rlist.status,
         "total_count": rlist.total_count,
+        "processed_count": rlist.processed_count,
         "valid_count": rlist.valid_count,
         "invalid_count": rlist.invalid_count,
         "duplicate_count": getattr(rlist, "duplicate_count", 0),
@@ -75,6 +101,29 @@ async def lists_upload(
     }
 
 
+@router.get("/lists/{list_id}/status")
+async def list_status(list_id: str, user: User = Depends(get_current_user)):
+    """Processing status and progress of an uploaded list (poll after upload)."""
+    from beanie import PydanticObjectId
+    rlist = await recipients_service.get_list(user.id, PydanticObjectId(list_id))
+    if not rlist:
+        raise BadRequestError("List not found")
+    return {
+        "id": str(rlist.id),
+        "status": rlist.status,
+        "processed_count": rlist.processed_count,
+        "total_count": rlist.total_count,
+        # Progress while processing: total_count is only final once status is "ready"
+        "size_bytes": rlist.size_bytes,
+        "bytes_read": rlist.bytes_read,
+        "valid_count": rlist.valid_count,
+        "invalid_count": rlist.invalid_count,
+        "duplicate_count": rlist.duplicate_count,
+        "suppressed_count": rlist.suppressed_count,
+        "updated_at": rlist.updated_at.isoformat(),
+    }
+
+
 @router.get("/lists/{list_id}")
 async def list_get(list_id: str, user: User = Depends(get_current_user)):
     """Get recipient list by id."""
@@ -88,6 +137,7 @@ async def list_get(list_id: str, user: User = Depends(get_current_user)):
         "name": rlist.name,
         "status": rlist.status,
         "total_count": rlist.total_count,
+        "processed_count": rlist.processed_count,
         "valid_count": rlist.valid_count,
         "invalid_count": rlist.invalid_count,
         "duplicate_count": getattr(rlist, "duplicate_count", 0),
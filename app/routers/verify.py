@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, Header
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, Header, Query, Response
 from pydantic import BaseModel
 
+from app.core.exceptions import BadRequestError
 from app.deps import get_current_user
 from app.models.user import User
 from app.services import verification as verification_service
@@ -14,7 +16,8 @@ class VerifyEmailRequest(BaseModel):
 
 
 class VerifyBulkRequest(BaseModel):
-    emails: list[str]
+    emails: list[str] = []
+    list_id: str | None = None  # verify every item of this list instead of `emails`
     idempotency_key: str | None = None
 
 
@@ -37,18 +40,68 @@ async def verify_email(
     }
 
 
+def _job_out(job) -> dict:
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "total": job.total,
+        "processed_count": job.processed_count,
+        "counts": job.counts,
+        "list_id": str(job.list_id) if job.list_id else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
 @router.post("/bulk")
 async def verify_bulk(
     body: VerifyBulkRequest,
+    response: Response,
     user: User = Depends(get_current_user),
     idempotency_key: str | None = Header(None, alias="Idempotency-Key"),
 ):
-    """Verify multiple emails; charge upfront. Optional Idempotency-Key header."""
+    """
+    Start bulk verification of `emails` (or all items of `list_id`) as a background job; returns 202
+    with a job id. Poll GET /verify/jobs/{job_id}; results at GET /verify/jobs/{job_id}/results.
+    Credits are charged upfront by the job. Optional Idempotency-Key header (returns the same job).
+    """
     key = idempotency_key or body.idempotency_key
-    results = await verification_service.verify_bulk(user.id, body.emails, idempotency_key=key)
+    list_id = PydanticObjectId(body.list_id) if body.list_id else None
+    job = await verification_service.start_bulk_verification(user.id, body.emails, list_id=list_id, idempotency_key=key)
+    if job.status in ("queued", "running"):
+        response.status_code = 202
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}")
+async def verify_job_status(job_id: str, user: User = Depends(get_current_user)):
+    """Progress of a bulk verification job."""
+    job = await verification_service.get_verification_job(user.id, PydanticObjectId(job_id))
+    if not job:
+        raise BadRequestError("Verification job not found")
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}/results")
+async def verify_job_results(
+    job_id: str,
+    user: User = Depends(get_current_user),
+    limit: int = Query(100, ge=1, le=1000),
+    after: str | None = None,
+):
+    """Results of a bulk verification job; pass `next_after` from the previous page as `after`."""
+    job = await verification_service.get_verification_job(user.id, PydanticObjectId(job_id))
+    if not job:
+        raise BadRequestError("Verification job not found")
+    results = await verification_service.get_job_results(
+        job.id, limit=limit, after_id=PydanticObjectId(after) if after else None
+    )
     return {
         "results": [
             {"email": r.email, "result": r.result, "syntax_valid": r.syntax_valid, "mx_valid": r.mx_valid}
             for r in results
-        ]
+        ],
+        "next_after": str(results[-1].id) if len(results) == limit else None,
     }
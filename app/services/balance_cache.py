@@ -0,0 +1,178 @@
+"""Credit balance cache: request memo -> per-process L1 -> Redis hash per user -> MongoDB.
+
+Every balance change $inc's CreditBalance.version along with the balance, and apply_ledger_entry writes
+the new (balance, version) through all three layers before returning. Each layer only accepts a version
+at least as new as the one it holds (a Lua compare-and-set in Redis), so a slow read-through of an old
+document can never overwrite a charge. Other processes see a charge as soon as their L1 entry expires
+(CREDIT_BALANCE_L1_TTL_SECONDS; 0 reads Redis every time).
+"""
+
+import time
+from collections import OrderedDict
+from contextvars import ContextVar, Token
+
+from beanie import PydanticObjectId
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+KEY_PREFIX = "credits:balance"
+
+# Store (balance, version) in KEYS[1] unless it already holds a newer version. Returns 1 if stored.
+PUT_IF_NEWER_LUA = """
+local current = redis.call('HGET', KEYS[1], 'v')
+if current and tonumber(current) > tonumber(ARGV[2]) then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'b', ARGV[1], 'v', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+# user_id -> (balance, version) for the current API request; None outside a request
+_request_balances: ContextVar[dict[PydanticObjectId, tuple[int, int]] | None] = ContextVar(
+    "request_balances", default=None
+)
+_scripts: dict[int, object] = {}
+
+
+def begin_request_scope() -> Token:
+    """Start memoizing balances for this request (one read per user per request)."""
+    return _request_balances.set({})
+
+
+def end_request_scope(token: Token) -> None:
+    _request_balances.reset(token)
+
+
+def _key(user_id: PydanticObjectId) -> str:
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+class BalanceCache:
+    """L1 LRU of user_id -> (balance, version, expires_at) in front of Redis. One per process."""
+
+    def __init__(self, redis, l1_ttl: float = 1.0, redis_ttl: int = 300, max_entries: int = 10_000) -> None:
+        self.redis = redis
+        self.l1_ttl = l1_ttl
+        self.redis_ttl = max(1, int(redis_ttl))
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[PydanticObjectId, tuple[int, int, float]] = OrderedDict()
+
+    def _get_local(self, user_id: PydanticObjectId) -> tuple[int, int] | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        balance, version, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return balance, version
+
+    def _put_local(self, user_id: PydanticObjectId, balance: int, version: int) -> None:
+        if self.l1_ttl <= 0:
+            return
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > version:
+            return
+        self._entries[user_id] = (balance, version, time.monotonic() + self.l1_ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id: PydanticObjectId) -> tuple[int, int] | None:
+        """(balance, version) from L1, else Redis; None on a miss or if Redis is unavailable."""
+        local = self._get_local(user_id)
+        if local is not None:
+            return local
+        try:
+            row = await self.redis.hmget(_key(user_id), "b", "v")
+        except Exception as e:
+            log.warning("balance_cache_unavailable", user_id=str(user_id), error=str(e)[:200])
+            return None
+        if row[0] is None or row[1] is None:
+            return None
+        balance, version = int(row[0]), int(row[1])
+        self._put_local(user_id, balance, version)
+        return balance, version
+
+    async def put(self, user_id: PydanticObjectId, balance: int, version: int) -> None:
+        self._put_local(user_id, balance, version)
+        script = _scripts.get(id(self.redis))
+        if script is None:
+            script = _scripts[id(self.redis)] = self.redis.register_script(PUT_IF_NEWER_LUA)
+        try:
+            await script(keys=[_key(user_id)], args=[balance, version, self.redis_ttl])
+        except Exception as e:
+            log.warning("balance_cache_unavailable", user_id=str(user_id), error=str(e)[:200])
+
+    async def invalidate(self, user_id: PydanticObjectId) -> None:
+        self._entries.pop(user_id, None)
+        try:
+            await self.redis.delete(_key(user_id))
+        except Exception as e:
+            log.warning("balance_cache_unavailable", user_id=str(user_id), error=str(e)[:200])
+
+
+_cache: BalanceCache | None = None
+
+
+def get_balance_cache() -> BalanceCache | None:
+    """Process-wide cache, or None when CREDIT_BALANCE_CACHE_ENABLED is off."""
+    global _cache
+    settings = get_settings()
+    if not settings.credit_balance_cache_enabled:
+        return None
+    if _cache is None:
+        from app.core.redis import get_redis
+        _cache = BalanceCache(
+            get_redis(),
+            l1_ttl=settings.credit_balance_l1_ttl_seconds,
+            redis_ttl=settings.credit_balance_cache_ttl_seconds,
+        )
+    return _cache
+
+
+def get_memoized(user_id: PydanticObjectId) -> tuple[int, int] | None:
+    memo = _request_balances.get()
+    return memo.get(user_id) if memo is not None else None
+
+
+def memoize(user_id: PydanticObjectId, balance: int, version: int) -> None:
+    memo = _request_balances.get()
+    if memo is None:
+        return
+    current = memo.get(user_id)
+    if current is None or current[1] <= version:
+        memo[user_id] = (balance, version)
+
+
+async def lookup(user_id: PydanticObjectId) -> tuple[int, int] | None:
+    """Request memo, then L1/Redis. None means read MongoDB and store()."""
+    found = get_memoized(user_id)
+    if found is not None:
+        return found
+    cache = get_balance_cache()
+    found = await cache.get(user_id) if cache else None
+    if found is not None:
+        memoize(user_id, *found)
+    return found
+
+
+async def store(user_id: PydanticObjectId, balance: int, version: int) -> None:
+    """Write (balance, version) through the request memo, L1 and Redis."""
+    memoize(user_id, balance, version)
+    cache = get_balance_cache()
+    if cache:
+        await cache.put(user_id, balance, version)
+
+
+async def invalidate(user_id: PydanticObjectId) -> None:
+    memo = _request_balances.get()
+    if memo is not None:
+        memo.pop(user_id, None)
+    cache = get_balance_cache()
+    if cache:
+        await cache.invalidate(user_id)
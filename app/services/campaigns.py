@@ -1,14 +1,20 @@
 """Campaign preview and schedule: create emails in Gmail (drafts), schedule at random time; Gmail sends at send_at."""
 
+import asyncio
+import math
 import random
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel
 
 from app.core.config import get_settings
 from app.core.exceptions import BadRequestError, NotFoundError
 from app.core.logging import get_logger
+from app.core.redis import get_redis
 from app.core.security import generate_idempotency_key
 from app.models.campaign import Campaign
 from app.models.gmail_account import GmailAccount
@@ -18,10 +24,19 @@ from app.models.scheduled_email import ScheduledEmail
 from app.models.template import Template
 from app.models.user import User
 from app.services import credits as credits_service
-from app.services.gmail import create_draft_in_gmail
+from app.services.gmail import GmailRatePacer, create_drafts_batch
+from app.services.rate_limit import gmail_daily_cap, wait_for_api_tokens
+from app.services.recipients import count_sendable_items, iter_sendable_pages
+from app.services.schedule_writer import ScheduledEmailWriter
 from app.services.templates import inject_footer
 
 log = get_logger(__name__)
+SCHEDULE_MIN_DELAY_SECONDS = 60
+SECONDS_PER_DAY = 24 * 3600
+
+
+class _ScheduledRecipientView(BaseModel):
+    recipient_item_id: str | None = None
 
 
 async def create_campaign(
@@ -87,6 +102,7 @@ async def get_campaign_detail(campaign_id: PydanticObjectId, user_id: PydanticOb
         "status": campaign.status,
         "scheduling_status": getattr(campaign, "scheduling_status", "idle"),
         "scheduling_total": getattr(campaign, "scheduling_total", 0),
+        "scheduling_failed_count": getattr(campaign, "scheduling_failed_count", 0),
         "template": {
             "id": str(template.id) if template else None,
             "name": getattr(template, "name", None) if template else None,
@@ -121,21 +137,17 @@ async def preview_campaign(
         list_user = await rlist.user.fetch()
         if str(list_user.id) != str(user_id):
             raise BadRequestError("List not found")
-        items = await RecipientItem.find(RecipientItem.list.id == rlist.id).to_list()
-        from app.services.suppression import list_suppressed_emails
-        suppressed = await list_suppressed_emails(str(user_id))
-        items = [i for i in items if i.email not in suppressed and ((i.chosen_email or i.email) not in suppressed)]
-        count = len(items)
+        count = await count_sendable_items(rlist.id, str(user_id))
     else:
         count = 0
     credits_needed = count * get_settings().credits_per_send
     log.info("preview_campaign_ok", campaign_id=str(campaign_id), recipient_count=count, credits_required=credits_needed)
 
-    # Gmail quota and rate-density for frontend
-    gmail = await GmailAccount.find_one(GmailAccount.user.id == user_id, GmailAccount.revoked == False)  # noqa: E712
-    daily_send_limit = getattr(gmail, "daily_send_limit", 500) if gmail else 500
-    emails_per_day = count  # single-day schedule; could be split over days later
-    within_daily_limit = emails_per_day <= daily_send_limit
+    # Gmail quota and rate-density for frontend; scheduling spreads over accounts and days (see _SendSlotPlanner)
+    accounts = await _sending_accounts(user_id)
+    daily_send_limit = sum(_daily_capacity(a) for a in accounts) if accounts else 500
+    days_needed = math.ceil(count / daily_send_limit) if count else 0
+    within_daily_limit = count <= daily_send_limit
     rate_density_warning = count > 100  # 100+ in short window
 
     return {
@@ -144,6 +156,8 @@ async def preview_campaign(
         "credits_per_send": get_settings().credits_per_send,
         "daily_send_limit": daily_send_limit,
         "within_daily_limit": within_daily_limit,
+        "sending_accounts": len(accounts),
+        "days_needed": days_needed,
         "rate_density_warning": rate_density_warning,
     }
 
@@ -174,8 +188,7 @@ async def schedule_campaign(
     template = await campaign.template.fetch()
     if not template:
         raise BadRequestError("Template not found")
-    gmail = await GmailAccount.find_one(GmailAccount.user.id == user_id, GmailAccount.revoked == False)  # noqa: E712
-    if not gmail:
+    if not await _sending_accounts(user_id):
         raise BadRequestError("Connect Gmail first")
     if campaign.recipient_source != "list" or not campaign.recipient_list_id:
         raise BadRequestError("Campaign has no recipient list")
@@ -184,20 +197,12 @@ async def schedule_campaign(
         raise BadRequestError("List not found")
     if str((await rlist.user.fetch()).id) != str(user_id):
         raise BadRequestError("List not found")
-    items = await RecipientItem.find(RecipientItem.list.id == rlist.id).limit(500).to_list()
-    from app.services.suppression import list_suppressed_emails
-    suppressed = await list_suppressed_emails(str(user_id))
-    items = [i for i in items if i.email not in suppressed and ((i.chosen_email or i.email) not in suppressed)]
-    if not items:
+    # Lists larger than one day's quota are spread over accounts and days by the background job
+    total = await count_sendable_items(rlist.id, str(user_id))
+    if not total:
         raise BadRequestError("No recipients in list")
-    daily_send_limit = getattr(gmail, "daily_send_limit", 500)
-    if len(items) > daily_send_limit:
-        raise BadRequestError(
-            f"Cannot schedule {len(items)} emails: Gmail daily limit is {daily_send_limit}. "
-            "Split your campaign or add more sending accounts."
-        )
     key = idempotency_key or generate_idempotency_key()
-    credits_needed = len(items) * get_settings().credits_per_send
+    credits_needed = total * get_settings().credits_per_send
     balance = await credits_service.get_balance(user_id)
     if balance < credits_needed:
         raise BadRequestError("Insufficient credits")
@@ -209,20 +214,26 @@ async def schedule_campaign(
         reference_id=str(campaign_id),
         idempotency_key=key,
     )
-    campaign.scheduling_status = "in_progress"
-    campaign.scheduling_total = len(items)
-    campaign.scheduled_count = 0
-    campaign.updated_at = datetime.now(timezone.utc)
-    await campaign.save()
+    # Targeted $set, never save(): the send cycle $inc's sent_count/failed_count on the same document
+    await Campaign.find_one(Campaign.id == campaign.id).update(
+        {
+            "$set": {
+                "scheduling_status": "in_progress",
+                "scheduling_total": total,
+                "scheduled_count": 0,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        }
+    )
 
     if get_settings().run_schedule_in_process:
-        log.info("schedule_campaign_in_process", campaign_id=str(campaign_id), total=len(items))
+        log.info("schedule_campaign_in_process", campaign_id=str(campaign_id), total=total)
         await run_schedule_campaign_background(str(campaign_id), str(user_id), key)
         campaign = await get_campaign(campaign_id, user_id)
         return {
             "scheduling_status": campaign.scheduling_status if campaign else "completed",
-            "scheduled_count": campaign.scheduled_count if campaign else len(items),
-            "scheduling_total": len(items),
+            "scheduled_count": campaign.scheduled_count if campaign else total,
+            "scheduling_total": total,
             "idempotency_key": key,
         }
     from app.worker.tasks import enqueue_schedule_campaign  # avoid circular import at module load
@@ -230,19 +241,18 @@ async def schedule_campaign(
         await enqueue_schedule_campaign(str(campaign_id), str(user_id), key)
     except Exception as e:
         log.warning("schedule_campaign_enqueue_failed", campaign_id=str(campaign_id), error=str(e)[:200])
-        campaign.scheduling_status = "idle"
-        campaign.scheduling_total = 0
-        campaign.updated_at = datetime.utcnow()
-        await campaign.save()
+        await Campaign.find_one(Campaign.id == campaign.id).update(
+            {"$set": {"scheduling_status": "idle", "scheduling_total": 0, "updated_at": datetime.utcnow()}}
+        )
         raise BadRequestError(
             "Could not queue scheduling. Is Redis running and REDIS_URL set? Start the Worker (ARQ) to process jobs."
         ) from e
 
-    log.info("schedule_campaign_started", campaign_id=str(campaign_id), user_id=str(user_id), total=len(items))
+    log.info("schedule_campaign_started", campaign_id=str(campaign_id), user_id=str(user_id), total=total)
     return {
         "scheduling_status": "in_progress",
         "scheduled_count": 0,
-        "scheduling_total": len(items),
+        "scheduling_total": total,
         "idempotency_key": key,
     }
 
@@ -251,6 +261,8 @@ async def run_schedule_campaign_background(campaign_id_str: str, user_id_str: st
     """
     Background job: create each email in Gmail (draft for OAuth, or queued for app_password) with random send_at.
     Gmail will send drafts when cron calls drafts.send at send_at.
+    Recipients are streamed page by page and spread over the user's Gmail accounts and, past each
+    account's daily quota, over the following days (_SendSlotPlanner).
     """
     campaign_id = PydanticObjectId(campaign_id_str)
     user_id = PydanticObjectId(user_id_str)
@@ -262,56 +274,131 @@ async def run_schedule_campaign_background(campaign_id_str: str, user_id_str: st
     template = await campaign.template.fetch()
     if not template:
         return
-    gmail = await GmailAccount.find_one(GmailAccount.user.id == user_id, GmailAccount.revoked == False)  # noqa: E712
-    if not gmail:
+    accounts = await _sending_accounts(user_id)
+    if not accounts:
         return
     rlist = await RecipientList.get(PydanticObjectId(campaign.recipient_list_id))
     if not rlist:
         return
-    items = await RecipientItem.find(RecipientItem.list.id == rlist.id).limit(500).to_list()
-    from app.services.suppression import list_suppressed_emails
-    suppressed = await list_suppressed_emails(str(user_id))
-    items = [i for i in items if i.email not in suppressed and ((i.chosen_email or i.email) not in suppressed)]
     body_with_footer = inject_footer(template.body_html, template.unsubscribe_footer)
-    now = datetime.now(timezone.utc)
-    min_delay_seconds = 60
-    max_delay_seconds = 48 * 3600
-    use_oauth = getattr(gmail, "auth_type", "oauth") != "app_password"
-    created = 0
-    for item in items:
-        to = item.chosen_email or item.email
-        subject = template.subject
-        send_at = now + timedelta(seconds=random.uniform(min_delay_seconds, max_delay_seconds))
-        draft_id = None
-        status = "queued"
-        if use_oauth:
-            try:
-                draft_id = await create_draft_in_gmail(gmail, to, subject, body_with_footer)
-                status = "drafted"
-            except Exception as e:
-                log.warning("schedule_campaign_draft_failed", to=to[:50], error=str(e)[:200])
-                continue
-        s = ScheduledEmail(
-            campaign=campaign,
-            gmail_account=gmail,
-            recipient_email=to,
-            subject=subject,
-            body_html=body_with_footer,
-            send_at=send_at,
-            status=status,
-            gmail_draft_id=draft_id,
-            idempotency_key=idempotency_key,
-        )
-        await s.insert()
-        created += 1
-        campaign.scheduled_count = created
-        campaign.updated_at = datetime.now(timezone.utc)
-        await campaign.save()
-
-    campaign.scheduling_status = "completed"
-    campaign.status = "scheduled"
-    campaign.updated_at = datetime.now(timezone.utc)
-    await campaign.save()
+    settings = get_settings()
+    subject = template.subject
+
+    # Resume after a retry / crash: existing rows count as progress and keep their slots
+    assigned = {
+        a.id: await ScheduledEmail.find(
+            ScheduledEmail.campaign.id == campaign.id, ScheduledEmail.gmail_account.id == a.id
+        ).count()
+        for a in accounts
+    }
+    already_scheduled = await ScheduledEmail.find(ScheduledEmail.campaign.id == campaign.id).count()
+    planner = _SendSlotPlanner(accounts, datetime.now(timezone.utc), assigned)
+    writer = ScheduledEmailWriter(campaign.id)
+    await writer.reset_progress(already_scheduled)
+    pool_size = max(1, settings.gmail_draft_concurrency)
+    # Each queue entry is one account's chunk (for OAuth one Gmail batch call: drafts.create x gmail_batch_size).
+    # Bounded, so the producer reads at most a few chunks ahead of the workers.
+    queue: asyncio.Queue[tuple[GmailAccount, list[tuple[RecipientItem, datetime]]] | None] = asyncio.Queue(
+        maxsize=pool_size * 2
+    )
+    pacers = {a.id: GmailRatePacer(settings.gmail_api_qps_per_account) for a in accounts}
+    failed = 0
+    pending = 0
+
+    async def _produce() -> None:
+        nonlocal pending
+        buffers: dict[PydanticObjectId, list[tuple[RecipientItem, datetime]]] = defaultdict(list)
+        async for page in iter_sendable_pages(rlist.id, user_id_str):
+            # Idempotent per recipient: skip items that already have a ScheduledEmail
+            done = await _scheduled_recipient_item_ids(campaign.id, [str(i.id) for i in page])
+            for item in page:
+                if str(item.id) in done:
+                    continue
+                account, send_at = planner.assign()
+                buffer = buffers[account.id]
+                buffer.append((item, send_at))
+                pending += 1
+                if len(buffer) >= _chunk_size(account):
+                    await queue.put((account, buffer))
+                    buffers[account.id] = []
+        for account in accounts:
+            if buffers.get(account.id):
+                await queue.put((account, buffers[account.id]))
+        for _ in range(pool_size):
+            await queue.put(None)
+
+    async def _worker() -> None:
+        nonlocal failed
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                return
+            account, chunk = entry
+            use_oauth = _uses_oauth(account)
+            draft_ids: dict[str, str | Exception] = {}
+            if use_oauth:
+                await pacers[account.id].wait(len(chunk))
+                # Shared per-account budget, so parallel jobs on other workers don't exceed Gmail's QPS
+                await wait_for_api_tokens(get_redis(), str(account.id), len(chunk))
+                draft_ids = await create_drafts_batch(
+                    account,
+                    {str(item.id): (item.chosen_email or item.email, subject, body_with_footer) for item, _ in chunk},
+                )
+            for item, send_at in chunk:
+                to = item.chosen_email or item.email
+                draft_id = None
+                status = "queued"
+                if use_oauth:
+                    result = draft_ids.get(str(item.id))
+                    if not isinstance(result, str):
+                        log.warning("schedule_campaign_draft_failed", to=to[:50], error=str(result)[:200])
+                        failed += 1
+                        continue
+                    draft_id = result
+                    status = "drafted"
+                s = ScheduledEmail(
+                    campaign=campaign,
+                    gmail_account=account,
+                    recipient_email=to,
+                    recipient_item_id=str(item.id),
+                    subject=subject,
+                    body_html=body_with_footer,
+                    send_at=send_at,
+                    status=status,
+                    gmail_draft_id=draft_id,
+                    idempotency_key=idempotency_key,
+                )
+                await writer.add(s)
+
+    log.info(
+        "run_schedule_campaign_background_pool",
+        campaign_id=campaign_id_str,
+        accounts=len(accounts),
+        already_scheduled=already_scheduled,
+        pool_size=pool_size,
+    )
+    tasks = [asyncio.create_task(_produce()), *(asyncio.create_task(_worker()) for _ in range(pool_size))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Persist drafts already created even if a worker failed, so a retry does not recreate them
+        await writer.close()
+
+    created = already_scheduled + writer.inserted
+    # Only the scheduling fields: sends counted ($inc) while this job ran must not be overwritten
+    await Campaign.find_one(Campaign.id == campaign.id).update(
+        {
+            "$set": {
+                "scheduled_count": created,
+                "scheduling_failed_count": failed,
+                "scheduling_status": "completed",
+                "status": "scheduled",
+                "updated_at": datetime.now(timezone.utc),
+            }
+        }
+    )
     from app.core.audit import log_event
     await log_event(str(user_id), "campaign_scheduled", "campaign", str(campaign_id), {"scheduled_count": created})
     from app.services.referrals import grant_referral_reward_if_eligible
@@ -331,4 +418,68 @@ async def run_schedule_campaign_background(campaign_id_str: str, user_id_str: st
             idempotency_key=f"onboarding_bonus_{user_id}",
         )
         log.info("onboarding_completed_on_first_schedule", user_id=str(user_id), credits_added=ONBOARDING_BONUS_CREDITS)
-    log.info("run_schedule_campaign_background_ok", campaign_id=campaign_id_str, scheduled=created)
+    log.info(
+        "run_schedule_campaign_background_ok",
+        campaign_id=campaign_id_str,
+        scheduled=created,
+        planned=pending,
+        failed=failed,
+        days=planner.days_used,
+    )
+
+
+async def _scheduled_recipient_item_ids(campaign_id: PydanticObjectId, item_ids: list[str]) -> set[str]:
+    """Those of item_ids (one page) that already have a ScheduledEmail in this campaign."""
+    rows = await ScheduledEmail.find(
+        ScheduledEmail.campaign.id == campaign_id,
+        In(ScheduledEmail.recipient_item_id, item_ids),
+    ).project(_ScheduledRecipientView).to_list()
+    return {r.recipient_item_id for r in rows if r.recipient_item_id}
+
+
+async def _sending_accounts(user_id: PydanticObjectId) -> list[GmailAccount]:
+    """The user's connected (non-revoked) Gmail accounts, oldest first."""
+    return await GmailAccount.find(
+        GmailAccount.user.id == user_id,
+        GmailAccount.revoked == False,  # noqa: E712
+    ).sort(+GmailAccount.created_at).to_list()
+
+
+def _uses_oauth(account: GmailAccount) -> bool:
+    return getattr(account, "auth_type", "oauth") != "app_password"
+
+
+def _daily_capacity(account: GmailAccount) -> int:
+    """Emails per day planned for an account: its Gmail limit, capped like the send-time quota (rate_limit)."""
+    return max(1, min(getattr(account, "daily_send_limit", 500), gmail_daily_cap()))
+
+
+def _chunk_size(account: GmailAccount) -> int:
+    settings = get_settings()
+    return max(1, settings.gmail_batch_size if _uses_oauth(account) else settings.schedule_insert_batch_size)
+
+
+class _SendSlotPlanner:
+    """
+    Assigns send slots over the sending accounts. An account's k-th email goes on day k // daily capacity
+    at a random time within that day, so no account is planned past its quota; each email goes to the
+    account with the earliest free day (then the least filled), so larger quotas absorb more.
+    """
+
+    def __init__(self, accounts: list[GmailAccount], now: datetime, assigned: dict[Any, int] | None = None) -> None:
+        self.accounts = accounts
+        self.now = now
+        self.assigned = {a.id: (assigned or {}).get(a.id, 0) for a in accounts}
+        self.days_used = 0
+
+    def assign(self) -> tuple[GmailAccount, datetime]:
+        def _load(a: GmailAccount) -> tuple[int, float]:
+            n, capacity = self.assigned[a.id], _daily_capacity(a)
+            return n // capacity, n / capacity
+
+        account = min(self.accounts, key=_load)
+        day = self.assigned[account.id] // _daily_capacity(account)
+        self.assigned[account.id] += 1
+        self.days_used = max(self.days_used, day + 1)
+        offset = random.uniform(SCHEDULE_MIN_DELAY_SECONDS, SECONDS_PER_DAY)
+        return account, self.now + timedelta(days=day, seconds=offset)
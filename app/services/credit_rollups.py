@@ -0,0 +1,210 @@
+"""Ledger aggregates: CreditRollup documents incremented as entries are applied, read in O(1) by stats.
+
+apply_ledger_entry adds an entry to its month and all-time rollups (one bulk_write), then marks it
+applied and rolled_up. Every increment carries a marker id (the entry id) and only applies if the
+rollup does not hold that marker yet, so a crash between the two steps is repaired by replaying the
+entry (recover_pending_entries) without counting it twice. Entries written before rollups existed are
+added by backfill_rollups (worker startup, under a lease) in batches marked the same way: a batch id
+is stamped on the entries, the increments are guarded by it, then the entries are flagged rolled_up;
+a run that stopped half way is finished by the next one.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.core.logging import get_logger
+from app.models.credit_ledger import CreditLedgerEntry
+from app.models.credit_rollup import CreditRollup
+from app.models.lease import Lease
+
+log = get_logger(__name__)
+ALL_TIME = "all"
+BACKFILL_LEASE = "credit_rollups_backfill"
+BACKFILL_LEASE_SECONDS = 300  # renewed after every batch; a crashed runner's lease lapses after this
+BACKFILL_BATCH_SIZE = 1000
+# Marker ids remembered per rollup; an entry must be replayed within this many later entries of its reason
+APPLIED_IDS_KEPT = 200
+DUPLICATE_KEY = 11000
+
+
+def month_key(at: datetime) -> str:
+    return at.strftime("%Y-%m")
+
+
+def rollup_id(user_id: PydanticObjectId, reason: str, month: str) -> str:
+    return f"{user_id}:{reason}:{month}"
+
+
+def _increments(
+    marker: PydanticObjectId, user_id: PydanticObjectId, reason: str, month: str, total: int, entries: int
+) -> list[UpdateOne]:
+    now = datetime.utcnow()
+    return [
+        UpdateOne(
+            {"_id": rollup_id(user_id, reason, key), "applied_ids": {"$ne": marker}},
+            {
+                "$inc": {"total": total, "entries": entries},
+                "$set": {"updated_at": now},
+                "$push": {"applied_ids": {"$each": [marker], "$slice": -APPLIED_IDS_KEPT}},
+                "$setOnInsert": {"user_id": user_id, "reason": reason, "month": key},
+            },
+            upsert=True,
+        )
+        for key in (month, ALL_TIME)
+    ]
+
+
+async def _apply_increments(ops: list[UpdateOne]) -> None:
+    """
+    Marker-guarded upserts: a rollup that already holds the marker does not match, so its upsert
+    fails with a duplicate _id and nothing is counted. That error can also be two first upserts of
+    one rollup racing, so failed ops are retried once; failing again means the marker is there.
+    """
+    collection = CreditRollup.get_motor_collection()
+    for _ in range(2):
+        try:
+            await collection.bulk_write(ops, ordered=False)
+            return
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY for err in errors):
+                raise
+            ops = [ops[err["index"]] for err in errors]
+
+
+async def record(
+    entry_id: PydanticObjectId, user_id: PydanticObjectId, reason: str, amount: int, created_at: datetime
+) -> None:
+    """Add one ledger entry to its month and all-time rollups (one round trip); replaying it is a no-op."""
+    await _apply_increments(_increments(entry_id, user_id, reason, month_key(created_at), amount, 1))
+
+
+async def get_total(user_id: PydanticObjectId, reason: str, month: str = ALL_TIME) -> int:
+    """Sum of amounts for one reason (all time by default)."""
+    doc = await CreditRollup.get_motor_collection().find_one(
+        {"_id": rollup_id(user_id, reason, month)}, {"total": 1}
+    )
+    return int(doc["total"]) if doc else 0
+
+
+async def get_summary(user_id: PydanticObjectId, month: str = ALL_TIME) -> list[CreditRollup]:
+    """Rollups of every reason for one month (or all time)."""
+    return await CreditRollup.find(
+        CreditRollup.user_id == user_id,
+        CreditRollup.month == month,
+    ).sort(+CreditRollup.reason).to_list()
+
+
+async def _roll_up_batch(batch_id: PydanticObjectId) -> int:
+    """Add the entries stamped with `batch_id` (guarded by the batch id), then flag them rolled_up."""
+    collection = CreditLedgerEntry.get_motor_collection()
+    rows = await collection.find(
+        {"rollup_batch": batch_id}, {"user": 1, "reason": 1, "amount": 1, "created_at": 1}
+    ).to_list(None)
+    groups: dict[tuple[PydanticObjectId, str, str], list[int]] = defaultdict(lambda: [0, 0])
+    for r in rows:
+        group = groups[(r["user"].id, r["reason"], month_key(r["created_at"]))]
+        group[0] += r["amount"]
+        group[1] += 1
+    ops = []
+    for (user_id, reason, month), (total, entries) in groups.items():
+        ops.extend(_increments(batch_id, user_id, reason, month, total, entries))
+    if ops:
+        await _apply_increments(ops)
+    await collection.update_many(
+        {"rollup_batch": batch_id}, {"$set": {"rolled_up": True}, "$unset": {"rollup_batch": ""}}
+    )
+    return len(rows)
+
+
+async def backfill_rollups(lease_owner: str | None = None) -> int:
+    """
+    Roll up applied entries that predate rollups, a batch at a time: stamp the batch id on the
+    entries, $inc their totals, flag them rolled_up. Batches left stamped by a run that stopped are
+    finished first. With `lease_owner`, the lease is renewed per batch and the run stops if it was
+    lost. Returns the number of entries added.
+    """
+    collection = CreditLedgerEntry.get_motor_collection()
+    added = 0
+    for batch_id in await collection.distinct("rollup_batch", {"rollup_batch": {"$type": "objectId"}}):
+        added += await _roll_up_batch(batch_id)
+    todo = {"status": {"$ne": "pending"}, "rolled_up": {"$ne": True}, "rollup_batch": None}
+    while True:
+        if lease_owner and not await _renew_lease(lease_owner):
+            log.warning("credit_rollups_backfill_lease_lost", owner=lease_owner, entries=added)
+            return added
+        rows = await collection.find(todo, {"_id": 1}).limit(BACKFILL_BATCH_SIZE).to_list(length=BACKFILL_BATCH_SIZE)
+        if not rows:
+            break
+        batch_id = PydanticObjectId()
+        await collection.update_many(
+            {"_id": {"$in": [r["_id"] for r in rows]}, **todo}, {"$set": {"rollup_batch": batch_id}}
+        )
+        added += await _roll_up_batch(batch_id)
+    log.info("credit_rollups_backfilled", entries=added)
+    return added
+
+
+async def _claim_lease(owner: str) -> bool:
+    """Take the backfill lease if nobody holds an unexpired one and the backfill is not done."""
+    now = datetime.utcnow()
+    try:
+        doc = await Lease.get_motor_collection().find_one_and_update(
+            {
+                "_id": BACKFILL_LEASE,
+                "done": {"$ne": True},
+                "$or": [{"expires_at": None}, {"expires_at": {"$lt": now}}],
+            },
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=BACKFILL_LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The lease exists and is held or done
+        return False
+    return doc is not None and doc.get("owner") == owner
+
+
+async def _renew_lease(owner: str) -> bool:
+    result = await Lease.get_motor_collection().update_one(
+        {"_id": BACKFILL_LEASE, "owner": owner},
+        {"$set": {"expires_at": datetime.utcnow() + timedelta(seconds=BACKFILL_LEASE_SECONDS)}},
+    )
+    return result.matched_count == 1
+
+
+async def _release_lease(owner: str, done: bool) -> None:
+    await Lease.get_motor_collection().update_one(
+        {"_id": BACKFILL_LEASE, "owner": owner},
+        {"$set": {"owner": None, "expires_at": None, "done": done}},
+    )
+
+
+async def backfill_rollups_once(owner: str | None = None) -> None:
+    """
+    Run backfill_rollups under an expiring lease until one run completes. A run that fails or is
+    cancelled releases the lease; one that crashes lets it expire, and a later worker startup takes
+    over. Worker startup runs it as a background task.
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+    if not await _claim_lease(owner):
+        return
+    try:
+        await backfill_rollups(owner)
+    except asyncio.CancelledError:
+        # Worker shutting down: hand the lease back so the next startup resumes right away
+        await _release_lease(owner, done=False)
+        raise
+    except Exception as e:
+        log.warning("credit_rollups_backfill_failed", error=str(e)[:200])
+        await _release_lease(owner, done=False)
+        return
+    await _release_lease(owner, done=True)
@@ -1,6 +1,20 @@
-"""Credits ledger and atomic balance updates."""
+"""Credits ledger and atomic balance updates.
+
+A ledger entry is written ahead as "pending", then the balance moves with one conditional
+find_one_and_update ($inc only if the balance covers a debit, and only if the entry id is not already
+in applied_entries), then the entry is marked "applied". No read-modify-write, so concurrent charges
+cannot lose updates or overdraw. The unique (user, idempotency_key) index makes retries return the
+first entry; a pending entry left by a crash is completed by the next retry with its key or by
+recover_pending_entries (worker startup).
+"""
+
+from datetime import datetime, timedelta
 
 from beanie import PydanticObjectId
+from bson import DBRef
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from app.core.config import get_settings
 from app.core.exceptions import BadRequestError
@@ -8,21 +22,95 @@ from app.core.logging import get_logger
 from app.models.credit_balance import CreditBalance
 from app.models.credit_ledger import CreditLedgerEntry
 from app.models.user import User
+from app.services import balance_cache, credit_rollups
 
 log = get_logger(__name__)
 REASONS = ("signup", "onboarding_bonus", "purchase", "schedule", "verify", "resume_scan", "refund", "referral")
+# Entry ids remembered on the balance doc; a pending entry must be replayed within this many later entries
+APPLIED_ENTRIES_KEPT = 200
+PENDING_RECOVERY_AGE_SECONDS = 60
+
+
+def _user_ref(user_id: PydanticObjectId) -> DBRef:
+    # Link[User] is stored as a DBRef; matching the whole ref uses the ("user", 1) index
+    return DBRef(User.get_collection_name(), user_id)
 
 
 async def get_balance(user_id: PydanticObjectId) -> int:
-    """Return current balance for user (0 if no record)."""
+    """Return current balance for user (0 if no record). Read through the balance cache."""
     log.debug("get_balance", user_id=str(user_id))
-    # Query by .ref so we match how Beanie stores Link[User]
-    bal = await CreditBalance.find_one(CreditBalance.user.ref == user_id)
-    out = bal.balance if bal else 0
+    cached = await balance_cache.lookup(user_id)
+    if cached is not None:
+        return cached[0]
+    bal = await CreditBalance.get_motor_collection().find_one(
+        {"user": _user_ref(user_id)}, {"balance": 1, "version": 1}, sort=[("_id", 1)]
+    )
+    out = bal["balance"] if bal else 0
+    await balance_cache.store(user_id, out, bal.get("version", 0) if bal else 0)
     log.debug("get_balance_ok", user_id=str(user_id), balance=out)
     return out
 
 
+async def _apply_to_balance(entry_id: PydanticObjectId, user_id: PydanticObjectId, amount: int) -> int | None:
+    """
+    Move the balance by `amount` for ledger entry `entry_id`, at most once.
+    Returns the balance after the entry, or None if a debit is not covered. Writes the new balance
+    through the balance cache.
+    """
+    collection = CreditBalance.get_motor_collection()
+    user_ref = _user_ref(user_id)
+    query = {"user": user_ref, "applied_entries": {"$ne": entry_id}}
+    if amount < 0:
+        query["balance"] = {"$gte": -amount}
+    update = {
+        "$inc": {"balance": amount, "version": 1},
+        "$push": {"applied_entries": {"$each": [entry_id], "$slice": -APPLIED_ENTRIES_KEPT}},
+    }
+    for _ in range(2):
+        doc = await collection.find_one_and_update(
+            query,
+            update,
+            projection={"balance": 1, "version": 1},
+            sort=[("_id", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            await balance_cache.store(user_id, doc["balance"], doc["version"])
+            return doc["balance"]
+        # No match: debit not covered, entry already applied, or no balance doc yet
+        current = await collection.find_one(
+            {"user": user_ref}, {"balance": 1, "version": 1, "applied_entries": 1}, sort=[("_id", 1)]
+        )
+        if current is not None:
+            await balance_cache.store(user_id, current["balance"], current.get("version", 0))
+            return current["balance"] if entry_id in current.get("applied_entries", []) else None
+        if amount < 0:
+            return None
+        if not await User.find(User.id == user_id).count():
+            log.warning("apply_ledger_entry_user_not_found", user_id=str(user_id))
+            raise BadRequestError("User not found")
+        # First entry for this user: _id = user id keeps concurrent first credits on one document
+        await collection.update_one(
+            {"_id": user_id},
+            {"$setOnInsert": {"user": user_ref, "balance": 0, "version": 0, "applied_entries": []}},
+            upsert=True,
+        )
+    return None
+
+
+async def _mark_applied(entry: CreditLedgerEntry, user_id: PydanticObjectId, balance_after: int) -> None:
+    """
+    Add the entry to the rollups, then pending -> applied. The rollups ignore an entry id they
+    already hold, so a crash in between is repaired by replaying the still-pending entry.
+    """
+    await credit_rollups.record(entry.id, user_id, entry.reason, entry.amount, entry.created_at)
+    await CreditLedgerEntry.get_motor_collection().update_one(
+        {"_id": entry.id, "status": "pending"},
+        {"$set": {"status": "applied", "balance_after": balance_after, "rolled_up": True}},
+    )
+    entry.status, entry.balance_after, entry.rolled_up = "applied", balance_after, True
+
+
 async def apply_ledger_entry(
     user_id: PydanticObjectId,
     amount: int,
@@ -40,47 +128,107 @@ async def apply_ledger_entry(
     if reason not in REASONS:
         log.warning("apply_ledger_entry_invalid_reason", reason=reason)
         raise BadRequestError(f"Invalid reason: {reason}")
-    user = await User.get(user_id)
-    if not user:
-        log.warning("apply_ledger_entry_user_not_found", user_id=str(user_id))
-        raise BadRequestError("User not found")
-    if idempotency_key:
-        existing = await CreditLedgerEntry.find_one(
-            CreditLedgerEntry.user.ref == user_id,
-            CreditLedgerEntry.idempotency_key == idempotency_key,
-        )
-        if existing:
-            log.info("apply_ledger_entry_idempotent_skip", user_id=str(user_id), idempotency_key=idempotency_key)
-            return existing, await get_balance(user_id)
-
-    current_balance = await get_balance(user_id)
-    balance_after = current_balance + amount
-    if balance_after < 0:
-        log.warning("apply_ledger_entry_insufficient", user_id=str(user_id), current=current_balance, amount=amount)
-        raise BadRequestError("Insufficient credits")
-
-    balance_doc = await CreditBalance.find_one(CreditBalance.user.ref == user_id)
-    if not balance_doc:
-        from beanie import WriteRules
-        balance_doc = CreditBalance(user=user, balance=0)
-        await balance_doc.insert(link_rule=WriteRules.DO_NOTHING)
-    balance_doc.balance = balance_after
-    await balance_doc.save()
-
     entry = CreditLedgerEntry(
-        user=user,
+        user=User.link_from_id(user_id),
         amount=amount,
-        balance_after=balance_after,
+        balance_after=0,
         reason=reason,
         reference_type=reference_type,
         reference_id=reference_id,
         idempotency_key=idempotency_key,
+        status="pending",
     )
-    await entry.insert()
+    existing = None
+    for attempt in range(2):
+        try:
+            await entry.insert()
+            break
+        except DuplicateKeyError:
+            existing = await CreditLedgerEntry.find_one(
+                CreditLedgerEntry.user.id == user_id,
+                CreditLedgerEntry.idempotency_key == idempotency_key,
+            )
+        if existing is not None:
+            break
+        # The attempt holding this key found the debit not covered and deleted its pending entry
+        if attempt:
+            log.warning("apply_ledger_entry_insufficient", user_id=str(user_id), amount=amount)
+            raise BadRequestError("Insufficient credits")
+    if existing is not None:
+        if existing.status == "pending":
+            # Concurrent or crashed attempt with this key: finish it (the balance moves at most once)
+            balance_after = await _apply_to_balance(existing.id, user_id, existing.amount)
+            if balance_after is None:
+                raise BadRequestError("Insufficient credits")
+            await _mark_applied(existing, user_id, balance_after)
+        log.info("apply_ledger_entry_idempotent_skip", user_id=str(user_id), idempotency_key=idempotency_key)
+        return existing, await get_balance(user_id)
+
+    try:
+        balance_after = await _apply_to_balance(entry.id, user_id, amount)
+    except Exception:
+        await entry.delete()
+        raise
+    if balance_after is None:
+        await entry.delete()
+        log.warning("apply_ledger_entry_insufficient", user_id=str(user_id), amount=amount)
+        raise BadRequestError("Insufficient credits")
+    await _mark_applied(entry, user_id, balance_after)
     log.info("apply_ledger_entry_ok", user_id=str(user_id), reason=reason, balance_after=balance_after)
     return entry, balance_after
 
 
+async def recover_pending_entries(older_than_seconds: float = PENDING_RECOVERY_AGE_SECONDS) -> int:
+    """Finish ledger entries left pending by a crash between the ledger insert and the balance $inc."""
+    stale_before = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+    recovered = 0
+    async for entry in CreditLedgerEntry.find(
+        CreditLedgerEntry.status == "pending",
+        CreditLedgerEntry.created_at < stale_before,
+    ):
+        user_id = entry.user.ref.id
+        balance_after = await _apply_to_balance(entry.id, user_id, entry.amount)
+        if balance_after is None:
+            await entry.delete()
+            log.warning("credit_entry_recovery_dropped", entry_id=str(entry.id), user_id=str(user_id), amount=entry.amount)
+            continue
+        await _mark_applied(entry, user_id, balance_after)
+        recovered += 1
+    if recovered:
+        log.warning("credit_entries_recovered", count=recovered)
+    return recovered
+
+
+def ledger_cursor(entry: CreditLedgerEntry) -> str:
+    return f"{entry.created_at.isoformat()}_{entry.id}"
+
+
+async def list_ledger(
+    user_id: PydanticObjectId,
+    limit: int = 50,
+    after: str | None = None,
+) -> list[CreditLedgerEntry]:
+    """
+    Applied entries newest first, keyset-paginated on (created_at, _id); pass ledger_cursor() of the
+    last entry of a page as `after` (index user + created_at + _id, no skip).
+    """
+    query: dict = {"user": _user_ref(user_id), "status": {"$ne": "pending"}}
+    if after:
+        try:
+            created_at_raw, entry_id = after.rsplit("_", 1)
+            created_at = datetime.fromisoformat(created_at_raw)
+            last_id = PydanticObjectId(entry_id)
+        except (ValueError, InvalidId) as e:
+            raise BadRequestError("Invalid cursor") from e
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+    return await CreditLedgerEntry.find(query).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(limit).to_list()
+
+
 def get_pricing():
     log.debug("get_pricing")
     s = get_settings()
@@ -0,0 +1,88 @@
+"""Domain intelligence shared by all users and workers: DomainInfo store and the bundled disposable list.
+
+MxCache (app/services/mx_cache.py) reads DomainInfo for domains missing from its in-process LRU and
+writes back what it resolves, so a domain is looked up in DNS once per DOMAIN_INFO_TTL_SECONDS across
+all processes rather than once per process.
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.domain_info import DomainInfo
+
+log = get_logger(__name__)
+BUNDLED_DISPOSABLE_DOMAINS = Path(__file__).resolve().parent.parent / "data" / "disposable_domains.txt"
+MAX_MX_HOSTS = 5
+
+
+def load_domain_file(path: Path) -> frozenset[str]:
+    """One domain per line; blank lines and # comments ignored."""
+    with open(path, encoding="utf-8") as f:
+        return frozenset(
+            line for line in (raw.split("#", 1)[0].strip().lower() for raw in f) if line
+        )
+
+
+@lru_cache
+def disposable_domains() -> frozenset[str]:
+    """Bundled list plus DISPOSABLE_DOMAINS_FILE, loaded once per process."""
+    domains = load_domain_file(BUNDLED_DISPOSABLE_DOMAINS)
+    extra = get_settings().disposable_domains_file
+    if extra:
+        try:
+            domains |= load_domain_file(Path(extra))
+        except OSError as e:
+            log.warning("disposable_domains_file_unreadable", path=extra, error=str(e)[:200])
+    log.info("disposable_domains_loaded", count=len(domains))
+    return domains
+
+
+def is_disposable_domain(domain: str) -> bool:
+    """Exact match or any parent domain (x.mailinator.com), down to two labels."""
+    domain = domain.strip().lower().rstrip(".")
+    known = disposable_domains()
+    while domain.count(".") >= 1:
+        if domain in known:
+            return True
+        domain = domain.split(".", 1)[1]
+    return False
+
+
+async def load_fresh(domains: list[str]) -> dict[str, DomainInfo]:
+    """Unexpired DomainInfo for `domains` (one $in query on _id)."""
+    if not domains:
+        return {}
+    now = datetime.utcnow()
+    rows = await DomainInfo.find({"_id": {"$in": domains}, "expires_at": {"$gt": now}}).to_list()
+    return {row.id: row for row in rows}
+
+
+async def save_mx_results(results: list[tuple[str, bool, list[str], float]]) -> None:
+    """Upsert (domain, has_mx, mx_hosts, ttl_seconds) rows in one unordered bulk_write."""
+    if not results:
+        return
+    now = datetime.utcnow()
+    await DomainInfo.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {"_id": domain},
+                {
+                    "$set": {
+                        "has_mx": has_mx,
+                        "mx_hosts": mx_hosts[:MAX_MX_HOSTS],
+                        "disposable": is_disposable_domain(domain),
+                        "checked_at": now,
+                        "expires_at": now + timedelta(seconds=ttl),
+                    },
+                },
+                upsert=True,
+            )
+            for domain, has_mx, mx_hosts, ttl in results
+        ],
+        ordered=False,
+    )
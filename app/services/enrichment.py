@@ -1,13 +1,51 @@
 """Enrichment: role-based email generation (careers@, hr@, etc.)."""
 
+import time
+from datetime import datetime
+from typing import Iterable
+
 from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
 
-from app.core.exceptions import NotFoundError
+from app.core.config import get_settings
+from app.core.exceptions import BadRequestError, NotFoundError
+from app.core.logging import get_logger
+from app.models.email_verification_result import EmailVerificationResult
+from app.models.enrichment_job import EnrichmentJob
 from app.models.enrichment_result import EnrichmentResult
 from app.models.recipient_item import RecipientItem
+from app.models.recipient_list import RecipientList
+from app.models.system_recipient import SystemRecipient
 from app.models.user import User
 
+log = get_logger(__name__)
 ROLE_PREFIXES = ("careers", "hr", "talent", "jobs", "hiring", "recruitment", "recruit", "career")
+# Candidate emails per $in probe against past verification results
+PROBE_BATCH_SIZE = 1000
+# Domains kept by one RoleAddressIndex before it starts over (bounds memory on huge lists)
+INDEX_MAX_DOMAINS = 100_000
+
+
+class _IdView(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+
+
+class _ItemView(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    email: str
+    domain: str = ""
+
+
+class _AddressView(BaseModel):
+    email: str
+    domain: str = ""
+
+
+class _VerdictView(BaseModel):
+    email: str
+    result: str
 
 
 def generate_role_emails(domain: str) -> list[tuple[str, str]]:
@@ -18,41 +56,300 @@ def generate_role_emails(domain: str) -> list[tuple[str, str]]:
     return [(f"{prefix}@{domain}", prefix) for prefix in ROLE_PREFIXES]
 
 
+def choose_email(email: str, domain: str) -> tuple[str, str]:
+    """(chosen_email, role) for an item: first role address of its domain, else the item's own email."""
+    domain = domain or (email.split("@", 1)[1] if "@" in email else "")
+    candidates = generate_role_emails(domain)
+    return candidates[0] if candidates else (email, "")
+
+
+def _role_rank(email: str) -> int:
+    local = email.split("@", 1)[0]
+    return ROLE_PREFIXES.index(local) if local in ROLE_PREFIXES else len(ROLE_PREFIXES)
+
+
+def _domain_of(email: str, domain: str) -> str:
+    return (domain or (email.split("@", 1)[1] if "@" in email else "")).strip().lower()
+
+
+class RoleAddressIndex:
+    """
+    domain -> best known role address, filled per batch of unseen domains with two queries:
+    SystemRecipient addresses at those domains (role prefixes first), and past verification results
+    for the generated role addresses. Preference: a SystemRecipient address, then a generated address
+    verified valid, then the first generated address not verified invalid. choose() is a dict lookup.
+    """
+
+    def __init__(self, max_domains: int = INDEX_MAX_DOMAINS) -> None:
+        self.max_domains = max_domains
+        self._best: dict[str, tuple[str, str, bool]] = {}
+
+    async def load(self, domains: Iterable[str]) -> None:
+        wanted = {d for d in (x.strip().lower() for x in domains) if d}
+        new = [d for d in wanted if d not in self._best]
+        if not new:
+            return
+        if len(self._best) + len(new) > self.max_domains:
+            self._best.clear()
+            new = list(wanted)
+        system: dict[str, list[str]] = {}
+        async for rec in SystemRecipient.find(In(SystemRecipient.domain, new)).project(_AddressView):
+            system.setdefault(rec.domain.strip().lower(), []).append(rec.email.strip().lower())
+        candidates = [email for d in new if d not in system for email, _ in generate_role_emails(d)]
+        verdicts: dict[str, str] = {}
+        for i in range(0, len(candidates), PROBE_BATCH_SIZE):
+            async for v in EmailVerificationResult.find(
+                In(EmailVerificationResult.email, candidates[i:i + PROBE_BATCH_SIZE])
+            ).project(_VerdictView):
+                if verdicts.get(v.email) != "valid":
+                    verdicts[v.email] = v.result
+        for d in new:
+            self._best[d] = self._pick(d, system.get(d, []), verdicts)
+        log.debug("role_address_index_loaded", domains=len(new), system_domains=len(system), verdicts=len(verdicts))
+
+    @staticmethod
+    def _pick(domain: str, system_emails: list[str], verdicts: dict[str, str]) -> tuple[str, str, bool]:
+        if system_emails:
+            best = min(system_emails, key=_role_rank)
+            local = best.split("@", 1)[0]
+            return best, local if local in ROLE_PREFIXES else "system", True
+        generated = generate_role_emails(domain)
+        for email, role in generated:
+            if verdicts.get(email) == "valid":
+                return email, role, True
+        for email, role in generated:
+            if verdicts.get(email) not in ("invalid", "disposable"):
+                return email, role, False
+        return generated[0][0], generated[0][1], False
+
+    def choose(self, email: str, domain: str) -> tuple[str, str, bool]:
+        """(chosen_email, role, known): known=False means a generated, unverified candidate."""
+        d = _domain_of(email, domain)
+        best = self._best.get(d)
+        if best is not None:
+            return best
+        chosen, role = choose_email(email, d)
+        return chosen, role, False
+
+
 async def enrich_bulk(
     user_id: PydanticObjectId,
     recipient_item_ids: list[PydanticObjectId],
 ) -> list[EnrichmentResult]:
     """
-    For each recipient item (must belong to user's lists), pick first role-based email
-    (e.g. careers@domain) and store. Update recipient_item.chosen_email.
+    For each recipient item (must belong to user's lists), pick a role address for its domain
+    (RoleAddressIndex: known addresses first, else careers@domain etc.) and store.
+    Update recipient_item.chosen_email. Batched: see enrich_items.
     """
     user = await User.get(user_id)
     if not user:
         raise NotFoundError("User not found")
+    batch_size = max(1, get_settings().enrich_batch_size)
+    index = RoleAddressIndex()
+    results: list[EnrichmentResult] = []
+    for start in range(0, len(recipient_item_ids), batch_size):
+        results.extend(await enrich_items(user_id, recipient_item_ids[start:start + batch_size], index))
+    return results
+
+
+async def enrich_items(
+    user_id: PydanticObjectId,
+    recipient_item_ids: list[PydanticObjectId],
+    index: RoleAddressIndex | None = None,
+    job_id: PydanticObjectId | None = None,
+    job_chunk: int | None = None,
+) -> list[EnrichmentResult]:
+    """
+    Enrich one batch of ids: items by $in (projected), ownership of their distinct lists in one
+    query, then _enrich_rows. Ids that are missing or not the user's are skipped.
+    """
+    ids = list(dict.fromkeys(recipient_item_ids))
+    if not ids:
+        return []
+    rows = await RecipientItem.get_motor_collection().find(
+        {"_id": {"$in": ids}}, {"email": 1, "domain": 1, "list": 1}
+    ).to_list(None)
+    list_ids = list({row["list"].id for row in rows if row.get("list") is not None})
+    owned = {
+        v.id
+        for v in await RecipientList.find(
+            In(RecipientList.id, list_ids),
+            RecipientList.user.id == user_id,
+        ).project(_IdView).to_list()
+    } if list_ids else set()
+    by_id = {row["_id"]: row for row in rows if row.get("list") is not None and row["list"].id in owned}
+    items = [
+        (item_id, by_id[item_id].get("email", ""), by_id[item_id].get("domain", ""))
+        for item_id in ids
+        if item_id in by_id
+    ]
+    return await _enrich_rows(user_id, items, index or RoleAddressIndex(), job_id, job_chunk)
+
+
+async def _enrich_rows(
+    user_id: PydanticObjectId,
+    items: list[tuple[PydanticObjectId, str, str]],
+    index: RoleAddressIndex,
+    job_id: PydanticObjectId | None,
+    job_chunk: int | None,
+) -> list[EnrichmentResult]:
+    """Pick addresses from the index for (item_id, email, domain) rows; insert_many + one bulk_write."""
+    await index.load(_domain_of(email, domain) for _, email, domain in items)
+    user_link = User.link_from_id(user_id)
     results = []
-    for rid in recipient_item_ids:
-        item = await RecipientItem.get(rid)
-        if not item:
-            continue
-        await item.fetch_link(RecipientItem.list)
-        rlist = await item.list.fetch()
-        if not rlist:
-            continue
-        list_user = await rlist.user.fetch()
-        if not list_user or str(list_user.id) != str(user_id):
-            continue
-        domain = item.domain or (item.email.split("@", 1)[1] if "@" in item.email else "")
-        candidates = generate_role_emails(domain)
-        chosen = candidates[0][0] if candidates else item.email
-        role = candidates[0][1] if candidates else ""
-        er = EnrichmentResult(
-            user=user,
-            recipient_item=item,
+    for item_id, email, domain in items:
+        chosen, role, _ = index.choose(email, domain)
+        results.append(EnrichmentResult(
+            user=user_link,
+            recipient_item=RecipientItem.link_from_id(item_id),
             chosen_email=chosen,
             role=role,
+            job_id=job_id,
+            job_chunk=job_chunk,
+        ))
+    if results:
+        await EnrichmentResult.insert_many(results)
+        await RecipientItem.get_motor_collection().bulk_write(
+            [UpdateOne({"_id": r.recipient_item.ref.id}, {"$set": {"chosen_email": r.chosen_email}}) for r in results],
+            ordered=False,
         )
-        await er.insert()
-        item.chosen_email = chosen
-        await item.save()
-        results.append(er)
+    log.debug("enrich_rows_ok", user_id=str(user_id), enriched=len(results))
     return results
+
+
+async def start_enrichment_job(
+    user_id: PydanticObjectId,
+    recipient_item_ids: list[PydanticObjectId],
+) -> EnrichmentJob:
+    """Create an EnrichmentJob for a large selection and hand it to the worker (or run it in process)."""
+    ids = list(dict.fromkeys(recipient_item_ids))
+    if not ids:
+        raise BadRequestError("No recipient items to enrich")
+    user = await User.get(user_id)
+    if not user:
+        raise NotFoundError("User not found")
+    settings = get_settings()
+    job = EnrichmentJob(
+        user=user,
+        recipient_item_ids=ids,
+        total=len(ids),
+        chunk_size=max(1, settings.enrich_batch_size),
+    )
+    await job.insert()
+    log.info("enrich_job_created", job_id=str(job.id), user_id=str(user_id), total=job.total)
+    return await _dispatch_job(job)
+
+
+async def _dispatch_job(job: EnrichmentJob) -> EnrichmentJob:
+    """Enqueue for the worker, or run now with RUN_ENRICHMENT_IN_PROCESS."""
+    if get_settings().run_enrichment_in_process:
+        await run_enrichment_job(str(job.id))
+        return await EnrichmentJob.get(job.id) or job
+    from app.worker.tasks import enqueue_enrich_bulk  # avoid circular import at module load
+    try:
+        await enqueue_enrich_bulk(str(job.id))
+    except Exception as e:
+        log.warning("enrich_job_enqueue_failed", job_id=str(job.id), error=str(e)[:200])
+        await _finish_job(job.id, "failed", "Could not queue enrichment")
+        raise BadRequestError(
+            "Could not queue enrichment. Is Redis running and REDIS_URL set? Start the Worker (ARQ) to process jobs."
+        ) from e
+    return job
+
+
+async def start_list_enrichment(user_id: PydanticObjectId, list_id: PydanticObjectId) -> EnrichmentJob:
+    """Enrich every item of one of the user's lists in a single streaming pass (always a job)."""
+    from app.services.recipients import get_list
+    if not await get_list(user_id, list_id):
+        raise BadRequestError("List not found")
+    total = await RecipientItem.find(RecipientItem.list.id == list_id).count()
+    if not total:
+        raise BadRequestError("List has no items")
+    user = await User.get(user_id)
+    job = EnrichmentJob(
+        user=user,
+        list_id=list_id,
+        total=total,
+        chunk_size=max(1, get_settings().enrich_batch_size),
+    )
+    await job.insert()
+    log.info("enrich_list_job_created", job_id=str(job.id), user_id=str(user_id), list_id=str(list_id), total=total)
+    return await _dispatch_job(job)
+
+
+async def get_enrichment_job(user_id: PydanticObjectId, job_id: PydanticObjectId) -> EnrichmentJob | None:
+    return await EnrichmentJob.find_one(EnrichmentJob.id == job_id, EnrichmentJob.user.id == user_id)
+
+
+async def run_enrichment_job(job_id: str, final_attempt: bool = True) -> None:
+    """
+    Worker body of a bulk enrichment (selected ids, or a whole list paged by _id), one progress update
+    per chunk; one RoleAddressIndex serves the whole run. A re-run resumes after the last completed
+    chunk and drops results of a chunk that was only partly written. If a chunk fails the job stays
+    running for the next attempt; only the final attempt marks it failed.
+    """
+    job = await EnrichmentJob.get(PydanticObjectId(job_id))
+    if not job or job.status in ("completed", "failed"):
+        return
+    user_id = job.user.ref.id
+    if job.status == "running":
+        await EnrichmentResult.find(
+            EnrichmentResult.job_id == job.id,
+            EnrichmentResult.job_chunk >= job.chunks_done,
+        ).delete()
+    await EnrichmentJob.find_one(EnrichmentJob.id == job.id).update(
+        {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+    )
+    started = time.perf_counter()
+    index = RoleAddressIndex()
+    try:
+        chunk = job.chunks_done
+        if job.list_id is not None:
+            # Ownership was checked when the job was created; items stream in _id order
+            from app.services.recipients import iter_list_item_pages
+            async for page in iter_list_item_pages(job.list_id, job.chunk_size, _ItemView, after_id=job.last_item_id):
+                rows = [(item.id, item.email, item.domain) for item in page]
+                results = await _enrich_rows(user_id, rows, index, job.id, chunk)
+                await _commit_chunk(job.id, chunk, len(page), len(results), last_item_id=page[-1].id)
+                chunk += 1
+        else:
+            for start in range(chunk * job.chunk_size, len(job.recipient_item_ids), job.chunk_size):
+                ids = job.recipient_item_ids[start:start + job.chunk_size]
+                results = await enrich_items(user_id, ids, index, job_id=job.id, job_chunk=chunk)
+                await _commit_chunk(job.id, chunk, len(ids), len(results))
+                chunk += 1
+    except Exception as e:
+        if not final_attempt:
+            log.warning("enrich_job_interrupted", job_id=job_id, chunk=chunk, error=str(e)[:200])
+            raise
+        await _finish_job(job.id, "failed", str(e)[:500])
+        raise
+    await _finish_job(job.id, "completed")
+    log.info(
+        "enrich_job_done",
+        job_id=job_id,
+        total=job.total,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+async def _commit_chunk(
+    job_id: PydanticObjectId,
+    chunk: int,
+    processed: int,
+    enriched: int,
+    last_item_id: PydanticObjectId | None = None,
+) -> None:
+    fields: dict = {"chunks_done": chunk + 1, "updated_at": datetime.utcnow()}
+    if last_item_id is not None:
+        fields["last_item_id"] = last_item_id
+    await EnrichmentJob.find_one(EnrichmentJob.id == job_id).update(
+        {"$inc": {"processed_count": processed, "enriched_count": enriched}, "$set": fields}
+    )
+
+
+async def _finish_job(job_id: PydanticObjectId, status: str, error: str | None = None) -> None:
+    now = datetime.utcnow()
+    await EnrichmentJob.find_one(EnrichmentJob.id == job_id).update(
+        {"$set": {"status": status, "error": error, "updated_at": now, "finished_at": now}}
+    )
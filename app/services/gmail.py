@@ -1,15 +1,16 @@
 """Gmail OAuth, app password, and token lifecycle."""
 
+import asyncio
 import base64
 import smtplib
 from datetime import datetime, timezone
 from email.mime.text import MIMEText
+from typing import Any, Awaitable, Callable
 
 from beanie import PydanticObjectId
 from google.auth.transport import requests as google_requests
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from app.core.config import get_settings
@@ -22,10 +23,24 @@ from app.models.gmail_account import (
     GmailAccount,
 )
 from app.models.user import User
+from app.services.gmail_client import (
+    build_gmail_service,
+    execute,
+    execute_batch,
+    get_gmail_service,
+    run_blocking,
+)
+from app.services.smtp_pool import build_message, get_smtp_pool
 
 log = get_logger(__name__)
 GMAIL_SMTP_HOST = "smtp.gmail.com"
 GMAIL_SMTP_PORT = 587
+# Gmail HTTP batch: at most 100 sub-requests; Google recommends <= 50 to avoid rate limiting
+GMAIL_BATCH_MAX = 100
+GMAIL_BATCH_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses that mean the sub-request was not applied; anything else transient may have been (e.g. a sent draft)
+GMAIL_NOT_APPLIED_STATUSES = frozenset({429})
+GMAIL_BATCH_MAX_ATTEMPTS = 4
 # Heuristic: messagesTotal below this suggests new account
 GMAIL_NEW_ACCOUNT_MESSAGES_THRESHOLD = 30
 
@@ -74,7 +89,7 @@ def get_authorization_url(redirect_uri: str | None = None, state: str | None = N
 async def exchange_code_and_save(user_id: PydanticObjectId, code: str, redirect_uri: str | None = None) -> GmailAccount:
     log.info("exchange_code_and_save", user_id=str(user_id))
     flow = get_oauth_flow(redirect_uri)
-    flow.fetch_token(code=code)
+    await run_blocking(lambda: flow.fetch_token(code=code))
     credentials = flow.credentials
     account = await _store_credentials(user_id, credentials, flow.oauth2session.scope or "")
     from app.core.audit import log_event
@@ -159,8 +174,8 @@ async def _store_credentials(
 async def _fetch_profile_email(credentials) -> str:
     log.debug("_fetch_profile_email")
     try:
-        service = build("gmail", "v1", credentials=credentials)
-        profile = service.users().getProfile(userId="me").execute()
+        service = await run_blocking(build_gmail_service, credentials)
+        profile = await run_blocking(service.users().getProfile(userId="me").execute)
         return profile.get("emailAddress", "")
     except HttpError:
         return ""
@@ -188,7 +203,7 @@ async def refresh_access_token(account: GmailAccount) -> str:
     creds = _credentials_from_account(account)
     if not creds.refresh_token:
         raise BadRequestError("No refresh token")
-    creds.refresh(google_requests.Request())
+    await run_blocking(creds.refresh, google_requests.Request())
     account.access_token_encrypted = encrypt_token(creds.token or "")
     account.token_expiry = creds.expiry
     account.updated_at = datetime.utcnow()
@@ -212,9 +227,8 @@ async def verify_gmail_account(account: GmailAccount) -> dict:
     """Call Gmail profile to verify token; return profile snippet with daily_send_limit and is_new_account."""
     log.info("verify_gmail_account", account_id=str(account.id))
     token = await get_valid_access_token(account)
-    creds = Credentials(token=token)
-    service = build("gmail", "v1", credentials=creds)
-    profile = service.users().getProfile(userId="me").execute()
+    service = get_gmail_service(str(account.id), token)
+    profile = await execute(service.users().getProfile(userId="me"))
     messages_total = profile.get("messagesTotal") or 0
     is_new_account = messages_total < GMAIL_NEW_ACCOUNT_MESSAGES_THRESHOLD
     return {
@@ -267,7 +281,7 @@ async def add_account_app_password(
         raise BadRequestError("Invalid email")
     if not app_password or len(app_password.strip()) < 10:
         raise BadRequestError("Invalid app password")
-    if not verify_smtp_app_password(email, app_password):
+    if not await run_blocking(verify_smtp_app_password, email, app_password):
         log.warning("add_account_app_password_smtp_failed", user_id=str(user_id), email=email)
         raise BadRequestError("Could not sign in with this email and app password. Check 2FA is on and you're using an app password.")
     await _ensure_email_not_linked_to_other_user(email, user_id)
@@ -340,6 +354,26 @@ def get_app_password_plain(account: GmailAccount) -> str:
     return decrypt_token(account.app_password_encrypted or "")
 
 
+class GmailRatePacer:
+    """Spaces out Gmail API calls for one account to at most `qps` calls per second (in-process)."""
+
+    def __init__(self, qps: float) -> None:
+        self._interval = 1.0 / qps if qps > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self, calls: int = 1) -> None:
+        """Wait for a slot, then reserve `calls` calls (a batch counts each sub-request)."""
+        if not self._interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = max(loop.time(), self._next_at) + self._interval * calls
+
+
 def _make_raw_message(to: str, subject: str, body_html: str, from_email: str) -> str:
     """Build RFC 2822 message and return base64url-encoded raw for Gmail API."""
     msg = MIMEText(body_html, "html")
@@ -356,10 +390,9 @@ async def create_draft_in_gmail(account: GmailAccount, to: str, subject: str, bo
     """
     log.debug("create_draft_in_gmail", account_id=str(account.id), to=to[:50])
     token = await get_valid_access_token(account)
-    creds = Credentials(token=token)
-    service = build("gmail", "v1", credentials=creds)
+    service = get_gmail_service(str(account.id), token)
     raw = _make_raw_message(to, subject, body_html, account.email)
-    draft = service.users().drafts().create(userId="me", body={"message": {"raw": raw}}).execute()
+    draft = await execute(service.users().drafts().create(userId="me", body={"message": {"raw": raw}}))
     draft_id = draft.get("id", "")
     log.debug("create_draft_in_gmail_ok", account_id=str(account.id), draft_id=draft_id)
     return draft_id
@@ -372,10 +405,9 @@ async def send_email_via_gmail_api(account: GmailAccount, to: str, subject: str,
     """
     log.debug("send_email_via_gmail_api", account_id=str(account.id), to=to[:50])
     token = await get_valid_access_token(account)
-    creds = Credentials(token=token)
-    service = build("gmail", "v1", credentials=creds)
+    service = get_gmail_service(str(account.id), token)
     raw = _make_raw_message(to, subject, body_html, account.email)
-    result = service.users().messages().send(userId="me", body={"raw": raw}).execute()
+    result = await execute(service.users().messages().send(userId="me", body={"raw": raw}))
     msg_id = result.get("id", "")
     log.debug("send_email_via_gmail_api_ok", account_id=str(account.id), message_id=msg_id)
     return msg_id
@@ -387,25 +419,167 @@ async def send_draft_via_gmail_api(account: GmailAccount, draft_id: str) -> str:
     """
     log.debug("send_draft_via_gmail_api", account_id=str(account.id), draft_id=draft_id)
     token = await get_valid_access_token(account)
-    creds = Credentials(token=token)
-    service = build("gmail", "v1", credentials=creds)
-    result = service.users().drafts().send(userId="me", body={"id": draft_id}).execute()
+    service = get_gmail_service(str(account.id), token)
+    result = await execute(service.users().drafts().send(userId="me", body={"id": draft_id}))
     msg_id = result.get("id", "")
     log.debug("send_draft_via_gmail_api_ok", account_id=str(account.id), message_id=msg_id)
     return msg_id
 
 
+def _error_status(error: Exception) -> int | None:
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return int(status) if status is not None else None
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = _error_status(error)
+    return status is None or status in GMAIL_BATCH_RETRY_STATUSES
+
+
+def _is_not_applied(error: Exception) -> bool:
+    return _error_status(error) in GMAIL_NOT_APPLIED_STATUSES
+
+
+async def _run_batched(
+    account: GmailAccount,
+    keys: list[str],
+    make_request: Callable[[Any, str], Any],
+    safe_to_retry: Callable[[Exception], bool] = _is_retryable,
+    recheck: Callable[[Any, str], Awaitable[dict | Exception | None]] | None = None,
+) -> dict[str, dict | Exception]:
+    """
+    Run one Gmail sub-request per key through HTTP batch calls (<= gmail_batch_size per call).
+    Retries failed sub-requests with a retryable status (429/5xx/transport) with backoff, as long as
+    safe_to_retry(error). Other retryable failures may already have been applied: recheck(service, key)
+    returns the response if it was (final), None if it was not (retried), or an Exception if that can't
+    be told (final failure). Without recheck, or if recheck raises, the original error is final.
+    Returns key -> response dict or the final Exception for that key.
+    """
+    batch_size = max(1, min(get_settings().gmail_batch_size, GMAIL_BATCH_MAX))
+    results: dict[str, dict | Exception] = {}
+    pending = list(keys)
+    for attempt in range(1, GMAIL_BATCH_MAX_ATTEMPTS + 1):
+        token = await get_valid_access_token(account)
+        service = get_gmail_service(str(account.id), token)
+        retry: list[str] = []
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            chunk_results: dict[str, dict | Exception] = {}
+
+            def _callback(request_id: str, response: dict, exception: Exception | None) -> None:
+                chunk_results[request_id] = exception if exception is not None else response
+
+            batch = service.new_batch_http_request(callback=_callback)
+            for key in chunk:
+                batch.add(make_request(service, key), request_id=key)
+            try:
+                await execute_batch(batch, token)
+            except Exception as e:
+                # Whole batch failed (transport/auth): every unanswered sub-request gets the error
+                for key in chunk:
+                    chunk_results.setdefault(key, e)
+            ambiguous: list[tuple[str, Exception]] = []
+            for key in chunk:
+                outcome = chunk_results.get(key, RuntimeError("No response for batch sub-request"))
+                if isinstance(outcome, Exception) and attempt < GMAIL_BATCH_MAX_ATTEMPTS and _is_retryable(outcome):
+                    if safe_to_retry(outcome):
+                        retry.append(key)
+                    elif recheck is not None:
+                        ambiguous.append((key, outcome))
+                    else:
+                        results[key] = outcome
+                else:
+                    results[key] = outcome
+            if ambiguous:
+                async def _checked(key: str, error: Exception) -> dict | Exception | None:
+                    try:
+                        return await recheck(service, key)
+                    except Exception as e:
+                        log.warning("gmail_batch_recheck_failed", account_id=str(account.id), key=key, error=str(e)[:200])
+                        return error
+
+                checked = await asyncio.gather(*(_checked(key, error) for key, error in ambiguous))
+                for (key, _), state in zip(ambiguous, checked):
+                    if state is None:
+                        retry.append(key)
+                    else:
+                        results[key] = state
+        if not retry:
+            break
+        log.info("gmail_batch_retry", account_id=str(account.id), attempt=attempt, retry=len(retry))
+        await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+        pending = retry
+    return results
+
+
+async def create_drafts_batch(
+    account: GmailAccount,
+    messages: dict[str, tuple[str, str, str]],
+) -> dict[str, str | Exception]:
+    """
+    Create many drafts (OAuth) via Gmail batch requests.
+    messages: key -> (to, subject, body_html). Returns key -> draft id, or the Exception for that key.
+    """
+    log.debug("create_drafts_batch", account_id=str(account.id), count=len(messages))
+    raws = {key: _make_raw_message(to, subject, body, account.email) for key, (to, subject, body) in messages.items()}
+    # drafts.create is not idempotent: a 5xx/transport failure may have created the draft, so only
+    # 429s are retried here; other failures are final and left to the campaign-level retry
+    results = await _run_batched(
+        account,
+        list(raws),
+        lambda service, key: service.users().drafts().create(userId="me", body={"message": {"raw": raws[key]}}),
+        safe_to_retry=_is_not_applied,
+    )
+    out = {key: r if isinstance(r, Exception) else r.get("id", "") for key, r in results.items()}
+    log.debug("create_drafts_batch_ok", account_id=str(account.id), failed=sum(isinstance(r, Exception) for r in out.values()))
+    return out
+
+
+async def send_drafts_batch(account: GmailAccount, drafts: dict[str, str]) -> dict[str, str | Exception]:
+    """
+    Send many existing drafts (OAuth) via Gmail batch requests.
+    drafts: key -> Gmail draft id. Returns key -> message id, or the Exception for that key.
+    """
+    log.debug("send_drafts_batch", account_id=str(account.id), count=len(drafts))
+
+    async def _recheck(service, key: str) -> Exception | None:
+        # drafts.send deletes the draft: still there = not sent (safe to resend). Gone is either sent or
+        # deleted by the user, and the two look the same, so the send is not confirmed: fail it
+        try:
+            await execute(service.users().drafts().get(userId="me", id=drafts[key], format="minimal"))
+        except HttpError as e:
+            if _error_status(e) == 404:
+                log.warning("gmail_draft_missing", account_id=str(account.id), draft_id=drafts[key])
+                return RuntimeError("Gmail draft missing (sent or deleted); send not confirmed")
+            raise
+        return None
+
+    results = await _run_batched(
+        account,
+        list(drafts),
+        lambda service, key: service.users().drafts().send(userId="me", body={"id": drafts[key]}),
+        safe_to_retry=_is_not_applied,
+        recheck=_recheck,
+    )
+    out = {key: r if isinstance(r, Exception) else r.get("id", "") for key, r in results.items()}
+    log.debug("send_drafts_batch_ok", account_id=str(account.id), failed=sum(isinstance(r, Exception) for r in out.values()))
+    return out
+
+
 def send_email_smtp(sender_email: str, app_password: str, to: str, subject: str, body_html: str) -> None:
     """Send one email via Gmail SMTP with app password."""
     log.debug("send_email_smtp", sender=sender_email[:50], to=to[:50], subject=subject[:50])
-    msg = MIMEText(body_html, "html")
-    msg["Subject"] = subject
-    msg["From"] = sender_email
-    msg["To"] = to
     with smtplib.SMTP(GMAIL_SMTP_HOST, GMAIL_SMTP_PORT, timeout=30) as server:
         server.starttls()
         server.login(sender_email, app_password)
-        server.sendmail(sender_email, [to], msg.as_string())
+        server.sendmail(sender_email, [to], build_message(sender_email, to, subject, body_html))
+
+
+async def send_email_smtp_pooled(sender_email: str, app_password: str, to: str, subject: str, body_html: str) -> None:
+    """Send one email via Gmail SMTP on a pooled, already-authenticated connection (off the event loop)."""
+    log.debug("send_email_smtp_pooled", sender=sender_email[:50], to=to[:50])
+    message = build_message(sender_email, to, subject, body_html)
+    await run_blocking(get_smtp_pool().send, sender_email, app_password, to, message)
 
 
 async def send_verification_test_email(account: GmailAccount) -> None:
@@ -423,7 +597,7 @@ async def send_verification_test_email(account: GmailAccount) -> None:
     if account.auth_type == "app_password":
         try:
             app_password = get_app_password_plain(account)
-            send_email_smtp(account.email, app_password, to, subject, body_html)
+            await run_blocking(send_email_smtp, account.email, app_password, to, subject, body_html)
         except Exception as e:
             log.warning("send_verification_test_email_failed", account_id=str(account.id), reason=str(e)[:200])
             raise BadRequestError("Could not send test email. Check that this account has send permission.") from e
@@ -432,15 +606,14 @@ async def send_verification_test_email(account: GmailAccount) -> None:
     # OAuth: use Gmail API to send
     try:
         token = await get_valid_access_token(account)
-        creds = Credentials(token=token)
-        service = build("gmail", "v1", credentials=creds)
+        service = get_gmail_service(str(account.id), token)
         msg = MIMEText(body_html, "html")
         msg["Subject"] = subject
         msg["From"] = account.email
         msg["To"] = to
         import base64
         raw = base64.urlsafe_b64encode(msg.as_string().encode()).decode()
-        service.users().messages().send(userId="me", body={"raw": raw}).execute()
+        await execute(service.users().messages().send(userId="me", body={"raw": raw}))
         log.info("send_verification_test_email_ok", account_id=str(account.id))
     except Exception as e:
         log.warning("send_verification_test_email_failed", account_id=str(account.id), reason=str(e)[:200])
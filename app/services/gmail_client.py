@@ -0,0 +1,136 @@
+"""Gmail API clients: cached service objects, static discovery document, dedicated executor for blocking calls."""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable
+
+import httplib2
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+HTTP_TIMEOUT_SECONDS = 30
+
+_executor: ThreadPoolExecutor | None = None
+_thread_local = threading.local()
+
+
+@lru_cache
+def _discovery_document() -> dict:
+    """Gmail v1 discovery document bundled with google-api-python-client, parsed once per process."""
+    return json.loads(get_static_doc("gmail", "v1"))
+
+
+def build_gmail_service(credentials) -> Any:
+    """Build a Gmail service from the pre-parsed discovery document (no network, no re-parse)."""
+    return build_from_document(_discovery_document(), credentials=credentials)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().gmail_executor_workers,
+            thread_name_prefix="gmail-api",
+        )
+    return _executor
+
+
+def _thread_http() -> httplib2.Http:
+    """One httplib2.Http (keep-alive connection pool) per executor thread; httplib2 is not thread-safe."""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+        _thread_local.http = http
+    return http
+
+
+def _execute_request(request) -> Any:
+    # Reuse this thread's connections, authorized with the credentials the service was built with
+    http = AuthorizedHttp(request.http.credentials, http=_thread_http())
+    return request.execute(http=http)
+
+
+def _execute_batch(batch, credentials) -> None:
+    batch.execute(http=AuthorizedHttp(credentials, http=_thread_http()))
+
+
+async def execute_batch(batch, token: str) -> None:
+    """Execute a BatchHttpRequest on the Gmail executor; results arrive via the per-request callbacks."""
+    await run_blocking(_execute_batch, batch, Credentials(token=token))
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking Google client call (token refresh, OAuth exchange, SMTP) on the Gmail executor."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+
+
+async def execute(request) -> Any:
+    """Execute a googleapiclient HttpRequest on the Gmail executor; returns the parsed response."""
+    return await run_blocking(_execute_request, request)
+
+
+class GmailClientCache:
+    """
+    Per-account Gmail service objects with TTL and LRU eviction.
+    An entry is rebuilt when the account's access token changes (refresh) or the TTL expires.
+    Only touched from the event loop thread, so no locking.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[str, float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, account_id: str, token: str) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(account_id)
+        if entry and entry[0] == token and entry[1] > now:
+            self._entries.move_to_end(account_id)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        service = build_gmail_service(Credentials(token=token))
+        self._entries[account_id] = (token, now + self.ttl_seconds, service)
+        self._entries.move_to_end(account_id)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            log.debug("gmail_client_cache_evict", account_id=evicted)
+        return service
+
+    def invalidate(self, account_id: str) -> None:
+        self._entries.pop(account_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: GmailClientCache | None = None
+
+
+def get_client_cache() -> GmailClientCache:
+    global _cache
+    if _cache is None:
+        s = get_settings()
+        _cache = GmailClientCache(s.gmail_client_cache_size, s.gmail_client_cache_ttl_seconds)
+    return _cache
+
+
+def get_gmail_service(account_id: str, token: str) -> Any:
+    """Cached Gmail service for an account and its current access token."""
+    return get_client_cache().get(account_id, token)
@@ -0,0 +1,203 @@
+"""Async MX lookups with a per-process, domain-keyed cache (TTL-aware, negative caching).
+
+Verification checks one MX record set per domain, and bulk lists are dominated by a handful of
+domains (gmail.com, outlook.com, the company's own). Lookups go through dns.asyncresolver with a
+bounded number in flight; concurrent lookups of the same domain share one query, and answers are
+cached for the record's TTL (clamped), NXDOMAIN / no-MX answers for negative_ttl. Timeouts and
+server failures are not cached, so a flaky resolver does not pin a domain as invalid.
+
+With persist=True the in-process LRU sits in front of the shared DomainInfo collection
+(app/services/domain_info.py): misses are read from it in one query per batch, and fresh DNS
+answers are written back, so other processes and workers reuse them.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+
+
+class MxCache:
+    """LRU of domain -> (has_mx, expires_at). Not thread-safe; one instance per event loop."""
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        min_ttl: float = 60.0,
+        max_ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        concurrency: int = 50,
+        timeout: float = 5.0,
+        resolver: dns.asyncresolver.Resolver | None = None,
+        persist: bool = False,
+        store_ttl: float = 86400.0,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.min_ttl = min_ttl
+        self.max_ttl = max(min_ttl, max_ttl)
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.persist = persist
+        self.store_ttl = store_ttl
+        self.hits = 0
+        self.store_hits = 0
+        self.lookups = 0
+        self._resolver = resolver
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[bool]] = {}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        # DNS answers not yet written to DomainInfo: (domain, has_mx, mx_hosts, store ttl)
+        self._unsaved: list[tuple[str, bool, list[str], float]] = []
+
+    def _get_resolver(self) -> dns.asyncresolver.Resolver:
+        if self._resolver is None:
+            self._resolver = dns.asyncresolver.Resolver()
+            self._resolver.lifetime = self.timeout
+        return self._resolver
+
+    def get_cached(self, domain: str) -> bool | None:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        has_mx, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[domain]
+            return None
+        self._entries.move_to_end(domain)
+        return has_mx
+
+    def _store(self, domain: str, has_mx: bool, ttl: float) -> None:
+        self._entries[domain] = (has_mx, time.monotonic() + ttl)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def has_mx(self, domain: str) -> bool:
+        """True if the domain publishes MX records. Lookup errors count as False (not cached)."""
+        return (await self.resolve_many([domain])).get(_normalize(domain), False)
+
+    async def resolve_many(self, domains: set[str] | list[str]) -> dict[str, bool]:
+        """
+        Resolve each unique domain once: in-process cache, then DomainInfo (one $in query), then DNS
+        with bounded concurrency. Returns domain -> has_mx.
+        """
+        unique = list(dict.fromkeys(d for d in (_normalize(x) for x in domains if x) if d))
+        out: dict[str, bool] = {}
+        missing = []
+        for domain in unique:
+            cached = self.get_cached(domain)
+            if cached is None:
+                missing.append(domain)
+            else:
+                self.hits += 1
+                out[domain] = cached
+        if missing and self.persist:
+            stored = await self._load_stored(missing)
+            out.update(stored)
+            missing = [d for d in missing if d not in stored]
+        if missing:
+            results = await asyncio.gather(*(self._resolve_shared(d) for d in missing))
+            out.update(zip(missing, results))
+        if self.persist and self._unsaved:
+            await self._save_unsaved()
+        return out
+
+    async def _load_stored(self, domains: list[str]) -> dict[str, bool]:
+        from app.services.domain_info import load_fresh
+        try:
+            rows = await load_fresh(domains)
+        except Exception as e:
+            log.warning("domain_info_load_failed", error=str(e)[:200])
+            return {}
+        now = datetime.utcnow()
+        out = {}
+        for domain, info in rows.items():
+            remaining = (info.expires_at.replace(tzinfo=None) - now).total_seconds()
+            self._store(domain, info.has_mx, min(self.max_ttl, max(1.0, remaining)))
+            out[domain] = info.has_mx
+        self.store_hits += len(out)
+        return out
+
+    async def _save_unsaved(self) -> None:
+        from app.services.domain_info import save_mx_results
+        batch, self._unsaved = self._unsaved, []
+        try:
+            await save_mx_results(batch)
+        except Exception as e:
+            log.warning("domain_info_save_failed", domains=len(batch), error=str(e)[:200])
+
+    async def _resolve_shared(self, domain: str) -> bool:
+        """DNS lookup; concurrent callers for the same domain share one query."""
+        cached = self.get_cached(domain)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        pending = self._inflight.get(domain)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._inflight[domain] = future
+        result = False
+        try:
+            result = await self._lookup(domain)
+            return result
+        finally:
+            # Waiters see a failed (or cancelled) lookup as "no MX", like a lookup error
+            future.set_result(result)
+            del self._inflight[domain]
+
+    async def _lookup(self, domain: str) -> bool:
+        self.lookups += 1
+        async with self._semaphore:
+            try:
+                answer = await self._get_resolver().resolve(domain, "MX", lifetime=self.timeout)
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                self._store(domain, False, self.negative_ttl)
+                self._unsaved.append((domain, False, [], self.negative_ttl))
+                return False
+            except (dns.exception.DNSException, OSError) as e:
+                log.debug("mx_lookup_failed", domain=domain, error=type(e).__name__)
+                return False
+        ttl = answer.rrset.ttl if answer.rrset is not None else self.min_ttl
+        self._store(domain, True, min(self.max_ttl, max(self.min_ttl, ttl)))
+        hosts = [str(r.exchange).rstrip(".").lower() for r in sorted(answer, key=lambda r: r.preference)]
+        self._unsaved.append((domain, True, hosts, max(self.store_ttl, ttl)))
+        return True
+
+
+def _normalize(domain: str) -> str:
+    return domain.strip().lower().rstrip(".")
+
+
+_caches: dict[int, MxCache] = {}
+
+
+def get_mx_cache() -> MxCache:
+    """Process-wide cache for the running event loop (the API and the worker each run one loop)."""
+    loop_id = id(asyncio.get_running_loop())
+    cache = _caches.get(loop_id)
+    if cache is None:
+        settings = get_settings()
+        cache = MxCache(
+            max_entries=settings.mx_cache_size,
+            min_ttl=settings.mx_cache_min_ttl_seconds,
+            max_ttl=settings.mx_cache_max_ttl_seconds,
+            negative_ttl=settings.mx_cache_negative_ttl_seconds,
+            concurrency=settings.verify_dns_concurrency,
+            timeout=settings.verify_dns_timeout_seconds,
+            persist=settings.domain_info_store_enabled,
+            store_ttl=settings.domain_info_ttl_seconds,
+        )
+        _caches.clear()
+        _caches[loop_id] = cache
+    return cache
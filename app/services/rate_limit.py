@@ -1,12 +1,82 @@
-"""Gmail send rate limit: daily cap per account via Redis."""
+"""Gmail send rate limit: daily cap and per-minute token bucket per account via Redis."""
 
-from datetime import datetime
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
 
 from app.core.config import get_settings
+from app.core.logging import get_logger
 
+log = get_logger(__name__)
 KEY_PREFIX = "gmail:send_count"
+BUCKET_PREFIX = "gmail:bucket"
 TTL_SECONDS = 25 * 3600  # 25 hours so key expires after the day
 
+# Atomic check-and-take: daily quota (KEYS[1], skipped when cap <= 0) plus token bucket (KEYS[2]).
+# Grants up to the requested count (partial grants allowed).
+# Returns {granted, retry_after_ms (-1 = daily quota exhausted), daily_count}.
+TAKE_TOKENS_LUA = """
+local requested = tonumber(ARGV[1])
+local daily_cap = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local rate_per_ms = tonumber(ARGV[4])
+local now_ms = tonumber(ARGV[5])
+local daily_ttl = tonumber(ARGV[6])
+
+local daily = 0
+local daily_left = requested
+if daily_cap > 0 then
+  daily = tonumber(redis.call('GET', KEYS[1]) or '0')
+  daily_left = math.max(0, daily_cap - daily)
+end
+
+local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now_ms
+end
+tokens = math.min(capacity, tokens + math.max(0, now_ms - ts) * rate_per_ms)
+
+local granted = math.min(requested, math.floor(tokens), daily_left)
+tokens = tokens - granted
+redis.call('HSET', KEYS[2], 'tokens', tostring(tokens), 'ts', tostring(now_ms))
+redis.call('PEXPIRE', KEYS[2], math.ceil(capacity / rate_per_ms) + 1000)
+if daily_cap > 0 and granted > 0 then
+  daily = redis.call('INCRBY', KEYS[1], granted)
+  redis.call('EXPIRE', KEYS[1], daily_ttl)
+end
+
+local retry_after_ms = 0
+if granted < requested then
+  if daily_cap > 0 and daily >= daily_cap then
+    retry_after_ms = -1
+  else
+    retry_after_ms = math.ceil((1 - (tokens - math.floor(tokens))) / rate_per_ms)
+  end
+end
+return {granted, retry_after_ms, daily}
+"""
+
+# Give back `count` tokens taken by TAKE_TOKENS_LUA (sends that failed): daily counter KEYS[1]
+# (not below 0) and bucket KEYS[2] (capped at capacity). Missing keys are left alone.
+RETURN_TOKENS_LUA = """
+local count = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  local daily = redis.call('DECRBY', KEYS[1], count)
+  if daily < 0 then
+    redis.call('INCRBY', KEYS[1], -daily)
+  end
+end
+local tokens = tonumber(redis.call('HGET', KEYS[2], 'tokens'))
+if tokens ~= nil then
+  redis.call('HSET', KEYS[2], 'tokens', tostring(math.min(capacity, tokens + count)))
+end
+return 1
+"""
+
 
 def _key(gmail_account_id: str) -> str:
     date = datetime.utcnow().strftime("%Y-%m-%d")
@@ -36,3 +106,113 @@ async def incr_gmail_sent_today(redis, gmail_account_id: str) -> int:
 
 def gmail_daily_cap() -> int:
     return get_settings().gmail_daily_cap
+
+
+class TokenGrant:
+    """Result of take_tokens: how many were granted and when to retry for the rest."""
+
+    def __init__(self, granted: int, retry_after_seconds: float | None, daily_exhausted: bool = False) -> None:
+        self.granted = granted
+        self.retry_after_seconds = retry_after_seconds
+        self.daily_exhausted = daily_exhausted
+
+
+_scripts: dict[int, object] = {}
+_return_scripts: dict[int, object] = {}
+
+
+async def take_tokens(
+    redis,
+    bucket_key: str,
+    requested: int,
+    per_second: float,
+    capacity: float,
+    daily_key: str | None = None,
+    daily_cap: int = 0,
+    now_ms: int | None = None,
+) -> TokenGrant:
+    """
+    Atomically take up to `requested` tokens from a bucket (refill `per_second`, burst `capacity`)
+    and, if daily_cap > 0, from the daily counter. Fails open (grants everything) if Redis errors.
+    """
+    if requested <= 0:
+        return TokenGrant(0, None)
+    script = _scripts.get(id(redis))
+    if script is None:
+        script = _scripts[id(redis)] = redis.register_script(TAKE_TOKENS_LUA)
+    try:
+        granted, retry_after_ms, _ = await script(
+            keys=[daily_key or f"{bucket_key}:daily", bucket_key],
+            args=[
+                requested,
+                daily_cap if daily_key else 0,
+                capacity,
+                per_second / 1000,
+                now_ms if now_ms is not None else int(time.time() * 1000),
+                TTL_SECONDS,
+            ],
+        )
+    except Exception as e:
+        log.warning("rate_limit_unavailable", key=bucket_key, error=str(e)[:200])
+        return TokenGrant(requested, None)
+    granted = int(granted)
+    retry_after_ms = int(retry_after_ms)
+    if granted >= requested:
+        return TokenGrant(granted, None)
+    if retry_after_ms < 0:
+        return TokenGrant(granted, None, daily_exhausted=True)
+    return TokenGrant(granted, retry_after_ms / 1000)
+
+
+async def take_send_tokens(redis, gmail_account_id: str, requested: int, daily_limit: int) -> TokenGrant:
+    """Sends: per-account daily quota (min of account limit and gmail_daily_cap) + per-minute bucket."""
+    s = get_settings()
+    per_minute = max(1, s.gmail_sends_per_minute)
+    return await take_tokens(
+        redis,
+        f"{BUCKET_PREFIX}:send:{gmail_account_id}",
+        requested,
+        per_second=per_minute / 60,
+        capacity=per_minute,
+        daily_key=_key(gmail_account_id),
+        daily_cap=min(daily_limit, gmail_daily_cap()),
+    )
+
+
+async def return_send_tokens(redis, gmail_account_id: str, count: int) -> None:
+    """Refund send tokens for emails that were granted quota but failed to send. Best effort."""
+    if count <= 0:
+        return
+    script = _return_scripts.get(id(redis))
+    if script is None:
+        script = _return_scripts[id(redis)] = redis.register_script(RETURN_TOKENS_LUA)
+    try:
+        await script(
+            keys=[_key(gmail_account_id), f"{BUCKET_PREFIX}:send:{gmail_account_id}"],
+            args=[count, max(1, get_settings().gmail_sends_per_minute)],
+        )
+    except Exception as e:
+        log.warning("rate_limit_return_failed", gmail_account_id=gmail_account_id, count=count, error=str(e)[:200])
+
+
+async def wait_for_api_tokens(redis, gmail_account_id: str, requested: int) -> None:
+    """Gmail API calls (e.g. drafts.create): wait until `requested` calls fit the per-account QPS bucket."""
+    qps = get_settings().gmail_api_qps_per_account
+    remaining = requested
+    while remaining > 0:
+        grant = await take_tokens(
+            redis,
+            f"{BUCKET_PREFIX}:api:{gmail_account_id}",
+            remaining,
+            per_second=qps,
+            capacity=max(1.0, qps),
+        )
+        remaining -= grant.granted
+        if remaining > 0:
+            await asyncio.sleep(grant.retry_after_seconds or 1 / qps)
+
+
+def next_utc_day_start(now: datetime | None = None) -> datetime:
+    """When a daily quota (keyed by UTC date) resets."""
+    now = now or datetime.now(timezone.utc)
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
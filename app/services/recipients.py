@@ -1,23 +1,36 @@
 """Recipient lists: upload, parse, and query."""
 
+import asyncio
 import csv
 import io
+import itertools
 import re
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterator
 
 import openpyxl
 from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+from pymongo.errors import BulkWriteError
 
+from app.core.config import get_settings
 from app.core.logging import get_logger
 from app.models.recipient_item import RecipientItem
 from app.models.recipient_list import RecipientList
 from app.models.user import User
-from app.services.suppression import list_suppressed_emails
+from app.services.suppression import are_suppressed
 from app.storage.base import get_storage
 
 log = get_logger(__name__)
 EMAIL_RE = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+DUPLICATE_KEY_ERROR = 11000
+EMAIL_HEADERS = ("email", "Email", "EMAIL", "email_address")
+NAME_HEADERS = ("name", "full name", "contact name")
+COMPANY_HEADERS = ("company", "organization", "org")
+# Rows of the first batch used to infer the column schema of an upload
+SCHEMA_SAMPLE_ROWS = 200
+ARROW_BLOCK_SIZE = 1024 * 1024
 
 
 def normalize_email(s: str) -> str:
@@ -30,53 +43,149 @@ def extract_domain(email: str) -> str:
     return ""
 
 
-async def upload_list(user: User, name: str, file_content: bytes, filename: str) -> RecipientList:
-    """Save file to storage and create RecipientList with status=processing."""
-    log.info("upload_list", user_id=str(user.id), name=name, filename=filename, size=len(file_content))
+async def upload_list(user: User, name: str, file_content: bytes | BinaryIO, filename: str) -> RecipientList:
+    """
+    Save file to storage and create RecipientList with status=processing.
+    file_content may be bytes or a file-like object (e.g. the spooled multipart upload), which is
+    streamed to storage in chunks. Each list gets its own key, so re-uploading a name never
+    overwrites a file that is still being processed.
+    """
+    size = _body_size(file_content)
+    log.info("upload_list", user_id=str(user.id), name=name, filename=filename, size=size)
     storage = get_storage()
-    key = f"lists/{user.id}/{name or filename}"
+    list_id = PydanticObjectId()
+    key = f"lists/{user.id}/{list_id}/{filename or name}"
     await storage.put(key, file_content)
     rlist = RecipientList(
+        id=list_id,
         user=user,
         name=name or filename,
         storage_path=key,
         status="processing",
+        size_bytes=size or 0,
     )
     await rlist.insert()
     log.info("upload_list_ok", user_id=str(user.id), list_id=str(rlist.id))
     return rlist
 
 
+def _body_size(body: bytes | BinaryIO) -> int | None:
+    if isinstance(body, bytes):
+        return len(body)
+    try:
+        start = body.tell()
+        size = body.seek(0, io.SEEK_END)
+        body.seek(start)
+        return size - start
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _stream_position(stream: BinaryIO | None) -> int | None:
+    if stream is None:
+        return None
+    try:
+        return stream.tell()
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[dict[str, Any]]:
+    """Stream CSV rows as dicts; UTF-8 is decoded incrementally from the binary stream."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+    yield from csv.DictReader(text)
+
+
+def iter_csv_rows_arrow(stream: BinaryIO, block_size: int = ARROW_BLOCK_SIZE) -> Iterator[dict[str, Any]]:
+    """
+    Stream CSV rows with pyarrow's (multi-threaded, C++) CSV reader, all columns as strings.
+    Needs a seekable stream (the header is read first to type every column as string) and valid UTF-8.
+    Rows with the wrong number of fields are skipped (the csv module would pad or overflow them).
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    header = stream.readline().decode("utf-8", errors="replace")
+    stream.seek(0)
+    names = next(csv.reader([header]), [])
+    if not names:
+        return
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=lambda _: "skip"),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=False,
+        ),
+    )
+    for batch in reader:
+        yield from batch.to_pylist()
+
+
+def csv_row_reader() -> Callable[[BinaryIO], Iterator[dict[str, Any]]]:
+    """CSV parser for uploads per RECIPIENT_CSV_ENGINE; pyarrow is optional and falls back to the csv module."""
+    if get_settings().recipient_csv_engine == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+            return iter_csv_rows_arrow
+        except ImportError:
+            log.warning("recipient_csv_engine_unavailable", engine="pyarrow")
+    return iter_csv_rows
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[dict[str, Any]]:
+    """Stream rows of the active sheet as dicts keyed by the header row (openpyxl read-only mode)."""
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        if not ws:
+            return
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        headers = [str(h).strip() if h is not None else f"col{i}" for i, h in enumerate(header)]
+        for row in rows:
+            if any(v is not None for v in row):
+                yield dict(zip(headers, row))
+    finally:
+        wb.close()
+
+
 def parse_csv(content: bytes) -> list[dict[str, Any]]:
     log.debug("parse_csv", size=len(content))
-    text = content.decode("utf-8", errors="replace")
-    reader = csv.DictReader(io.StringIO(text))
-    rows = list(reader)
+    rows = list(iter_csv_rows(io.BytesIO(content)))
     log.debug("parse_csv_ok", rows=len(rows))
     return rows
 
 
 def parse_xlsx(content: bytes) -> list[dict[str, Any]]:
     log.debug("parse_xlsx", size=len(content))
-    wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
-    ws = wb.active
-    if not ws:
-        return []
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        return []
-    headers = [str(h).strip() if h is not None else f"col{i}" for i, h in enumerate(rows[0])]
-    out = [dict(zip(headers, row)) for row in rows[1:] if any(v is not None for v in row)]
+    out = list(iter_xlsx_rows(io.BytesIO(content)))
     log.debug("parse_xlsx_ok", rows=len(out))
     return out
 
 
+def is_xlsx_filename(filename: str) -> bool:
+    return filename.lower().endswith((".xlsx", ".xls"))
+
+
+async def iter_row_batches(rows: Iterator[dict[str, Any]], size: int) -> AsyncIterator[list[dict[str, Any]]]:
+    """Pull `size` rows at a time from a blocking row iterator on a worker thread."""
+    while True:
+        batch = await asyncio.to_thread(lambda: list(itertools.islice(rows, size)))
+        if not batch:
+            return
+        yield batch
+
+
 def find_email_column(row: dict) -> str | None:
     log.debug("find_email_column")
     for k, v in row.items():
         if v and isinstance(v, str) and "@" in v and EMAIL_RE.match(v.strip()):
             return v.strip().lower()
-    for k in ("email", "Email", "EMAIL", "email_address"):
+    for k in EMAIL_HEADERS:
         if k in row and row[k]:
             return normalize_email(str(row[k]))
     for k, v in row.items():
@@ -85,9 +194,89 @@ def find_email_column(row: dict) -> str | None:
     return None
 
 
+class RowSchema:
+    """Which columns hold the email, name and company; inferred once per file (infer_schema)."""
+
+    def __init__(self, email_column: str | None, name_columns: list[str], company_columns: list[str]) -> None:
+        self.email_column = email_column
+        self.name_columns = name_columns
+        self.company_columns = company_columns
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "email_column": self.email_column,
+            "name_columns": self.name_columns,
+            "company_columns": self.company_columns,
+        }
+
+
+def infer_schema(sample: list[dict[str, Any]]) -> RowSchema:
+    """
+    Pick the email column as the one whose sample values most often look like an email (ties: a
+    column named like email, then the leftmost), and name/company columns by header, as the
+    per-row scan in find_email_column and the old header loop did.
+    """
+    headers: list[str] = []
+    for row in sample:
+        headers.extend(k for k in row if isinstance(k, str) and k not in headers)
+    scores = {
+        h: sum(1 for row in sample if isinstance(v := row.get(h), str) and "@" in v and EMAIL_RE.match(v.strip()))
+        for h in headers
+    }
+    email_column = max(headers, key=lambda h: (scores[h], h in EMAIL_HEADERS), default=None)
+    if email_column is not None and not scores[email_column]:
+        email_column = next((h for h in headers if h in EMAIL_HEADERS), None)
+    return RowSchema(
+        email_column,
+        [h for h in headers if h.lower() in NAME_HEADERS],
+        [h for h in headers if h.lower() in COMPANY_HEADERS],
+    )
+
+
+def prepare_row_batch(
+    rows: list[dict[str, Any]],
+    schema: RowSchema,
+    first_row_index: int,
+) -> tuple[dict[str, tuple[dict[str, Any], int]], dict[str, int]]:
+    """
+    CPU part of ingestion for one batch, column at a time: normalize and validate the email column,
+    dedupe within the batch. Rows whose email column is empty or invalid fall back to the per-row
+    scan (find_email_column). Returns ({email: (row, row_index)} in row order, counts).
+    """
+    counts = {"valid": 0, "invalid": 0, "duplicate": 0, "suppressed": 0}
+    column = schema.email_column
+    raw = [row.get(column) for row in rows] if column is not None else [None] * len(rows)
+    emails = [v.strip().lower() if isinstance(v, str) else "" for v in raw]
+    valid = [bool(e) and EMAIL_RE.match(e) is not None for e in emails]
+    candidates: dict[str, tuple[dict[str, Any], int]] = {}
+    for i, row in enumerate(rows):
+        email = emails[i]
+        if not valid[i]:
+            email = find_email_column(row)
+            if not email or not EMAIL_RE.match(email):
+                counts["invalid"] += 1
+                continue
+            email = normalize_email(email)
+        if email in candidates:
+            counts["duplicate"] += 1
+            continue
+        candidates[email] = (row, first_row_index + i)
+    return candidates, counts
+
+
+def _last_value(row: dict[str, Any], columns: list[str]) -> str | None:
+    """Last non-empty value among columns (stringified, stripped)."""
+    for column in reversed(columns):
+        v = row.get(column)
+        if v is not None and (v := str(v).strip()):
+            return v
+    return None
+
+
 async def process_recipient_list_upload(list_id: str) -> None:
     """
     ARQ job: load file from storage, parse CSV/XLSX, create RecipientItems, update list status.
+    Re-running it for a list still in "processing" resumes after the last committed batch.
     """
     log.info("process_recipient_list_upload", list_id=list_id)
     from app.db.init import init_db
@@ -99,88 +288,147 @@ async def process_recipient_list_upload(list_id: str) -> None:
         return
     storage = get_storage()
     try:
-        content = await storage.get(rlist.storage_path)
+        stream = await storage.open_read(rlist.storage_path)
     except FileNotFoundError:
         rlist.status = "failed"
         rlist.updated_at = datetime.utcnow()
         await rlist.save()
         return
     filename = rlist.storage_path.split("/")[-1]
-    if filename.lower().endswith(".xlsx") or filename.lower().endswith(".xls"):
-        rows = parse_xlsx(content)
-    else:
-        rows = parse_csv(content)
+    # Rows are parsed lazily, one batch at a time: memory is bounded by the batch, not the file
+    rows = iter_xlsx_rows(stream) if is_xlsx_filename(filename) else csv_row_reader()(stream)
+    try:
+        await ingest_rows(rlist, rows, stream=stream)
+    finally:
+        stream.close()
 
+
+async def ingest_rows(
+    rlist: RecipientList,
+    rows: Iterator[dict[str, Any]],
+    batch_size: int | None = None,
+    stream: BinaryIO | None = None,
+) -> None:
+    """
+    Create RecipientItems from parsed rows in batches (unordered insert_many) and mark the list ready.
+    After each batch, processed_count, the counters and bytes_read (position in `stream`, against
+    size_bytes) are saved on the list (progress for the UI); a re-run skips the first
+    processed_count rows and continues from the saved counters.
+    """
+    batch_size = max(1, batch_size or get_settings().recipient_upload_batch_size)
     user_id = str(rlist.user.ref) if rlist.user else None
-    suppressed = await list_suppressed_emails(user_id)
-
-    valid = 0
-    invalid = 0
-    duplicate = 0
-    suppressed_skip = 0
-    seen_emails: set[str] = set()
-
-    for row in rows:
-        email = find_email_column(row)
-        if not email or not EMAIL_RE.match(email):
-            invalid += 1
-            continue
-        email = normalize_email(email)
-        domain = extract_domain(email)
-        if domain:
-            domain = domain.lower().strip()
+    counts = {
+        "valid": rlist.valid_count,
+        "invalid": rlist.invalid_count,
+        "duplicate": rlist.duplicate_count,
+        "suppressed": rlist.suppressed_count,
+    }
+    processed = rlist.processed_count
+    if processed:
+        log.info("process_recipient_list_upload_resume", list_id=str(rlist.id), offset=processed)
+        await asyncio.to_thread(lambda: next(itertools.islice(rows, processed, processed), None))
 
-        if email in seen_emails:
-            duplicate += 1
-            continue
-        if email in suppressed:
-            suppressed_skip += 1
-            continue
-        seen_emails.add(email)
+    schema: RowSchema | None = None
+    async for row_batch in iter_row_batches(rows, batch_size):
+        if schema is None:
+            schema = infer_schema(row_batch[:SCHEMA_SAMPLE_ROWS])
+            log.info("process_recipient_list_upload_schema", list_id=str(rlist.id), **schema.describe())
+        batch_counts = await _insert_row_batch(rlist, row_batch, user_id, processed, schema)
+        processed += len(row_batch)
+        for k, v in batch_counts.items():
+            counts[k] += v
+        progress = {
+            "processed_count": processed,
+            "valid_count": counts["valid"],
+            "invalid_count": counts["invalid"],
+            "duplicate_count": counts["duplicate"],
+            "suppressed_count": counts["suppressed"],
+            "updated_at": datetime.utcnow(),
+        }
+        position = _stream_position(stream)
+        if position is not None:
+            progress["bytes_read"] = position
+        await RecipientList.find_one(RecipientList.id == rlist.id).update({"$set": progress})
 
-        name = None
-        company = None
-        for k, v in row.items():
-            if v is None:
-                continue
-            v = str(v).strip()
-            if not v:
-                continue
-            k_lower = k.lower()
-            if k_lower in ("name", "full name", "contact name"):
-                name = v
-            elif k_lower in ("company", "organization", "org"):
-                company = v
-        item = RecipientItem(
-            list=rlist,
-            email=email,
-            domain=domain or "",
-            name=name,
-            company=company,
-            raw_row=dict(row),
-        )
-        await item.insert()
-        valid += 1
-
-    rlist.total_count = len(rows)
-    rlist.valid_count = valid
-    rlist.invalid_count = invalid
-    rlist.duplicate_count = duplicate
-    rlist.suppressed_count = suppressed_skip
+    rlist.processed_count = processed
+    rlist.total_count = processed
+    rlist.bytes_read = max(rlist.size_bytes, _stream_position(stream) or 0)
+    rlist.valid_count = counts["valid"]
+    rlist.invalid_count = counts["invalid"]
+    rlist.duplicate_count = counts["duplicate"]
+    rlist.suppressed_count = counts["suppressed"]
     rlist.status = "ready"
     rlist.updated_at = datetime.utcnow()
     await rlist.save()
     log.info(
         "process_recipient_list_upload_ok",
-        list_id=list_id,
-        total=len(rows),
-        valid=valid,
-        invalid=invalid,
-        duplicate=duplicate,
-        suppressed=suppressed_skip,
+        list_id=str(rlist.id),
+        total=processed,
+        valid=counts["valid"],
+        invalid=counts["invalid"],
+        duplicate=counts["duplicate"],
+        suppressed=counts["suppressed"],
     )
 
 
+async def _insert_row_batch(
+    rlist: RecipientList,
+    rows: list[dict[str, Any]],
+    user_id: str | None,
+    first_row_index: int,
+    schema: RowSchema,
+) -> dict[str, int]:
+    """
+    Validate, dedupe and suppress one batch of parsed rows and insert its RecipientItems with one
+    unordered insert_many. Duplicates of earlier batches are found with one $in probe on the
+    (list, email) index, so no set of every email in the file is kept. Items carry their row_index:
+    rows of this batch already inserted by a crashed run are counted, not re-inserted.
+    """
+    candidates, counts = prepare_row_batch(rows, schema, first_row_index)
+    if not candidates:
+        return counts
+
+    existing = await RecipientItem.find(
+        RecipientItem.list.id == rlist.id,
+        In(RecipientItem.email, list(candidates)),
+    ).project(_EmailRowView).to_list()
+    for e in existing:
+        if candidates.pop(e.email, None) is None:
+            continue
+        resumed = e.row_index is not None and first_row_index <= e.row_index < first_row_index + len(rows)
+        counts["valid" if resumed else "duplicate"] += 1
+    # One batched suppression probe per batch of rows
+    suppressed = await are_suppressed(list(candidates), user_id)
+
+    items: list[RecipientItem] = []
+    for email, (row, row_index) in candidates.items():
+        if email in suppressed:
+            counts["suppressed"] += 1
+            continue
+        items.append(
+            RecipientItem(
+                list=rlist,
+                email=email,
+                domain=extract_domain(email),
+                name=_last_value(row, schema.name_columns),
+                company=_last_value(row, schema.company_columns),
+                raw_row=dict(row),
+                row_index=row_index,
+            )
+        )
+    if items:
+        try:
+            await RecipientItem.insert_many(items, ordered=False)
+        except BulkWriteError as e:
+            # Another run of the job already inserted some of these rows (unique list + row_index)
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+                raise
+            log.info("process_recipient_list_upload_rows_exist", list_id=str(rlist.id), count=len(errors))
+        counts["valid"] += len(items)
+    return counts
+
+
 async def get_list(user_id: PydanticObjectId, list_id: PydanticObjectId) -> RecipientList | None:
     log.debug("get_list", user_id=str(user_id), list_id=str(list_id))
     rlist = await RecipientList.find_one(
@@ -200,3 +448,68 @@ async def get_list_items(
     items = await RecipientItem.find(RecipientItem.list.id == list_id).skip(offset).limit(limit).to_list()
     log.debug("get_list_items_ok", list_id=str(list_id), count=len(items))
     return items
+
+
+class _EmailRowView(BaseModel):
+    email: str
+    row_index: int | None = None
+
+
+class RecipientEmailView(BaseModel):
+    """Projection for counting / planning without loading raw_row."""
+
+    id: PydanticObjectId = Field(alias="_id")
+    email: str
+    chosen_email: str | None = None
+
+
+async def iter_list_item_pages(
+    list_id: PydanticObjectId,
+    page_size: int | None = None,
+    projection: type[BaseModel] | None = None,
+    after_id: PydanticObjectId | None = None,
+) -> AsyncIterator[list[Any]]:
+    """
+    Yield a list's items in pages of `page_size`, keyset-paginated on _id (index list.$id + _id),
+    so memory stays constant and late pages cost the same as early ones (no skip).
+    `after_id` resumes after a previously processed item.
+    """
+    page_size = max(1, page_size or get_settings().recipient_page_size)
+    last_id = after_id
+    while True:
+        filters = [RecipientItem.list.id == list_id]
+        if last_id is not None:
+            filters.append(RecipientItem.id > last_id)
+        query = RecipientItem.find(*filters).sort(+RecipientItem.id).limit(page_size)
+        page = await (query.project(projection) if projection else query).to_list()
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1].id
+
+
+async def iter_sendable_pages(
+    list_id: PydanticObjectId,
+    user_id: str,
+    page_size: int | None = None,
+    projection: type[BaseModel] | None = None,
+) -> AsyncIterator[list[Any]]:
+    """Pages of a list's items with suppressed addresses (email or chosen_email) removed; empty pages skipped."""
+    async for page in iter_list_item_pages(list_id, page_size, projection):
+        suppressed = await are_suppressed([i.email for i in page] + [i.chosen_email for i in page if i.chosen_email], user_id)
+        kept = [
+            i for i in page
+            if normalize_email(i.email) not in suppressed and normalize_email(i.chosen_email or i.email) not in suppressed
+        ]
+        if kept:
+            yield kept
+
+
+async def count_sendable_items(list_id: PydanticObjectId, user_id: str) -> int:
+    """Number of items that would be scheduled (same filter as iter_sendable_pages)."""
+    count = 0
+    async for page in iter_sendable_pages(list_id, user_id, projection=RecipientEmailView):
+        count += len(page)
+    return count
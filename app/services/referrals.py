@@ -65,7 +65,7 @@ async def grant_referral_reward_if_eligible(referee_id: PydanticObjectId) -> Non
     from app.models.credit_ledger import CreditLedgerEntry
     idempotency_key = f"referral_reward_{referee_id}"
     existing = await CreditLedgerEntry.find_one(
-        CreditLedgerEntry.user.ref == referrer.id,
+        CreditLedgerEntry.user.id == referrer.id,
         CreditLedgerEntry.idempotency_key == idempotency_key,
     )
     if existing:
@@ -85,11 +85,7 @@ async def referral_stats(user_id: PydanticObjectId) -> dict:
     user = await User.get(user_id)
     if not user:
         raise NotFoundError("User not found")
-    referred_count = await User.find(User.referred_by.ref == user.id).count()
-    from app.models.credit_ledger import CreditLedgerEntry
-    reward_entries = await CreditLedgerEntry.find(
-        CreditLedgerEntry.user.ref == user.id,
-        CreditLedgerEntry.reason == "referral",
-    ).to_list()
-    total_reward = sum(e.amount for e in reward_entries)
+    referred_count = await User.find(User.referred_by.id == user.id).count()
+    from app.services.credit_rollups import get_total
+    total_reward = await get_total(user.id, "referral")
     return {"referred_count": referred_count, "total_referral_credits": total_reward}
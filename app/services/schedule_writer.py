@@ -0,0 +1,125 @@
+"""Buffered ScheduledEmail writer: batched insert_many and throttled campaign progress updates."""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.campaign import Campaign
+from app.models.scheduled_email import ScheduledEmail
+
+log = get_logger(__name__)
+DUPLICATE_KEY_ERROR = 11000
+# Send loop (app/worker/cron.py) subscribes to this to wake up early when rows are scheduled
+SEND_WAKEUP_CHANNEL = "scheduled_emails:wakeup"
+
+
+async def notify_send_loop(earliest_send_at: datetime) -> None:
+    """Best-effort wake-up of send loops; they re-peek the next send_at, so a lost message only delays."""
+    from app.core.redis import get_redis
+    try:
+        await get_redis().publish(SEND_WAKEUP_CHANNEL, earliest_send_at.isoformat())
+    except Exception as e:
+        log.debug("notify_send_loop_failed", error=str(e)[:200])
+
+
+class ScheduledEmailWriter:
+    """
+    Collects ScheduledEmail rows and writes them with unordered insert_many.
+    Campaign.scheduled_count is bumped with $inc at most every `progress_every` rows or
+    `flush_interval_ms`, so the polling UI sees monotonic progress without a write per row.
+    Rows that already exist (unique campaign + recipient_item_id) are skipped, so a re-run
+    after a crash mid-batch does not create duplicates.
+    """
+
+    def __init__(
+        self,
+        campaign_id: PydanticObjectId,
+        batch_size: int | None = None,
+        progress_every: int | None = None,
+        flush_interval_ms: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.campaign_id = campaign_id
+        self.batch_size = max(1, batch_size or settings.schedule_insert_batch_size)
+        self.progress_every = max(1, progress_every or settings.schedule_progress_every)
+        self.flush_interval = (flush_interval_ms or settings.schedule_progress_interval_ms) / 1000
+        self.inserted = 0
+        self.duplicates = 0
+        self.insert_calls = 0
+        self.progress_calls = 0
+        self._buffer: list[ScheduledEmail] = []
+        self._unpublished = 0
+        self._last_flush = time.monotonic()
+        self._last_publish = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.earliest_send_at: datetime | None = None
+
+    async def reset_progress(self, scheduled_count: int) -> None:
+        """Re-sync scheduled_count to rows already in the DB (start of a run or resume)."""
+        await Campaign.find_one(Campaign.id == self.campaign_id).update(
+            {"$set": {"scheduled_count": scheduled_count, "updated_at": datetime.now(timezone.utc)}}
+        )
+        self.progress_calls += 1
+
+    async def add(self, scheduled: ScheduledEmail) -> None:
+        self._buffer.append(scheduled)
+        if self.earliest_send_at is None or scheduled.send_at < self.earliest_send_at:
+            self.earliest_send_at = scheduled.send_at
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+
+    async def flush(self, force_progress: bool = False) -> None:
+        async with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if batch:
+                n = await self._insert(batch)
+                self.inserted += n
+                self._unpublished += n
+            due = (
+                self._unpublished >= self.progress_every
+                or time.monotonic() - self._last_publish >= self.flush_interval
+            )
+            if self._unpublished and (due or force_progress):
+                await self._publish()
+
+    async def close(self) -> None:
+        """Flush remaining rows, publish final progress and wake send loops."""
+        await self.flush(force_progress=True)
+        if self.inserted and self.earliest_send_at:
+            await notify_send_loop(self.earliest_send_at)
+        log.debug(
+            "scheduled_email_writer_closed",
+            campaign_id=str(self.campaign_id),
+            inserted=self.inserted,
+            duplicates=self.duplicates,
+            insert_calls=self.insert_calls,
+            progress_calls=self.progress_calls,
+        )
+
+    async def _insert(self, batch: list[ScheduledEmail]) -> int:
+        self.insert_calls += 1
+        try:
+            result = await ScheduledEmail.insert_many(batch, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            dupes = [err for err in errors if err.get("code") == DUPLICATE_KEY_ERROR]
+            if len(dupes) != len(errors):
+                raise
+            self.duplicates += len(dupes)
+            log.info("scheduled_email_writer_duplicates_skipped", campaign_id=str(self.campaign_id), count=len(dupes))
+            return int(e.details.get("nInserted", 0))
+
+    async def _publish(self) -> None:
+        await Campaign.find_one(Campaign.id == self.campaign_id).update(
+            {"$inc": {"scheduled_count": self._unpublished}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+        )
+        self.progress_calls += 1
+        self._unpublished = 0
+        self._last_publish = time.monotonic()
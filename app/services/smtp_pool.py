@@ -0,0 +1,151 @@
+"""SMTP session pool for app-password accounts: authenticated connections reused across messages."""
+
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+# 421 service closing channel, 451 local error: drop the connection and retry once on a fresh one
+RECONNECT_CODES = frozenset({421, 451})
+
+
+class _Session:
+    def __init__(self, smtp: smtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SmtpSessionPool:
+    """
+    One authenticated SMTP connection per sender, reused across messages.
+    A connection is replaced after `max_messages_per_connection` messages or `idle_timeout` seconds idle,
+    and on 421/451 or a dropped connection. Sends for the same sender are serialized (smtplib is not
+    thread-safe); different senders send in parallel. Blocking: call from an executor thread.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        starttls: bool = True,
+        idle_timeout: float = 60.0,
+        max_messages_per_connection: int = 90,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max(1, max_messages_per_connection)
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._sessions: dict[str, _Session] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, sender: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(sender, threading.Lock())
+
+    def _connect(self, sender: str, password: str) -> _Session:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            smtp.login(sender, password)
+        except Exception:
+            _quit(smtp)
+            raise
+        self.connections_opened += 1
+        log.debug("smtp_pool_connect", sender=sender[:50], host=self.host)
+        return _Session(smtp)
+
+    def _session(self, sender: str, password: str) -> _Session:
+        session = self._sessions.get(sender)
+        if session and (
+            session.sent >= self.max_messages_per_connection
+            or time.monotonic() - session.last_used > self.idle_timeout
+        ):
+            self._drop(sender)
+            session = None
+        if session is None:
+            session = self._connect(sender, password)
+            self._sessions[sender] = session
+        return session
+
+    def _drop(self, sender: str) -> None:
+        session = self._sessions.pop(sender, None)
+        if session:
+            _quit(session.smtp)
+
+    def send(self, sender: str, password: str, to: str, message: str) -> None:
+        """Send one RFC 2822 message; reconnects once on 421/451 or a dropped connection."""
+        with self._lock_for(sender):
+            for attempt in (1, 2):
+                session = self._session(sender, password)
+                try:
+                    session.smtp.sendmail(sender, [to], message)
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException) as e:
+                    self._drop(sender)
+                    code = getattr(e, "smtp_code", None)
+                    if attempt == 2 or not (isinstance(e, smtplib.SMTPServerDisconnected) or code in RECONNECT_CODES):
+                        raise
+                    log.info("smtp_pool_reconnect", sender=sender[:50], code=code)
+                    continue
+                session.sent += 1
+                session.last_used = time.monotonic()
+                return
+
+    def close_idle(self) -> None:
+        """Close connections idle longer than idle_timeout (call at the end of a send cycle)."""
+        now = time.monotonic()
+        for sender, session in list(self._sessions.items()):
+            lock = self._lock_for(sender)
+            if now - session.last_used > self.idle_timeout and lock.acquire(blocking=False):
+                try:
+                    self._drop(sender)
+                finally:
+                    lock.release()
+
+    def close_all(self) -> None:
+        for sender in list(self._sessions):
+            with self._lock_for(sender):
+                self._drop(sender)
+
+
+def _quit(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+def build_message(sender_email: str, to: str, subject: str, body_html: str) -> str:
+    msg = MIMEText(body_html, "html")
+    msg["Subject"] = subject
+    msg["From"] = sender_email
+    msg["To"] = to
+    return msg.as_string()
+
+
+_pool: SmtpSessionPool | None = None
+
+
+def get_smtp_pool() -> SmtpSessionPool:
+    """Process-wide pool for Gmail SMTP (smtp.gmail.com:587, STARTTLS)."""
+    global _pool
+    if _pool is None:
+        from app.services.gmail import GMAIL_SMTP_HOST, GMAIL_SMTP_PORT
+        s = get_settings()
+        _pool = SmtpSessionPool(
+            GMAIL_SMTP_HOST,
+            GMAIL_SMTP_PORT,
+            idle_timeout=s.smtp_idle_timeout_seconds,
+            max_messages_per_connection=s.smtp_max_messages_per_connection,
+        )
+    return _pool
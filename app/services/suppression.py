@@ -1,9 +1,22 @@
 """Suppression list: add, check, list (global + per-user)."""
 
+from datetime import datetime
+from typing import Iterable
+
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
 from app.core.logging import get_logger
 from app.models.suppression_entry import SuppressionEntry
+from app.services.suppression_cache import get_global_suppression_cache, next_global_version
 
 log = get_logger(__name__)
+# Emails per $in probe (served by the (email, user_id) index)
+PROBE_BATCH_SIZE = 1000
+
+
+class _EmailView(BaseModel):
+    email: str
 
 
 async def add_suppression(email: str, user_id: str | None = None, source: str = "verification") -> None:
@@ -19,38 +32,83 @@ async def add_suppression(email: str, user_id: str | None = None, source: str =
     if existing:
         log.debug("add_suppression_exists")
         return
-    await SuppressionEntry(email=email, user_id=user_id, source=source).insert()
+    # Global entries carry the new version so every process's cache picks them up incrementally
+    seq = await next_global_version() if user_id is None else None
+    await SuppressionEntry(email=email, user_id=user_id, source=source, seq=seq).insert()
+    cache = get_global_suppression_cache()
+    if cache and user_id is None:
+        cache.add_local(email)
     log.debug("add_suppression_ok", email=email[:50])
 
 
+async def add_suppressions(emails: Iterable[str], user_id: str | None = None, source: str = "verification") -> int:
+    """
+    Bulk add_suppression: one unordered bulk_write of upserts per PROBE_BATCH_SIZE emails ($setOnInsert,
+    so existing entries are left as they are). Returns how many entries were created.
+    """
+    wanted = list(dict.fromkeys(e.strip().lower() for e in emails if e and "@" in e))
+    cache = get_global_suppression_cache() if user_id is None else None
+    created = 0
+    for i in range(0, len(wanted), PROBE_BATCH_SIZE):
+        batch = wanted[i:i + PROBE_BATCH_SIZE]
+        # One version per batch is enough: caches reload every entry with seq > their loaded version
+        seq = await next_global_version() if user_id is None else None
+        now = datetime.utcnow()
+        result = await SuppressionEntry.get_motor_collection().bulk_write(
+            [
+                UpdateOne(
+                    {"email": email, "user_id": user_id},
+                    {"$setOnInsert": {"source": source, "seq": seq, "created_at": now}},
+                    upsert=True,
+                )
+                for email in batch
+            ],
+            ordered=False,
+        )
+        created += result.upserted_count
+        if cache:
+            for email in batch:
+                cache.add_local(email)
+    log.debug("add_suppressions_ok", user_id=user_id, requested=len(wanted), created=created)
+    return created
+
+
 async def is_suppressed(email: str, user_id: str | None = None) -> bool:
     """True if email is in global list or in user's list."""
     log.debug("is_suppressed", email=email[:50] if email else "", user_id=user_id)
-    email = email.strip().lower()
-    if not email:
-        return False
-    # Global
-    if await SuppressionEntry.find_one(SuppressionEntry.email == email, SuppressionEntry.user_id == None):  # noqa: E711
-        log.debug("is_suppressed_ok", result=True, scope="global")
-        return True
-    # Per-user
-    if user_id and await SuppressionEntry.find_one(SuppressionEntry.email == email, SuppressionEntry.user_id == user_id):
-        log.debug("is_suppressed_ok", result=True, scope="user")
-        return True
-    log.debug("is_suppressed_ok", result=False)
-    return False
-
-
-async def list_suppressed_emails(user_id: str | None = None) -> set[str]:
-    """Return set of suppressed emails (global + user's if user_id given). For filtering in memory."""
-    log.debug("list_suppressed_emails", user_id=user_id)
+    result = bool(await are_suppressed([email], user_id))
+    log.debug("is_suppressed_ok", result=result)
+    return result
+
+
+async def are_suppressed(emails: Iterable[str], user_id: str | None = None) -> set[str]:
+    """
+    Which of `emails` (normalized: stripped, lowercased) are in the global list or the user's list.
+    Batched $in probes on the (email, user_id) index; cost scales with len(emails), not the list size.
+    Once the global cache is built, only its Bloom filter hits are probed against the global list.
+    """
+    wanted = list({e.strip().lower() for e in emails if e and e.strip()})
+    cache = get_global_suppression_cache()
+    if cache:
+        await cache.ensure_fresh()
     out: set[str] = set()
-    global_entries = await SuppressionEntry.find(SuppressionEntry.user_id == None).to_list()  # noqa: E711
-    out |= {e.email for e in global_entries}
-    if user_id:
-        user_entries = await SuppressionEntry.find(SuppressionEntry.user_id == user_id).to_list()
-        out |= {e.email for e in user_entries}
-    log.debug("list_suppressed_emails_ok", count=len(out))
+    global_probed = 0
+    for i in range(0, len(wanted), PROBE_BATCH_SIZE):
+        batch = wanted[i:i + PROBE_BATCH_SIZE]
+        global_candidates = [e for e in batch if cache.might_contain(e)] if cache else batch
+        global_probed += len(global_candidates)
+        clauses: list[dict] = []
+        if global_candidates:
+            clauses.append({"email": {"$in": global_candidates}, "user_id": None})
+        if user_id:
+            clauses.append({"email": {"$in": batch}, "user_id": user_id})
+        if not clauses:
+            continue
+        rows = await SuppressionEntry.find(
+            clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        ).project(_EmailView).to_list()
+        out |= {r.email for r in rows}
+    log.debug("are_suppressed_ok", checked=len(wanted), global_probed=global_probed, suppressed=len(out))
     return out
 
 
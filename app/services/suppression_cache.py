@@ -0,0 +1,185 @@
+"""In-process cache of the global suppression list: a Bloom filter refreshed from a version counter.
+
+Global suppressions (user_id=None) change rarely but are checked on every hot path. Each process keeps
+a Bloom filter of the global emails; are_suppressed only sends filter hits to MongoDB for an exact
+check. add_suppression bumps the "suppression_global" counter and stamps the entry with it, so every
+process picks up new entries incrementally (seq > loaded version) within refresh_seconds.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.counter import Counter
+from app.models.suppression_entry import SuppressionEntry
+
+log = get_logger(__name__)
+GLOBAL_SUPPRESSION_COUNTER = "suppression_global"
+# Incremental reloads re-read this many seqs below the loaded version: a writer may take a counter
+# value and insert its entry after a reader has already seen a higher seq
+SEQ_OVERLAP = 100
+MIN_CAPACITY = 1024
+
+
+class _EmailSeqView(BaseModel):
+    email: str
+    seq: int | None = None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (blake2b double hashing). No false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = max(1, capacity)
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str) -> None:
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class GlobalSuppressionCache:
+    """
+    Versioned Bloom filter of global suppressed emails. Not ready until the first full build,
+    which runs in the background; callers fall back to plain DB probes meanwhile.
+    """
+
+    def __init__(self, refresh_seconds: float, full_rebuild_seconds: float, error_rate: float = 0.01) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.full_rebuild_seconds = full_rebuild_seconds
+        self.error_rate = error_rate
+        self.version = 0
+        self._bloom: BloomFilter | None = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._recheck = False
+        self._lock = asyncio.Lock()
+        self._build_task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def might_contain(self, email: str) -> bool:
+        """False means definitely not globally suppressed (as of self.version)."""
+        return self._bloom is None or email in self._bloom
+
+    def add_local(self, email: str) -> None:
+        """Entry added by this process: visible here immediately, other processes catch up via the counter."""
+        if self._bloom is not None:
+            self._bloom.add(email)
+
+    def start_warmup(self) -> None:
+        """Build the filter in the background (startup, or first use in a process)."""
+        if self._build_task is None or self._build_task.done():
+            self._build_task = asyncio.create_task(self._safe_refresh(full=True))
+
+    async def ensure_fresh(self) -> None:
+        """
+        Cheap on the hot path: at most one counter read per refresh_seconds. Loads new entries when the
+        counter moved, re-checks once more after a change (late inserts), and rebuilds fully when the
+        filter is over capacity or older than full_rebuild_seconds (covers deletions).
+        """
+        if not self.ready:
+            self.start_warmup()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+        if now - self._built_at > self.full_rebuild_seconds:
+            self.start_warmup()
+            return
+        try:
+            current = await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER)
+        except Exception as e:
+            log.warning("suppression_cache_version_check_failed", error=str(e)[:200])
+            return
+        if current != self.version or self._recheck:
+            self._recheck = current != self.version
+            await self._safe_refresh(full=False)
+
+    async def _safe_refresh(self, full: bool) -> None:
+        try:
+            await self.refresh(full=full)
+        except Exception as e:
+            log.warning("suppression_cache_refresh_failed", full=full, error=str(e)[:200])
+
+    async def refresh(self, full: bool = False) -> None:
+        async with self._lock:
+            if full or self._bloom is None or self._bloom.count > self._bloom.capacity:
+                await self._rebuild()
+            else:
+                await self._catch_up(self._bloom)
+
+    async def _rebuild(self) -> None:
+        started = time.perf_counter()
+        # Read the version first: entries added during the scan are either seen or picked up by the next catch-up
+        version = await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER)
+        total = await SuppressionEntry.find(SuppressionEntry.user_id == None).count()  # noqa: E711
+        bloom = BloomFilter(max(MIN_CAPACITY, total * 2), self.error_rate)
+        async for entry in SuppressionEntry.find(SuppressionEntry.user_id == None).project(_EmailSeqView):  # noqa: E711
+            bloom.add(entry.email)
+        self._bloom = bloom
+        self.version = version
+        self._built_at = time.monotonic()
+        self._checked_at = self._built_at
+        log.info(
+            "suppression_cache_rebuilt",
+            entries=bloom.count,
+            version=version,
+            size_kb=len(bloom.bits) // 1024,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+
+    async def _catch_up(self, bloom: BloomFilter) -> None:
+        version = await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER)
+        added = 0
+        async for entry in SuppressionEntry.find(
+            SuppressionEntry.user_id == None,  # noqa: E711
+            SuppressionEntry.seq > self.version - SEQ_OVERLAP,
+        ).project(_EmailSeqView):
+            bloom.add(entry.email)
+            added += 1
+        log.debug("suppression_cache_caught_up", from_version=self.version, to_version=version, added=added)
+        self.version = version
+
+
+_cache: GlobalSuppressionCache | None = None
+
+
+def get_global_suppression_cache() -> GlobalSuppressionCache | None:
+    """Process-wide cache, or None when SUPPRESSION_CACHE_ENABLED is off."""
+    global _cache
+    settings = get_settings()
+    if not settings.suppression_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = GlobalSuppressionCache(
+            settings.suppression_cache_refresh_seconds,
+            settings.suppression_cache_full_rebuild_seconds,
+        )
+    return _cache
+
+
+async def next_global_version() -> int:
+    """Bump the global suppression version (called when a global entry is added)."""
+    return await Counter.next_value(GLOBAL_SUPPRESSION_COUNTER)
@@ -88,7 +88,9 @@ async def delete_user_and_all_data(user_id) -> None:
     from app.models.campaign import Campaign
     from app.models.credit_balance import CreditBalance
     from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.credit_rollup import CreditRollup
     from app.models.email_verification_result import EmailVerificationResult
+    from app.models.enrichment_job import EnrichmentJob
     from app.models.enrichment_result import EnrichmentResult
     from app.models.gmail_account import GmailAccount
     from app.models.payment_order import PaymentOrder
@@ -98,6 +100,7 @@ async def delete_user_and_all_data(user_id) -> None:
     from app.models.scheduled_email import ScheduledEmail
     from app.models.suppression_entry import SuppressionEntry
     from app.models.template import Template
+    from app.models.verification_job import VerificationJob
 
     uid = PydanticObjectId(user_id) if not isinstance(user_id, PydanticObjectId) else user_id
     user = await User.get(uid)
@@ -132,13 +135,18 @@ async def delete_user_and_all_data(user_id) -> None:
     # 7. Resume documents
     await ResumeDocument.find(ResumeDocument.user.id == uid).delete()
 
-    # 8. Credit ledger & balance
-    await CreditLedgerEntry.find(CreditLedgerEntry.user.ref == uid).delete()
-    await CreditBalance.find(CreditBalance.user.ref == uid).delete()
+    # 8. Credit ledger, balance & rollups
+    await CreditLedgerEntry.find(CreditLedgerEntry.user.id == uid).delete()
+    await CreditBalance.find(CreditBalance.user.id == uid).delete()
+    await CreditRollup.find(CreditRollup.user_id == uid).delete()
+    from app.services import balance_cache
+    await balance_cache.invalidate(uid)
 
-    # 9. Email verification results, enrichment results
+    # 9. Email verification and enrichment results and jobs
     await EmailVerificationResult.find(EmailVerificationResult.user.id == uid).delete()
     await EnrichmentResult.find(EnrichmentResult.user.id == uid).delete()
+    await EnrichmentJob.find(EnrichmentJob.user.id == uid).delete()
+    await VerificationJob.find(VerificationJob.user.id == uid).delete()
 
     # 10. Suppression entries (user-scoped)
     await SuppressionEntry.find(SuppressionEntry.user_id == str(uid)).delete()
@@ -1,53 +1,93 @@
-"""Email verification: syntax, MX, disposable list."""
+"""Email verification: syntax, MX (cached, async), disposable list (app/data/disposable_domains.txt)."""
 
 import re
+import time
+from datetime import datetime
 from typing import Literal
 
-import dns.resolver
 from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import UpdateMany
+from pymongo.errors import DuplicateKeyError
 
 from app.core.config import get_settings
 from app.core.exceptions import BadRequestError
+from app.core.logging import get_logger
 from app.models.email_verification_result import EmailVerificationResult
 from app.models.recipient_item import RecipientItem
 from app.models.user import User
+from app.models.verification_job import VerificationJob
 from app.services import credits as credits_service
+from app.services.domain_info import is_disposable_domain
+from app.services.mx_cache import get_mx_cache
 
-EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+log = get_logger(__name__)
+VerificationStatus = Literal["valid", "invalid", "unknown", "disposable"]
+RESULT_INSERT_BATCH_SIZE = 1000
 
-# Minimal disposable domain list (extend in prod)
-DISPOSABLE_DOMAINS = frozenset({
-    "tempmail.com", "throwaway.email", "guerrillamail.com", "10minutemail.com",
-    "mailinator.com", "temp-mail.org", "fakeinbox.com", "trashmail.com",
-})
+EMAIL_RE = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 
 
 def check_syntax(email: str) -> bool:
     return bool(email and EMAIL_RE.match(email.strip()))
 
 
-def check_mx(domain: str) -> bool:
-    try:
-        dns.resolver.resolve(domain, "MX")
-        return True
-    except Exception:
-        return False
+async def check_mx(domain: str) -> bool:
+    return await get_mx_cache().has_mx(domain)
 
 
 def is_disposable(domain: str) -> bool:
-    return domain.lower() in DISPOSABLE_DOMAINS
+    return is_disposable_domain(domain)
+
+
+class VerificationOutcome:
+    """Result of checking one address (no DB); see verify_emails."""
+
+    __slots__ = ("email", "result", "syntax_valid", "mx_valid")
+
+    def __init__(self, email: str, result: VerificationStatus, syntax_valid: bool, mx_valid: bool) -> None:
+        self.email = email
+        self.result = result
+        self.syntax_valid = syntax_valid
+        self.mx_valid = mx_valid
+
 
+def _domain(email: str) -> str:
+    return email.split("@", 1)[1] if "@" in email else ""
 
-def verify_single(email: str) -> Literal["valid", "invalid", "unknown", "disposable"]:
-    email = email.strip().lower()
+
+def classify(email: str, mx_valid: bool) -> VerificationStatus:
     if not check_syntax(email):
         return "invalid"
-    domain = email.split("@", 1)[1]
-    if is_disposable(domain):
+    if is_disposable(_domain(email)):
         return "disposable"
-    if not check_mx(domain):
-        return "unknown"
-    return "valid"
+    return "valid" if mx_valid else "unknown"
+
+
+async def verify_emails(emails: list[str]) -> list[VerificationOutcome]:
+    """
+    Verify many addresses: each unique domain of a syntactically valid address is resolved once
+    (concurrently, through the MX cache), then every address is classified from those answers.
+    Addresses that fail the syntax check are not looked up (mx_valid=False).
+    """
+    normalized = [e.strip().lower() for e in emails]
+    domains = {_domain(e) for e in normalized if check_syntax(e)}
+    mx = await get_mx_cache().resolve_many(domains)
+    outcomes = []
+    for email in normalized:
+        syntax_valid = check_syntax(email)
+        mx_valid = mx.get(_domain(email), False) if syntax_valid else False
+        outcomes.append(VerificationOutcome(email, classify(email, mx_valid), syntax_valid, mx_valid))
+    return outcomes
+
+
+def item_status(result: VerificationStatus) -> Literal["valid", "invalid"]:
+    """RecipientItem.verification_status for a verification result."""
+    return "valid" if result == "valid" else "invalid"
+
+
+async def verify_single(email: str) -> VerificationStatus:
+    return (await verify_emails([email]))[0].result
 
 
 async def verify_email_for_user(
@@ -59,7 +99,8 @@ async def verify_email_for_user(
     balance = await credits_service.get_balance(user_id)
     if balance < get_settings().credits_per_verify:
         raise BadRequestError("Insufficient credits for verification")
-    result_status = verify_single(email)
+    outcome = (await verify_emails([email]))[0]
+    result_status = outcome.result
     await credits_service.apply_ledger_entry(
         user_id,
         -get_settings().credits_per_verify,
@@ -74,12 +115,12 @@ async def verify_email_for_user(
         recipient_item=item,
         email=email,
         result=result_status,
-        mx_valid=check_mx(email.split("@", 1)[1] if "@" in email else ""),
-        syntax_valid=check_syntax(email),
+        mx_valid=outcome.mx_valid,
+        syntax_valid=outcome.syntax_valid,
     )
     await evr.insert()
     if item:
-        item.verification_status = "valid" if result_status == "valid" else "invalid"
+        item.verification_status = item_status(result_status)
         await item.save()
     if result_status in ("invalid", "disposable"):
         from app.services.suppression import add_suppression
@@ -106,22 +147,264 @@ async def verify_bulk(
         reference_id=idempotency_key or "",
         idempotency_key=idempotency_key,
     )
-    results = []
-    for email in emails:
-        status = verify_single(email)
-        domain = email.split("@", 1)[1] if "@" in email else ""
-        email_lower = email.strip().lower()
-        evr = EmailVerificationResult(
+    started = time.perf_counter()
+    mx_cache = get_mx_cache()
+    lookups_before = mx_cache.lookups
+    outcomes = await verify_emails(emails)
+    metadata = {"idempotency_key": idempotency_key} if idempotency_key else {}
+    results = [
+        EmailVerificationResult(
             user=user,
-            email=email_lower,
-            result=status,
-            mx_valid=check_mx(domain),
-            syntax_valid=check_syntax(email),
-            metadata={"idempotency_key": idempotency_key} if idempotency_key else {},
+            email=o.email,
+            result=o.result,
+            mx_valid=o.mx_valid,
+            syntax_valid=o.syntax_valid,
+            metadata=dict(metadata),
         )
-        await evr.insert()
-        results.append(evr)
-        if status in ("invalid", "disposable"):
-            from app.services.suppression import add_suppression
-            await add_suppression(email_lower, user_id=str(user_id), source="verification")
+        for o in outcomes
+    ]
+    for start in range(0, len(results), RESULT_INSERT_BATCH_SIZE):
+        await EmailVerificationResult.insert_many(results[start : start + RESULT_INSERT_BATCH_SIZE])
+    suppress = list(dict.fromkeys(o.email for o in outcomes if o.result in ("invalid", "disposable")))
+    if suppress:
+        from app.services.suppression import add_suppressions
+        await add_suppressions(suppress, user_id=str(user_id), source="verification")
+    log.info(
+        "verify_bulk_done",
+        user_id=str(user_id),
+        emails=len(emails),
+        dns_lookups=mx_cache.lookups - lookups_before,
+        suppressed=len(suppress),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
     return results
+
+
+class _ItemEmailView(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    email: str
+
+
+async def start_bulk_verification(
+    user_id: PydanticObjectId,
+    emails: list[str],
+    list_id: PydanticObjectId | None = None,
+    idempotency_key: str | None = None,
+) -> VerificationJob:
+    """
+    Create a VerificationJob for `emails` (or every item of the user's list `list_id`) and hand it to
+    the worker; credits are charged by the job (upfront, idempotent). A repeated idempotency_key
+    returns the existing job. With RUN_VERIFICATION_IN_PROCESS the job runs before returning.
+    """
+    if idempotency_key:
+        existing = await VerificationJob.find_one(
+            VerificationJob.user.id == user_id,
+            VerificationJob.idempotency_key == idempotency_key,
+        )
+        if existing:
+            return existing
+    if list_id is not None:
+        from app.services.recipients import get_list
+        if not await get_list(user_id, list_id):
+            raise BadRequestError("List not found")
+        total = await RecipientItem.find(RecipientItem.list.id == list_id).count()
+        emails = []
+    else:
+        emails = [e for e in emails if e and e.strip()]
+        total = len(emails)
+    if not total:
+        raise BadRequestError("No emails to verify")
+    settings = get_settings()
+    if await credits_service.get_balance(user_id) < total * settings.credits_per_verify:
+        raise BadRequestError("Insufficient credits for bulk verification")
+    user = await User.get(user_id)
+    job = VerificationJob(
+        user=user,
+        emails=emails,
+        list_id=list_id,
+        total=total,
+        chunk_size=max(1, settings.verify_job_chunk_size),
+        idempotency_key=idempotency_key,
+    )
+    try:
+        await job.insert()
+    except DuplicateKeyError:
+        # Concurrent request with the same idempotency key won the insert
+        existing = await VerificationJob.find_one(
+            VerificationJob.user.id == user_id,
+            VerificationJob.idempotency_key == idempotency_key,
+        )
+        if existing:
+            return existing
+        raise
+    log.info("verify_job_created", job_id=str(job.id), user_id=str(user_id), total=total, list_id=str(list_id) if list_id else None)
+    if settings.run_verification_in_process:
+        await run_verification_job(str(job.id))
+        return await VerificationJob.get(job.id) or job
+    from app.worker.tasks import enqueue_verify_bulk  # avoid circular import at module load
+    try:
+        await enqueue_verify_bulk(str(job.id))
+    except Exception as e:
+        log.warning("verify_job_enqueue_failed", job_id=str(job.id), error=str(e)[:200])
+        await _finish_job(job.id, "failed", "Could not queue verification")
+        raise BadRequestError(
+            "Could not queue verification. Is Redis running and REDIS_URL set? Start the Worker (ARQ) to process jobs."
+        ) from e
+    return job
+
+
+async def get_verification_job(user_id: PydanticObjectId, job_id: PydanticObjectId) -> VerificationJob | None:
+    return await VerificationJob.find_one(VerificationJob.id == job_id, VerificationJob.user.id == user_id)
+
+
+async def get_job_results(
+    job_id: PydanticObjectId,
+    limit: int = 100,
+    after_id: PydanticObjectId | None = None,
+) -> list[EmailVerificationResult]:
+    """Results of a job in insertion order, keyset-paginated on _id (index job_id + _id)."""
+    filters = [EmailVerificationResult.job_id == job_id]
+    if after_id is not None:
+        filters.append(EmailVerificationResult.id > after_id)
+    return await EmailVerificationResult.find(*filters).sort(+EmailVerificationResult.id).limit(limit).to_list()
+
+
+async def run_verification_job(job_id: str, final_attempt: bool = True) -> None:
+    """
+    Worker body of a bulk verification. Charges credits once (ledger idempotency key), then verifies
+    chunk by chunk; each chunk is persisted with one insert_many (results), one bulk upsert
+    (suppressions), one bulk_write (RecipientItem.verification_status) and one progress update.
+    A re-run resumes after the last completed chunk, discarding results of a half-written one.
+    If a chunk fails the job stays running for the next attempt; on the final attempt the credits of
+    the emails not verified are refunded and the job is marked failed.
+    """
+    job = await VerificationJob.get(PydanticObjectId(job_id))
+    if not job or job.status in ("completed", "failed"):
+        return
+    user_id = job.user.ref.id
+    if job.status == "queued":
+        try:
+            await credits_service.apply_ledger_entry(
+                user_id,
+                -job.total * get_settings().credits_per_verify,
+                "verify",
+                reference_type="bulk_verify",
+                reference_id=str(job.id),
+                idempotency_key=job.idempotency_key or f"verify_job:{job.id}",
+            )
+        except BadRequestError as e:
+            await _finish_job(job.id, "failed", str(e))
+            return
+        await VerificationJob.find_one(VerificationJob.id == job.id).update(
+            {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+        )
+    else:
+        # Resumed: drop results of a chunk that was written but not committed to the job
+        await EmailVerificationResult.find(
+            EmailVerificationResult.job_id == job.id,
+            {"metadata.chunk": {"$gte": job.chunks_done}},
+        ).delete()
+    started = time.perf_counter()
+    try:
+        chunk = job.chunks_done
+        if job.list_id is not None:
+            from app.services.recipients import iter_list_item_pages
+            async for page in iter_list_item_pages(
+                job.list_id, job.chunk_size, _ItemEmailView, after_id=job.last_item_id
+            ):
+                await _verify_chunk(job, user_id, chunk, [i.email for i in page], [i.id for i in page])
+                chunk += 1
+        else:
+            for start in range(job.chunks_done * job.chunk_size, len(job.emails), job.chunk_size):
+                await _verify_chunk(job, user_id, chunk, job.emails[start : start + job.chunk_size], None)
+                chunk += 1
+    except Exception as e:
+        if not final_attempt:
+            log.warning("verify_job_interrupted", job_id=job_id, chunk=chunk, error=str(e)[:200])
+            raise
+        await _refund_unprocessed(job.id, user_id)
+        await _finish_job(job.id, "failed", str(e)[:500])
+        raise
+    await _finish_job(job.id, "completed")
+    log.info(
+        "verify_job_done",
+        job_id=job_id,
+        total=job.total,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+async def _verify_chunk(
+    job: VerificationJob,
+    user_id: PydanticObjectId,
+    chunk: int,
+    emails: list[str],
+    item_ids: list[PydanticObjectId] | None,
+) -> None:
+    outcomes = await verify_emails(emails)
+    user_ref = job.user
+    metadata = {"chunk": chunk}
+    if job.idempotency_key:
+        metadata["idempotency_key"] = job.idempotency_key
+    results = [
+        EmailVerificationResult(
+            user=user_ref,
+            recipient_item=RecipientItem.link_from_id(item_ids[i]) if item_ids else None,
+            email=o.email,
+            result=o.result,
+            mx_valid=o.mx_valid,
+            syntax_valid=o.syntax_valid,
+            job_id=job.id,
+            metadata=dict(metadata),
+        )
+        for i, o in enumerate(outcomes)
+    ]
+    if results:
+        await EmailVerificationResult.insert_many(results)
+    suppress = [o.email for o in outcomes if o.result in ("invalid", "disposable")]
+    if suppress:
+        from app.services.suppression import add_suppressions
+        await add_suppressions(suppress, user_id=str(user_id), source="verification")
+    if item_ids:
+        by_status: dict[str, list[PydanticObjectId]] = {}
+        for item_id, o in zip(item_ids, outcomes):
+            by_status.setdefault(item_status(o.result), []).append(item_id)
+        await RecipientItem.get_motor_collection().bulk_write(
+            [UpdateMany({"_id": {"$in": ids}}, {"$set": {"verification_status": status}}) for status, ids in by_status.items()],
+            ordered=False,
+        )
+    counts: dict[str, int] = {}
+    for o in outcomes:
+        counts[f"counts.{o.result}"] = counts.get(f"counts.{o.result}", 0) + 1
+    update: dict = {
+        "$inc": {"processed_count": len(emails), **counts},
+        "$set": {"chunks_done": chunk + 1, "updated_at": datetime.utcnow()},
+    }
+    if item_ids:
+        update["$set"]["last_item_id"] = item_ids[-1]
+    await VerificationJob.find_one(VerificationJob.id == job.id).update(update)
+    log.debug("verify_job_chunk_done", job_id=str(job.id), chunk=chunk, emails=len(emails), suppressed=len(suppress))
+
+
+async def _refund_unprocessed(job_id: PydanticObjectId, user_id: PydanticObjectId) -> None:
+    """Give back the upfront charge for emails the job never verified (once per job)."""
+    job = await VerificationJob.get(job_id)
+    remaining = job.total - job.processed_count if job else 0
+    if remaining <= 0:
+        return
+    await credits_service.apply_ledger_entry(
+        user_id,
+        remaining * get_settings().credits_per_verify,
+        "refund",
+        reference_type="bulk_verify",
+        reference_id=str(job_id),
+        idempotency_key=f"verify_job_refund:{job_id}",
+    )
+    log.info("verify_job_refunded", job_id=str(job_id), emails=remaining)
+
+
+async def _finish_job(job_id: PydanticObjectId, status: str, error: str | None = None) -> None:
+    now = datetime.utcnow()
+    await VerificationJob.find_one(VerificationJob.id == job_id).update(
+        {"$set": {"status": status, "error": error, "updated_at": now, "finished_at": now}}
+    )
@@ -1,3 +1,4 @@
+import io
 from abc import ABC, abstractmethod
 from typing import BinaryIO
 
@@ -18,6 +19,11 @@ class StorageBackend(ABC):
         """Retrieve file bytes."""
         ...
 
+    async def open_read(self, key: str) -> BinaryIO:
+        """Open file for streaming reads (seekable). Blocking reads: consume from a worker thread.
+        Default buffers the whole file; backends override to stream."""
+        return io.BytesIO(await self.get(key))
+
     @abstractmethod
     async def delete(self, key: str) -> None:
         """Delete file."""
@@ -1,3 +1,4 @@
+import asyncio
 from typing import BinaryIO
 
 from google.cloud import storage
@@ -5,6 +6,8 @@ from google.cloud import storage
 from app.core.config import get_settings
 from app.storage.base import StorageBackend
 
+READ_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 class GCSStorage(StorageBackend):
     def __init__(self) -> None:
@@ -13,21 +16,32 @@ class GCSStorage(StorageBackend):
         self._client = storage.Client()
         self._bucket = self._client.bucket(self.bucket_name)
 
+    # The google-cloud-storage client is blocking: every call runs in a thread, off the event loop
+
     async def put(self, key: str, body: BinaryIO | bytes, content_type: str | None = None) -> str:
         blob = self._bucket.blob(key)
+        content_type = content_type or "application/octet-stream"
         if isinstance(body, bytes):
-            blob.upload_from_string(body, content_type=content_type or "application/octet-stream")
+            await asyncio.to_thread(blob.upload_from_string, body, content_type=content_type)
         else:
-            blob.upload_from_file(body, content_type=content_type or "application/octet-stream")
+            # Streams file-like bodies (spooled uploads) in resumable chunks
+            await asyncio.to_thread(blob.upload_from_file, body, content_type=content_type)
         return f"gs://{self.bucket_name}/{key}"
 
     async def get(self, key: str) -> bytes:
         blob = self._bucket.blob(key)
-        if not blob.exists():
+        if not await asyncio.to_thread(blob.exists):
+            raise FileNotFoundError(key)
+        return await asyncio.to_thread(blob.download_as_bytes)
+
+    async def open_read(self, key: str) -> BinaryIO:
+        blob = self._bucket.blob(key)
+        if not await asyncio.to_thread(blob.exists):
             raise FileNotFoundError(key)
-        return blob.download_as_bytes()
+        # BlobReader: ranged downloads of chunk_size, seekable (openpyxl needs it for the zip directory)
+        return blob.open("rb", chunk_size=READ_CHUNK_SIZE)
 
     async def delete(self, key: str) -> None:
         blob = self._bucket.blob(key)
-        if blob.exists():
-            blob.delete()
+        if await asyncio.to_thread(blob.exists):
+            await asyncio.to_thread(blob.delete)
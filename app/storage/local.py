@@ -1,3 +1,5 @@
+import asyncio
+import shutil
 from pathlib import Path
 from typing import BinaryIO
 
@@ -6,6 +8,7 @@ from app.core.logging import get_logger
 from app.storage.base import StorageBackend
 
 log = get_logger(__name__)
+COPY_CHUNK_SIZE = 1024 * 1024
 
 
 class LocalStorage(StorageBackend):
@@ -22,7 +25,8 @@ class LocalStorage(StorageBackend):
         if isinstance(body, bytes):
             path.write_bytes(body)
         else:
-            path.write_bytes(body.read())
+            # Stream file-like bodies (spooled uploads) in chunks, off the event loop
+            await asyncio.to_thread(_copy_to, body, path)
         log.debug("LocalStorage.put_ok", key=key)
         return str(path)
 
@@ -34,9 +38,22 @@ class LocalStorage(StorageBackend):
             raise FileNotFoundError(key)
         return path.read_bytes()
 
+    async def open_read(self, key: str) -> BinaryIO:
+        log.debug("LocalStorage.open_read", key=key)
+        path = self.root / key
+        if not path.exists():
+            log.warning("LocalStorage.open_read_not_found", key=key)
+            raise FileNotFoundError(key)
+        return path.open("rb")
+
     async def delete(self, key: str) -> None:
         log.debug("LocalStorage.delete", key=key)
         path = self.root / key
         if path.exists():
             path.unlink()
         log.debug("LocalStorage.delete_ok", key=key)
+
+
+def _copy_to(body: BinaryIO, path: Path) -> None:
+    with path.open("wb") as out:
+        shutil.copyfileobj(body, out, COPY_CHUNK_SIZE)
@@ -1,107 +1,390 @@
 """Cron: at send_at, tell Gmail to send (drafts.send for drafts, or SMTP for queued).
 
 Gmail API has no native 'schedule send'—drafts appear in Gmail's Drafts until we call drafts.send.
-This job runs every minute and sends any scheduled email whose send_at has passed."""
+This job runs every minute and sends any scheduled email whose send_at has passed, or, with
+SEND_LOOP_ENABLED, runs as a long-lived loop (run_send_loop) that drains due emails continuously."""
 
-from datetime import datetime, timezone
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
 
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+
+from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.metrics import (
+    EMAILS_SENT,
+    SEND_CYCLE_ACCOUNTS,
+    SEND_CYCLE_SECONDS,
+    SEND_CYCLE_THROUGHPUT,
+    SEND_LAG_SECONDS,
+)
+from app.core.redis import get_redis
 from app.db.init import init_db
 from app.models.campaign import Campaign
+from app.models.gmail_account import GmailAccount
 from app.models.scheduled_email import ScheduledEmail
 from app.services.gmail import (
     get_app_password_plain,
-    send_draft_via_gmail_api,
-    send_email_smtp,
+    send_drafts_batch,
+    send_email_smtp_pooled,
     send_email_via_gmail_api,
 )
+from app.services.gmail_client import run_blocking
+from app.services.rate_limit import next_utc_day_start, return_send_tokens, take_send_tokens
+from app.services.schedule_writer import SEND_WAKEUP_CHANNEL
+from app.services.smtp_pool import get_smtp_pool
 
 log = get_logger(__name__)
 BATCH_SIZE = 50
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _IdView(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+
 
+class _SendAtView(BaseModel):
+    send_at: datetime
 
-async def run_send_due_emails() -> None:
+
+async def run_send_due_emails() -> int:
     """
-    Find scheduled emails with send_at <= now:
-    - status=drafted and gmail_draft_id: Gmail sends the draft (drafts.send).
-    - status=queued: we send via Gmail API or SMTP.
+    Cron entry point: recover expired leases, then send one page of due emails.
+    Returns the number of emails processed.
     """
     await init_db()
-    now = datetime.now(timezone.utc)
-    due_drafted = (
-        await ScheduledEmail.find(
-            ScheduledEmail.status == "drafted",
-            ScheduledEmail.send_at <= now,
-            ScheduledEmail.gmail_draft_id != None,  # noqa: E711
-        )
-        .limit(BATCH_SIZE)
-        .to_list()
-    )
-    due_queued = (
-        await ScheduledEmail.find(
-            ScheduledEmail.status == "queued",
-            ScheduledEmail.send_at <= now,
-        )
-        .limit(BATCH_SIZE)
-        .to_list()
-    )
-    due = due_drafted + due_queued
+    await recover_expired_leases()
+    return await send_due_page()
+
+
+async def send_due_page() -> int:
+    """
+    Claim scheduled emails with send_at <= now (atomic lease, safe with several workers) and send them:
+    - status=drafted and gmail_draft_id: Gmail sends the draft (drafts.send, batched per account).
+    - status=queued: we send via Gmail API or SMTP.
+    Returns the number of emails processed (0 when nothing is due).
+    """
+    started = time.perf_counter()
+    lease_owner = f"{WORKER_ID}:{uuid.uuid4().hex[:12]}"
+    due = await claim_due_emails(lease_owner, BATCH_SIZE)
     if not due:
         log.debug("send_due_emails", count=0)
-        return
-    log.info("send_due_emails", count=len(due), drafted=len(due_drafted), queued=len(due_queued))
+        return 0
+    drafted_count = sum(1 for s in due if s.gmail_draft_id)
+    log.info("send_due_emails", count=len(due), drafted=drafted_count, queued=len(due) - drafted_count, lease_owner=lease_owner)
+
+    by_account: dict[PydanticObjectId, list[ScheduledEmail]] = defaultdict(list)
+    for s in due:
+        by_account[s.gmail_account.ref.id].append(s)
+    # One $in query for every account in the page instead of a Link fetch per email
+    accounts = {a.id: a for a in await GmailAccount.find(In(GmailAccount.id, list(by_account))).to_list()}
+    # Accounts run concurrently (bounded); within an account sends stay serial to respect Gmail pacing
+    semaphore = asyncio.Semaphore(max(1, get_settings().send_account_concurrency))
+
+    async def _dispatch(account_id: PydanticObjectId, rows: list[ScheduledEmail]) -> None:
+        async with semaphore:
+            try:
+                await _send_for_account(accounts.get(account_id), rows)
+            except Exception as e:
+                log.warning("send_due_emails_account_failed", account_id=str(account_id), error=str(e)[:200])
+                for s in rows:
+                    if s.status == "sending":
+                        s.status = "failed"
+                        s.failure_reason = str(e)[:500]
+
+    await asyncio.gather(*(_dispatch(account_id, rows) for account_id, rows in by_account.items()))
+    await run_blocking(get_smtp_pool().close_idle)
+
     sent = 0
     failed = 0
+    deferred = 0
+    max_lag = 0.0
+    sent_at = datetime.now(timezone.utc)
+    campaign_counts: dict[PydanticObjectId, Counter[str]] = defaultdict(Counter)
     for s in due:
-        s.status = "sending"
-        await s.save()
+        if s.status in ("drafted", "queued"):
+            deferred += 1
+            continue
+        if s.status == "sent":
+            sent += 1
+            lag = max(0.0, (sent_at - _as_utc(s.send_at)).total_seconds())
+            max_lag = max(max_lag, lag)
+            SEND_LAG_SECONDS.observe(lag)
+        else:
+            failed += 1
+        campaign_counts[s.campaign.ref.id]["sent_count" if s.status == "sent" else "failed_count"] += 1
+    await _release_all(due, lease_owner, sent_at)
+    # One $inc per campaign, all in a single bulk_write (none when every row was deferred)
+    if campaign_counts:
+        await Campaign.get_motor_collection().bulk_write(
+            [
+                UpdateOne({"_id": cid}, {"$inc": dict(counts), "$set": {"updated_at": sent_at}})
+                for cid, counts in campaign_counts.items()
+            ],
+            ordered=False,
+        )
+
+    elapsed = time.perf_counter() - started
+    throughput = len(due) / elapsed if elapsed > 0 else 0.0
+    SEND_CYCLE_SECONDS.observe(elapsed)
+    EMAILS_SENT.labels(result="sent").inc(sent)
+    EMAILS_SENT.labels(result="failed").inc(failed)
+    SEND_CYCLE_THROUGHPUT.set(throughput)
+    SEND_CYCLE_ACCOUNTS.set(len(by_account))
+    log.info(
+        "send_due_emails_ok",
+        sent=sent,
+        failed=failed,
+        deferred=deferred,
+        accounts=len(by_account),
+        duration_ms=round(elapsed * 1000, 2),
+        throughput_per_s=round(throughput, 2),
+        max_lag_s=round(max_lag, 1),
+    )
+    return len(due)
+
+
+async def run_send_loop(stop: asyncio.Event) -> None:
+    """
+    Long-running send mode: drain due emails page by page until none remain, then sleep until the
+    next send_at (index-backed peek, capped at send_loop_max_idle_seconds). A Redis message on
+    SEND_WAKEUP_CHANNEL (published when new rows are scheduled) wakes it early.
+    """
+    max_idle = get_settings().send_loop_max_idle_seconds
+    wakeup = asyncio.Event()
+    listener = asyncio.create_task(_listen_for_wakeups(wakeup))
+    log.info("send_loop_start", worker_id=WORKER_ID, max_idle_s=max_idle)
+    try:
+        while not stop.is_set():
+            wakeup.clear()
+            try:
+                await recover_expired_leases()
+                while not stop.is_set() and await send_due_page() > 0:
+                    pass
+                delay = await _seconds_until_next_due(max_idle)
+            except Exception as e:
+                log.exception("send_loop_error", error=str(e)[:200])
+                delay = max_idle
+            if delay > 0:
+                await _wait_for_any(stop, wakeup, timeout=delay)
+    finally:
+        listener.cancel()
+        log.info("send_loop_stop", worker_id=WORKER_ID)
+
+
+async def _seconds_until_next_due(max_idle: float) -> float:
+    """Seconds until the earliest pending send_at (status, send_at index), capped at max_idle."""
+    nxt = (
+        await ScheduledEmail.find(In(ScheduledEmail.status, ["drafted", "queued"]))
+        .sort(+ScheduledEmail.send_at)
+        .limit(1)
+        .project(_SendAtView)
+        .to_list()
+    )
+    if not nxt:
+        return max_idle
+    delay = (_as_utc(nxt[0].send_at) - datetime.now(timezone.utc)).total_seconds()
+    return min(max(delay, 0.0), max_idle)
+
+
+async def _listen_for_wakeups(wakeup: asyncio.Event) -> None:
+    while True:
         try:
-            account = await s.gmail_account.fetch()
-            if not account or account.revoked:
-                s.status = "failed"
-                s.failure_reason = "Gmail account missing or revoked"
-                failed += 1
-            elif s.gmail_draft_id:
-                msg_id = await send_draft_via_gmail_api(account, s.gmail_draft_id)
-                s.status = "sent"
-                s.gmail_message_id = msg_id
-                sent += 1
-            elif getattr(account, "auth_type", "oauth") == "app_password":
-                app_password = get_app_password_plain(account)
-                send_email_smtp(
-                    account.email,
-                    app_password,
-                    s.recipient_email,
-                    s.subject,
-                    s.body_html,
-                )
-                s.status = "sent"
-                sent += 1
-            else:
-                msg_id = await send_email_via_gmail_api(
-                    account,
-                    s.recipient_email,
-                    s.subject,
-                    s.body_html,
-                )
-                s.status = "sent"
-                s.gmail_message_id = msg_id
-                sent += 1
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(SEND_WAKEUP_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    wakeup.set()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            log.warning("send_due_email_failed", scheduled_id=str(s.id), to=s.recipient_email[:50], error=str(e)[:200])
+            log.warning("send_loop_wakeup_listener_failed", error=str(e)[:200])
+            await asyncio.sleep(5)
+
+
+async def _wait_for_any(stop: asyncio.Event, wakeup: asyncio.Event, timeout: float) -> None:
+    waiters = [asyncio.create_task(stop.wait()), asyncio.create_task(wakeup.wait())]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for w in waiters:
+            w.cancel()
+
+
+def _as_utc(dt: datetime) -> datetime:
+    """Mongo returns naive UTC datetimes."""
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+async def claim_due_emails(lease_owner: str, limit: int) -> list[ScheduledEmail]:
+    """
+    Atomically claim up to `limit` due drafted and `limit` due queued rows for this worker.
+    The status filter on the update makes each row claimable by exactly one worker; rows another
+    worker claimed in between are simply not returned.
+    """
+    now = datetime.now(timezone.utc)
+    lease = {
+        "status": "sending",
+        "lease_owner": lease_owner,
+        "lease_expires_at": now + timedelta(seconds=get_settings().send_lease_seconds),
+        "updated_at": now,
+    }
+    for status, extra in (
+        ("drafted", [ScheduledEmail.gmail_draft_id != None]),  # noqa: E711
+        ("queued", []),
+    ):
+        candidates = (
+            await ScheduledEmail.find(ScheduledEmail.status == status, ScheduledEmail.send_at <= now, *extra)
+            .limit(limit)
+            .project(_IdView)
+            .to_list()
+        )
+        if candidates:
+            await ScheduledEmail.find(
+                In(ScheduledEmail.id, [c.id for c in candidates]),
+                ScheduledEmail.status == status,
+            ).update_many({"$set": lease})
+    return await ScheduledEmail.find(ScheduledEmail.lease_owner == lease_owner).to_list()
+
+
+async def recover_expired_leases() -> int:
+    """Return "sending" rows whose lease expired (worker crashed mid-send) to drafted/queued."""
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=get_settings().send_lease_seconds)
+    expired = {
+        "status": "sending",
+        "$or": [
+            {"lease_expires_at": {"$lt": now}},
+            # Rows marked "sending" before leases existed
+            {"lease_expires_at": None, "updated_at": {"$lt": stale_before}},
+        ],
+    }
+    recovered = 0
+    for has_draft, status in ((True, "drafted"), (False, "queued")):
+        draft_filter = {"gmail_draft_id": {"$ne": None}} if has_draft else {"gmail_draft_id": None}
+        result = await ScheduledEmail.find({**expired, **draft_filter}).update_many(
+            {"$set": {"status": status, "lease_owner": None, "lease_expires_at": None, "updated_at": now}}
+        )
+        recovered += getattr(result, "modified_count", 0) or 0
+    if recovered:
+        log.warning("send_due_emails_leases_recovered", count=recovered)
+    return recovered
+
+
+async def _release_all(rows: list[ScheduledEmail], lease_owner: str, now: datetime) -> None:
+    """Persist send outcomes and drop leases in one bulk_write; rows whose lease this worker lost are left alone."""
+    await ScheduledEmail.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {"_id": s.id, "lease_owner": lease_owner},
+                {
+                    "$set": {
+                        "status": s.status,
+                        "gmail_message_id": s.gmail_message_id,
+                        "failure_reason": s.failure_reason,
+                        "send_at": s.send_at,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "updated_at": now,
+                    }
+                },
+            )
+            for s in rows
+        ],
+        ordered=False,
+    )
+
+
+async def _take_send_quota(account: GmailAccount, rows: list[ScheduledEmail]) -> list[ScheduledEmail]:
+    """
+    Take send tokens (per-minute bucket + daily quota, shared by all workers) for the account's rows.
+    Rows over the limit go back to drafted/queued with send_at pushed to when tokens free up
+    (spread at the bucket rate), or to the next UTC day when the daily quota is spent.
+    Returns the rows allowed to send now.
+    """
+    grant = await take_send_tokens(get_redis(), str(account.id), len(rows), account.daily_send_limit)
+    allowed, over = rows[: grant.granted], rows[grant.granted :]
+    if not over:
+        return allowed
+    now = datetime.now(timezone.utc)
+    per_second = max(1, get_settings().gmail_sends_per_minute) / 60
+    for i, s in enumerate(over):
+        if grant.daily_exhausted:
+            s.send_at = next_utc_day_start(now) + timedelta(seconds=i / per_second)
+        else:
+            s.send_at = now + timedelta(seconds=(grant.retry_after_seconds or 0) + i / per_second)
+        s.status = "drafted" if s.gmail_draft_id else "queued"
+    log.info(
+        "send_due_emails_deferred",
+        account_id=str(account.id),
+        count=len(over),
+        daily_exhausted=grant.daily_exhausted,
+        next_send_at=over[0].send_at.isoformat(),
+    )
+    return allowed
+
+
+async def _send_for_account(account: GmailAccount | None, rows: list[ScheduledEmail]) -> None:
+    """Send one account's due emails: drafts in Gmail batch calls, then queued emails one by one."""
+    if not account or account.revoked:
+        for s in rows:
             s.status = "failed"
-            s.failure_reason = str(e)[:500]
-            failed += 1
-        s.updated_at = datetime.now(timezone.utc)
-        await s.save()
-
-        campaign = await s.campaign.fetch()
-        if campaign:
-            if s.status == "sent":
-                campaign.sent_count += 1
-            else:
-                campaign.failed_count += 1
-            campaign.updated_at = datetime.now(timezone.utc)
-            await campaign.save()
-
-    log.info("send_due_emails_ok", sent=sent, failed=failed)
+            s.failure_reason = "Gmail account missing or revoked"
+        return
+    rows = await _take_send_quota(account, rows)
+    try:
+        drafted = [s for s in rows if s.gmail_draft_id]
+        if drafted:
+            try:
+                results = await send_drafts_batch(account, {str(s.id): s.gmail_draft_id for s in drafted})
+            except Exception as e:
+                results = {str(s.id): e for s in drafted}
+            for s in drafted:
+                result = results.get(str(s.id))
+                if isinstance(result, str):
+                    s.status = "sent"
+                    s.gmail_message_id = result
+                else:
+                    log.warning("send_due_email_failed", scheduled_id=str(s.id), to=s.recipient_email[:50], error=str(result)[:200])
+                    s.status = "failed"
+                    s.failure_reason = str(result)[:500]
+
+        for s in rows:
+            if s.gmail_draft_id:
+                continue
+            try:
+                if getattr(account, "auth_type", "oauth") == "app_password":
+                    app_password = get_app_password_plain(account)
+                    await send_email_smtp_pooled(
+                        account.email,
+                        app_password,
+                        s.recipient_email,
+                        s.subject,
+                        s.body_html,
+                    )
+                    s.status = "sent"
+                else:
+                    msg_id = await send_email_via_gmail_api(
+                        account,
+                        s.recipient_email,
+                        s.subject,
+                        s.body_html,
+                    )
+                    s.status = "sent"
+                    s.gmail_message_id = msg_id
+            except Exception as e:
+                log.warning("send_due_email_failed", scheduled_id=str(s.id), to=s.recipient_email[:50], error=str(e)[:200])
+                s.status = "failed"
+                s.failure_reason = str(e)[:500]
+    finally:
+        # Quota was taken for every row; give back what did not send (failed here, or left "sending"
+        # by an account-level error that _dispatch marks failed) so errors don't burn the day's quota
+        await return_send_tokens(get_redis(), str(account.id), sum(s.status != "sent" for s in rows))
@@ -12,23 +12,35 @@ except ImportError:
 from arq import run_worker
 from arq.cron import cron
 
+from app.core.config import get_settings
 from app.worker.tasks import (
+    JOB_MAX_TRIES,
+    enrich_bulk_job,
     get_redis_settings,
     process_recipient_list_upload,
     schedule_campaign_background,
     send_due_emails,
     shutdown,
     startup,
+    verify_bulk_job,
 )
 
 
 async def main():
+    # SEND_LOOP_ENABLED: startup() runs the continuous send loop instead of the minute cron
+    cron_jobs = [] if get_settings().send_loop_enabled else [
+        cron(send_due_emails, second=0),  # every minute at :00
+    ]
     await run_worker(
         get_redis_settings(),
-        functions=[process_recipient_list_upload, schedule_campaign_background],
-        cron_jobs=[
-            cron(send_due_emails, second=0),  # every minute at :00
+        functions=[
+            process_recipient_list_upload,
+            schedule_campaign_background,
+            verify_bulk_job,
+            enrich_bulk_job,
         ],
+        cron_jobs=cron_jobs,
+        max_tries=JOB_MAX_TRIES,
         on_startup=startup,
         on_shutdown=shutdown,
     )
@@ -1,9 +1,10 @@
 """ARQ job definitions."""
 
+import asyncio
 import uuid
 from typing import Any
 
-from arq import create_pool
+from arq import Retry, create_pool
 from arq.connections import RedisSettings
 
 from app.core.config import get_settings
@@ -11,6 +12,8 @@ from app.core.logging import get_logger
 from app.services.recipients import process_recipient_list_upload as _process_list
 
 log = get_logger(__name__)
+JOB_MAX_TRIES = 5  # ARQ max_tries (run_worker); resumable bulk jobs retry with Retry until the last try
+JOB_RETRY_DELAY_SECONDS = 10
 
 
 async def _run_with_dlq(
@@ -20,9 +23,11 @@ async def _run_with_dlq(
     kwargs: dict[str, Any],
     coro,
 ) -> None:
-    """Run coroutine; on exception persist to FailedJob then re-raise."""
+    """Run coroutine; on exception persist to FailedJob then re-raise (Retry is re-raised as is)."""
     try:
         await coro
+    except Retry:
+        raise
     except Exception as e:
         from app.db.init import init_db
         from app.models.failed_job import FailedJob
@@ -55,10 +60,41 @@ async def process_recipient_list_upload(ctx: dict[str, Any], list_id: str) -> No
 async def startup(ctx: dict) -> None:
     from app.db.init import init_db
     await init_db()
+    from app.services.credit_rollups import backfill_rollups_once
+    from app.services.credits import recover_pending_entries
+    await recover_pending_entries()
+    # Scans the ledger on first deploy: run beside the worker instead of holding up jobs and the send loop
+    ctx["rollup_backfill_task"] = asyncio.create_task(backfill_rollups_once())
+    settings = get_settings()
+    port = settings.worker_metrics_port
+    if port:
+        from prometheus_client import start_http_server
+        start_http_server(port)
+        log.info("worker_metrics_started", port=port)
+    from app.services.suppression_cache import get_global_suppression_cache
+    cache = get_global_suppression_cache()
+    if cache:
+        cache.start_warmup()
+    if settings.send_loop_enabled:
+        from app.worker.cron import run_send_loop
+        stop = asyncio.Event()
+        ctx["send_loop_stop"] = stop
+        ctx["send_loop_task"] = asyncio.create_task(run_send_loop(stop))
 
 
 async def shutdown(ctx: dict) -> None:
-    pass
+    backfill = ctx.get("rollup_backfill_task")
+    if backfill and not backfill.done():
+        # Releases its lease; a later startup finishes the remaining batches
+        backfill.cancel()
+    stop = ctx.get("send_loop_stop")
+    task = ctx.get("send_loop_task")
+    if stop and task:
+        stop.set()
+        try:
+            await asyncio.wait_for(task, timeout=60)
+        except asyncio.TimeoutError:
+            task.cancel()
 
 
 def get_redis_settings() -> RedisSettings:
@@ -119,6 +155,68 @@ async def enqueue_schedule_campaign(campaign_id: str, user_id: str, idempotency_
     log.info("schedule_campaign_enqueued", campaign_id=campaign_id, job_id=str(job_id) if job_id else None)
 
 
+def _retry_later(job_name: str, job_try: int, e: Exception, **fields: Any) -> Retry:
+    """Retry a resumable job after a growing delay (the job picks up from its last persisted chunk)."""
+    log.warning("job_retry", job=job_name, job_try=job_try, error=str(e)[:200], **fields)
+    return Retry(defer=job_try * JOB_RETRY_DELAY_SECONDS)
+
+
+async def verify_bulk_job(ctx: dict[str, Any], verification_job_id: str) -> None:
+    """Background job: run a bulk VerificationJob (resumes after the last persisted chunk)."""
+    job_id = ctx.get("job_id") if isinstance(ctx.get("job_id"), str) else None
+    job_try = int(ctx.get("job_try") or 1)
+    final_attempt = job_try >= JOB_MAX_TRIES
+
+    async def _run() -> None:
+        from app.services.verification import run_verification_job
+        log.info("job_start", job="verify_bulk_job", verification_job_id=verification_job_id, job_try=job_try)
+        try:
+            await run_verification_job(verification_job_id, final_attempt=final_attempt)
+        except Exception as e:
+            if final_attempt:
+                raise
+            raise _retry_later("verify_bulk_job", job_try, e, verification_job_id=verification_job_id) from e
+        log.info("job_done", job="verify_bulk_job", verification_job_id=verification_job_id)
+
+    await _run_with_dlq("verify_bulk_job", job_id, [verification_job_id], {}, _run())
+
+
+async def enqueue_verify_bulk(verification_job_id: str) -> None:
+    """Enqueue verify_bulk_job (call from API)."""
+    settings = get_redis_settings()
+    redis = await create_pool(settings)
+    await redis.enqueue_job("verify_bulk_job", verification_job_id)
+    await redis.close()
+
+
+async def enrich_bulk_job(ctx: dict[str, Any], enrichment_job_id: str) -> None:
+    """Background job: run a bulk EnrichmentJob (resumes after the last persisted chunk)."""
+    job_id = ctx.get("job_id") if isinstance(ctx.get("job_id"), str) else None
+    job_try = int(ctx.get("job_try") or 1)
+    final_attempt = job_try >= JOB_MAX_TRIES
+
+    async def _run() -> None:
+        from app.services.enrichment import run_enrichment_job
+        log.info("job_start", job="enrich_bulk_job", enrichment_job_id=enrichment_job_id, job_try=job_try)
+        try:
+            await run_enrichment_job(enrichment_job_id, final_attempt=final_attempt)
+        except Exception as e:
+            if final_attempt:
+                raise
+            raise _retry_later("enrich_bulk_job", job_try, e, enrichment_job_id=enrichment_job_id) from e
+        log.info("job_done", job="enrich_bulk_job", enrichment_job_id=enrichment_job_id)
+
+    await _run_with_dlq("enrich_bulk_job", job_id, [enrichment_job_id], {}, _run())
+
+
+async def enqueue_enrich_bulk(enrichment_job_id: str) -> None:
+    """Enqueue enrich_bulk_job (call from API)."""
+    settings = get_redis_settings()
+    redis = await create_pool(settings)
+    await redis.enqueue_job("enrich_bulk_job", enrichment_job_id)
+    await redis.close()
+
+
 # Cron: send_due_emails (Phase 10)
 async def send_due_emails(ctx: dict[str, Any]) -> None:
     """Cron job: send scheduled emails that are due (Gmail API)."""
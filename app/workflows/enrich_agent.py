@@ -22,7 +22,7 @@ async def _run_enrich(state: EnrichState) -> dict:
         oids = [PydanticObjectId(x) for x in ids]
         results_list = await enrichment_service.enrich_bulk(PydanticObjectId(user_id), oids)
         results = [
-            {"recipient_item_id": str(r.recipient_item.ref), "chosen_email": r.chosen_email, "role": r.role}
+            {"recipient_item_id": str(r.recipient_item.ref.id), "chosen_email": r.chosen_email, "role": r.role}
             for r in results_list
         ]
         return {"results": results, "error": ""}
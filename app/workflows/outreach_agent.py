@@ -5,11 +5,15 @@ from typing import Any, TypedDict
 from beanie import PydanticObjectId
 from langgraph.graph import END, START, StateGraph
 
+# Recipients listed in the returned plan; counts and credits always cover the whole list
+PLAN_PREVIEW_LIMIT = 500
+
 
 class OutreachState(TypedDict):
     campaign_id: str
     user_id: str
     recipient_ids: list[str]
+    recipient_count: int
     schedule_plan: list[dict[str, Any]]
     credits_required: int
     credits_per_send: int
@@ -22,9 +26,8 @@ async def _plan_outreach(state: OutreachState) -> dict:
 
     from app.core.config import get_settings
     from app.models.campaign import Campaign
-    from app.models.recipient_item import RecipientItem
     from app.models.recipient_list import RecipientList
-    from app.services.suppression import list_suppressed_emails
+    from app.services.recipients import RecipientEmailView, iter_sendable_pages
 
     campaign_id = state["campaign_id"]
     user_id = state["user_id"]
@@ -35,6 +38,7 @@ async def _plan_outreach(state: OutreachState) -> dict:
         if not campaign.recipient_list_id:
             return {
                 "recipient_ids": [],
+                "recipient_count": 0,
                 "schedule_plan": [],
                 "credits_required": 0,
                 "credits_per_send": get_settings().credits_per_send,
@@ -43,29 +47,30 @@ async def _plan_outreach(state: OutreachState) -> dict:
         rlist = await RecipientList.get(PydanticObjectId(campaign.recipient_list_id))
         if not rlist:
             return {"error": "List not found"}
-        items = await RecipientItem.find(RecipientItem.list.id == rlist.id).limit(500).to_list()
-        suppressed = await list_suppressed_emails(user_id)
-        items = [i for i in items if i.email not in suppressed and ((i.chosen_email or i.email) not in suppressed)]
-        credits_per_send = get_settings().credits_per_send
-        credits_required = len(items) * credits_per_send
-        send_at = datetime.utcnow() + timedelta(minutes=1)
+        # Streamed in pages (projection only): the whole list is counted, the first PLAN_PREVIEW_LIMIT are listed
+        n = 0
         schedule_plan = []
-        for item in items:
-            schedule_plan.append({
-                "recipient_id": str(item.id),
-                "email": item.chosen_email or item.email,
-                "send_at": send_at.isoformat(),
-            })
-            send_at = send_at + timedelta(seconds=30)
+        send_at = datetime.utcnow() + timedelta(minutes=1)
+        async for page in iter_sendable_pages(rlist.id, user_id, projection=RecipientEmailView):
+            for item in page[: max(0, PLAN_PREVIEW_LIMIT - n)]:
+                schedule_plan.append({
+                    "recipient_id": str(item.id),
+                    "email": item.chosen_email or item.email,
+                    "send_at": send_at.isoformat(),
+                })
+                send_at = send_at + timedelta(seconds=30)
+            n += len(page)
+        credits_per_send = get_settings().credits_per_send
+        credits_required = n * credits_per_send
         # Placeholder: estimated recruiter response probability (e.g. from list size / verification rate)
-        n = len(items)
         estimated_response_probability = 0.12 if n > 0 else 0.0
         if n <= 20:
             estimated_response_probability = 0.18
         elif n <= 100:
             estimated_response_probability = 0.15
         return {
-            "recipient_ids": [str(i.id) for i in items],
+            "recipient_ids": [p["recipient_id"] for p in schedule_plan],
+            "recipient_count": n,
             "schedule_plan": schedule_plan,
             "credits_required": credits_required,
             "credits_per_send": credits_per_send,
@@ -91,6 +96,7 @@ async def run_outreach(campaign_id: str, user_id: str) -> dict:
         "campaign_id": campaign_id,
         "user_id": user_id,
         "recipient_ids": [],
+        "recipient_count": 0,
         "schedule_plan": [],
         "credits_required": 0,
         "credits_per_send": 0,
@@ -0,0 +1,55 @@
+"""Shared helpers for the benchmark scripts (scripts/bench_*.py). Needs a reachable MongoDB (MONGODB_URI)."""
+
+import os
+from collections import Counter
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", "findmyjob_bench")
+WRITE_COMMANDS = ("insert", "update", "delete", "findAndModify")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts MongoDB commands (round trips) by name."""
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.counts[event.command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+    def reset(self) -> None:
+        self.counts.clear()
+
+    @property
+    def writes(self) -> int:
+        return sum(self.counts[c] for c in WRITE_COMMANDS)
+
+
+async def init_bench_db() -> tuple[AsyncIOMotorClient, CommandCounter]:
+    """Connect to a scratch database with command counting; returns (client, counter)."""
+    from app.db.init import DOCUMENT_MODELS
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(
+        os.environ.get("MONGODB_URI", "mongodb://localhost:27017"),
+        event_listeners=[counter],
+    )
+    await client.drop_database(BENCH_DB_NAME)
+    await init_beanie(database=client[BENCH_DB_NAME], document_models=DOCUMENT_MODELS)
+    counter.reset()
+    return client, counter
+
+
+def print_table(headers: list[str], rows: list[list]) -> None:
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    for r in [headers, *rows]:
+        print("  ".join(str(x).rjust(w) for x, w in zip(r, widths)))
@@ -0,0 +1,49 @@
+"""
+Microbenchmark: per-send client overhead, build() per call vs cached Gmail service.
+
+"before": googleapiclient.discovery.build("gmail", "v1") for every message (old path).
+"after":  get_gmail_service() from the per-account cache (static discovery document parsed once).
+Both then build and execute a drafts.send request against an in-memory HTTP mock, so the
+numbers are client overhead only (no network).
+
+Usage: PYTHONPATH=. python scripts/bench_gmail_client.py [iterations]
+"""
+
+import sys
+import time
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from app.services.gmail_client import get_client_cache, get_gmail_service
+
+
+def _send(service) -> None:
+    http = HttpMockSequence([({"status": "200"}, '{"id": "m1"}')])
+    service.users().drafts().send(userId="me", body={"id": "d1"}).execute(http=http)
+
+
+def _before(n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        _send(build("gmail", "v1", credentials=Credentials(token="t"), cache_discovery=False))
+    return (time.perf_counter() - start) / n
+
+
+def _after(n: int) -> float:
+    get_client_cache().clear()
+    start = time.perf_counter()
+    for _ in range(n):
+        _send(get_gmail_service("account-1", "t"))
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    before = _before(n)
+    after = _after(n)
+    print(f"iterations={n}")
+    print(f"before (build per call): {before * 1000:.2f} ms/send")
+    print(f"after  (cached service): {after * 1000:.3f} ms/send")
+    print(f"speedup: {before / after:.0f}x")
@@ -0,0 +1,115 @@
+"""
+Benchmark: CPU cost of parsing and preparing an uploaded CSV (no database).
+
+per_row (old path): find_email_column + header loop for name/company on every row.
+columnar: schema inferred once, then prepare_row_batch per batch (email column normalized and
+validated as a column, in-batch dedupe) + name/company read from the inferred columns.
+Each mode runs with the csv module and, if installed, pyarrow's CSV reader.
+
+Usage: PYTHONPATH=. python scripts/bench_recipient_parse.py [1000000]
+"""
+
+import io
+import itertools
+import logging
+import sys
+import time
+
+import structlog
+
+from app.services.recipients import (
+    EMAIL_RE,
+    SCHEMA_SAMPLE_ROWS,
+    _last_value,
+    extract_domain,
+    find_email_column,
+    infer_schema,
+    iter_csv_rows,
+    normalize_email,
+    prepare_row_batch,
+)
+from scripts.bench_common import print_table
+
+BATCH_SIZE = 1000
+
+
+def synthetic_csv(n: int) -> bytes:
+    """Wide-ish sheet: email in the 3rd of 9 columns, 5% invalid and 5% duplicate rows."""
+    out = io.StringIO()
+    out.write("id,first name,Email,name,company,title,city,country,notes\n")
+    for i in range(n):
+        if i % 20 == 7:
+            email = f"not-an-email-{i}"
+        elif i % 20 == 13:
+            email = f"User{i - 1}@Example{(i - 1) % 97}.com"
+        else:
+            email = f" User{i}@Example{i % 97}.com"
+        out.write(f"{i},First{i},{email},User {i},Company {i % 300},Engineer,City {i % 50},IN,lorem ipsum\n")
+    return out.getvalue().encode()
+
+
+def per_row(rows) -> int:
+    valid = 0
+    seen: set[str] = set()
+    for row in rows:
+        email = find_email_column(row)
+        if not email or not EMAIL_RE.match(email):
+            continue
+        email = normalize_email(email)
+        extract_domain(email)
+        if email in seen:
+            continue
+        seen.add(email)
+        for k, v in row.items():
+            if v is None:
+                continue
+            v = str(v).strip()
+            if not v:
+                continue
+            k.lower()
+        valid += 1
+    return valid
+
+
+def columnar(rows) -> int:
+    valid = 0
+    schema = None
+    processed = 0
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        if schema is None:
+            schema = infer_schema(batch[:SCHEMA_SAMPLE_ROWS])
+        candidates, _ = prepare_row_batch(batch, schema, processed)
+        for email, (row, _) in candidates.items():
+            extract_domain(email)
+            _last_value(row, schema.name_columns)
+            _last_value(row, schema.company_columns)
+        processed += len(batch)
+        valid += len(candidates)
+    return valid
+
+
+def main(n: int) -> None:
+    # Per-row debug logging would dominate both paths; measure the work itself
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.INFO))
+    data = synthetic_csv(n)
+    readers = [("csv", iter_csv_rows)]
+    try:
+        import pyarrow  # noqa: F401
+
+        from app.services.recipients import iter_csv_rows_arrow
+        readers.append(("pyarrow", iter_csv_rows_arrow))
+    except ImportError:
+        print("pyarrow not installed: skipping the pyarrow reader")
+    results = []
+    for reader_name, reader in readers:
+        for mode, fn in (("per_row", per_row), ("columnar", columnar)):
+            start = time.perf_counter()
+            kept = fn(reader(io.BytesIO(data)))
+            elapsed = time.perf_counter() - start
+            results.append([n, reader_name, mode, kept, f"{elapsed:.2f}", f"{n / elapsed:,.0f}"])
+    print(f"file: {len(data) / 1e6:.1f} MB")
+    print_table(["rows", "reader", "mode", "kept", "cpu_s", "rows_per_s"], results)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,98 @@
+"""
+Benchmark: recipient list ingestion, per-row insert vs batched insert_many.
+
+Per-row (old path): RecipientItem.insert() for every valid row.
+Batched: ingest_rows (insert_many per batch + one progress update per batch).
+Both read the same synthetic CSV (5% invalid, 5% duplicate rows) through the streaming parser.
+
+Usage: PYTHONPATH=. MONGODB_URI=mongodb://localhost:27017 python scripts/bench_recipient_upload.py [10000 100000]
+"""
+
+import asyncio
+import io
+import sys
+import time
+
+from beanie import PydanticObjectId
+
+from app.models.recipient_item import RecipientItem
+from app.models.recipient_list import RecipientList
+from app.models.user import User
+from app.services.recipients import (
+    EMAIL_RE,
+    extract_domain,
+    find_email_column,
+    ingest_rows,
+    iter_csv_rows,
+    normalize_email,
+)
+from scripts.bench_common import BENCH_DB_NAME, init_bench_db, print_table
+
+
+def synthetic_csv(n: int) -> bytes:
+    out = io.StringIO()
+    out.write("email,name,company\n")
+    for i in range(n):
+        if i % 20 == 7:
+            out.write(f"not-an-email-{i},Bad Row,Acme\n")
+        elif i % 20 == 13:
+            out.write(f"user{i - 1}@example{(i - 1) % 97}.com,Dup Row,Acme\n")
+        else:
+            out.write(f"user{i}@example{i % 97}.com,User {i},Company {i % 300}\n")
+    return out.getvalue().encode()
+
+
+async def _fixture_list() -> RecipientList:
+    user = User(google_sub=f"bench-{PydanticObjectId()}", email="bench@example.com", name="Bench")
+    await user.insert()
+    rlist = RecipientList(user=user, name="bench", storage_path="lists/bench.csv")
+    await rlist.insert()
+    return rlist
+
+
+async def _per_row(data: bytes) -> None:
+    rlist = await _fixture_list()
+    seen: set[str] = set()
+    for row in iter_csv_rows(io.BytesIO(data)):
+        email = find_email_column(row)
+        if not email or not EMAIL_RE.match(email):
+            continue
+        email = normalize_email(email)
+        if email in seen:
+            continue
+        seen.add(email)
+        await RecipientItem(list=rlist, email=email, domain=extract_domain(email), raw_row=dict(row)).insert()
+
+
+async def _batched(data: bytes) -> None:
+    rlist = await _fixture_list()
+    await ingest_rows(rlist, iter_csv_rows(io.BytesIO(data)))
+
+
+async def main(sizes: list[int]) -> None:
+    client, counter = await init_bench_db()
+    rows = []
+    try:
+        for n in sizes:
+            data = synthetic_csv(n)
+            for name, fn in (("per_row", _per_row), ("batched", _batched)):
+                counter.reset()
+                start = time.perf_counter()
+                await fn(data)
+                elapsed = time.perf_counter() - start
+                rows.append([
+                    n,
+                    name,
+                    counter.counts["insert"],
+                    counter.counts["update"],
+                    counter.counts["find"],
+                    f"{elapsed * 1000:.0f}",
+                    f"{n / elapsed:.0f}",
+                ])
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+    print_table(["rows", "mode", "inserts", "updates", "finds", "wall_ms", "rows_per_s"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(x) for x in sys.argv[1:]] or [10_000, 100_000]))
@@ -0,0 +1,87 @@
+"""
+Benchmark: ScheduledEmail writes in the schedule job, per-row vs buffered writer.
+
+Per-row (old path): ScheduledEmail.insert() + campaign.save() for every recipient.
+Buffered: ScheduledEmailWriter (insert_many batches + throttled $inc progress).
+
+Usage: PYTHONPATH=. MONGODB_URI=mongodb://localhost:27017 python scripts/bench_schedule_writes.py [500 5000]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+
+from app.models.campaign import Campaign
+from app.models.gmail_account import GmailAccount
+from app.models.scheduled_email import ScheduledEmail
+from app.models.template import Template
+from app.models.user import User
+from app.services.schedule_writer import ScheduledEmailWriter
+from scripts.bench_common import BENCH_DB_NAME, init_bench_db, print_table
+
+
+async def _fixtures() -> tuple[Campaign, GmailAccount]:
+    user = User(google_sub=f"bench-{PydanticObjectId()}", email="bench@example.com", name="Bench")
+    await user.insert()
+    template = Template(user=user, name="bench", subject="Hello", body_html="<p>Hi</p>")
+    await template.insert()
+    campaign = Campaign(user=user, name="bench", template=template)
+    await campaign.insert()
+    gmail = GmailAccount(user=user, email="bench@gmail.com")
+    await gmail.insert()
+    return campaign, gmail
+
+
+def _row(campaign: Campaign, gmail: GmailAccount, i: int) -> ScheduledEmail:
+    return ScheduledEmail(
+        campaign=campaign,
+        gmail_account=gmail,
+        recipient_email=f"r{i}@example.com",
+        recipient_item_id=str(PydanticObjectId()),
+        subject="Hello",
+        body_html="<p>Hi</p>",
+        send_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        status="drafted",
+        gmail_draft_id=f"d{i}",
+    )
+
+
+async def _per_row(n: int) -> None:
+    campaign, gmail = await _fixtures()
+    for i in range(n):
+        await _row(campaign, gmail, i).insert()
+        campaign.scheduled_count += 1
+        campaign.updated_at = datetime.now(timezone.utc)
+        await campaign.save()
+
+
+async def _buffered(n: int) -> None:
+    campaign, gmail = await _fixtures()
+    writer = ScheduledEmailWriter(campaign.id)
+    await writer.reset_progress(0)
+    for i in range(n):
+        await writer.add(_row(campaign, gmail, i))
+    await writer.close()
+
+
+async def main(sizes: list[int]) -> None:
+    client, counter = await init_bench_db()
+    rows = []
+    try:
+        for n in sizes:
+            for name, fn in (("per_row", _per_row), ("buffered", _buffered)):
+                counter.reset()
+                start = time.perf_counter()
+                await fn(n)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                rows.append([n, name, counter.counts["insert"], counter.counts["update"], counter.writes, f"{elapsed_ms:.0f}"])
+    finally:
+        await client.drop_database(BENCH_DB_NAME)
+    print_table(["recipients", "mode", "inserts", "updates", "writes", "wall_ms"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(x) for x in sys.argv[1:]] or [500, 5000]))
@@ -0,0 +1,118 @@
+"""
+Migration: make credit balances and ledger idempotency keys consistent before the credits indexes build.
+
+1. Duplicate ledger entries for one (user, idempotency_key) are collapsed to the first one (applied
+   before pending, then oldest), so the unique (user.$id, idempotency_key) index can be built.
+   Users who lost entries get their rollups rebuilt: their rollups are deleted and their entries
+   unflagged, and the next worker startup backfills them (app/services/credit_rollups.py).
+2. Each user's balance is recomputed as the sum of their applied ledger entries into one document
+   with _id = user id; any other balance documents of that user (legacy duplicates) are deleted.
+   Pending entries are left for recover_pending_entries (worker startup) to apply.
+
+Run with the API and worker stopped. --dry-run only reports what would change.
+
+Usage: PYTHONPATH=. MONGODB_URI=mongodb://localhost:27017 python scripts/migrate_credit_balances.py [--dry-run]
+"""
+
+import asyncio
+import sys
+
+from bson import DBRef
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+LEDGER = "credit_ledger"
+BALANCES = "credit_balances"
+ROLLUPS = "credit_rollups"
+LEASES = "leases"
+
+
+async def dedupe_ledger_keys(db: AsyncIOMotorDatabase, dry_run: bool = False) -> int:
+    """Delete all but one ledger entry per (user, idempotency_key). Returns the number deleted."""
+    ledger = db[LEDGER]
+    groups = ledger.aggregate(
+        [
+            {"$match": {"idempotency_key": {"$type": "string"}}},
+            {"$group": {"_id": {"user": "$user", "key": "$idempotency_key"}, "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+        ],
+        allowDiskUse=True,
+    )
+    deleted = 0
+    async for group in groups:
+        rows = await ledger.find(
+            {"_id": {"$in": group["ids"]}}, {"status": 1, "created_at": 1}
+        ).to_list(None)
+        rows.sort(key=lambda r: (r.get("status") == "pending", r.get("created_at"), r["_id"]))
+        extra = [r["_id"] for r in rows[1:]]
+        print(f"ledger {group['_id']['user'].id} key={group['_id']['key']!r}: keep {rows[0]['_id']}, drop {len(extra)}")
+        if not dry_run:
+            # Reset first: a rerun after a crash finds the duplicates again and repeats both steps
+            await reset_rollups(db, group["_id"]["user"].id)
+            await ledger.delete_many({"_id": {"$in": extra}})
+        deleted += len(extra)
+    return deleted
+
+
+async def reset_rollups(db: AsyncIOMotorDatabase, user_id) -> None:
+    """Drop a user's rollups and queue their entries for the backfill (re-enabled for the next startup)."""
+    await db[LEDGER].update_many(
+        {"user": DBRef("users", user_id)}, {"$set": {"rolled_up": False}, "$unset": {"rollup_batch": ""}}
+    )
+    await db[ROLLUPS].delete_many({"user_id": user_id})
+    await db[LEASES].delete_one({"_id": "credit_rollups_backfill"})
+
+
+async def rebuild_balances(db: AsyncIOMotorDatabase, dry_run: bool = False) -> int:
+    """Recompute every user's balance from the ledger into one document. Returns users changed."""
+    ledger, balances = db[LEDGER], db[BALANCES]
+    totals: dict = {}
+    async for row in ledger.aggregate(
+        [
+            {"$match": {"status": {"$ne": "pending"}}},
+            {"$group": {"_id": "$user", "total": {"$sum": "$amount"}}},
+        ],
+        allowDiskUse=True,
+    ):
+        totals[row["_id"].id] = row["total"]
+    docs: dict = {}
+    async for doc in balances.find({}, {"user": 1, "balance": 1, "version": 1}):
+        docs.setdefault(doc["user"].id, []).append(doc)
+    changed = 0
+    for user_id in totals.keys() | docs.keys():
+        total = totals.get(user_id, 0)
+        current = docs.get(user_id, [])
+        if len(current) == 1 and current[0]["_id"] == user_id and current[0].get("balance") == total:
+            continue
+        print(f"balance {user_id}: {[d.get('balance') for d in current]} -> {total}")
+        changed += 1
+        if dry_run:
+            continue
+        # A higher version makes every balance cache layer replace what it holds for this user
+        version = max((d.get("version", 0) for d in current), default=0) + 1
+        await balances.replace_one(
+            {"_id": user_id},
+            {"user": DBRef("users", user_id), "balance": total, "version": version, "applied_entries": []},
+            upsert=True,
+        )
+        await balances.delete_many({"user": DBRef("users", user_id), "_id": {"$ne": user_id}})
+        from app.services import balance_cache
+        await balance_cache.invalidate(user_id)
+    return changed
+
+
+async def migrate(db: AsyncIOMotorDatabase, dry_run: bool = False) -> tuple[int, int]:
+    deleted = await dedupe_ledger_keys(db, dry_run)
+    changed = await rebuild_balances(db, dry_run)
+    return deleted, changed
+
+
+async def main() -> None:
+    from app.db.init import get_database
+    dry_run = "--dry-run" in sys.argv[1:]
+    deleted, changed = await migrate(get_database(), dry_run)
+    prefix = "would " if dry_run else ""
+    print(f"{prefix}delete {deleted} duplicate ledger entries; {prefix}rewrite {changed} balances")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Credit balance cache: versioned L1 + Redis compare-and-set, request-scoped memo."""
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.services import balance_cache
+from app.services.balance_cache import BalanceCache
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_older_version_never_replaces_newer(redis):
+    user_id = PydanticObjectId()
+    writer = BalanceCache(redis, l1_ttl=60)
+    await writer.put(user_id, 40, 3)
+    # A read-through that loaded version 2 before the charge landed
+    await writer.put(user_id, 50, 2)
+    assert await writer.get(user_id) == (40, 3)
+    assert await BalanceCache(redis, l1_ttl=60).get(user_id) == (40, 3)
+    await writer.put(user_id, 39, 4)
+    assert await BalanceCache(redis, l1_ttl=60).get(user_id) == (39, 4)
+
+
+@pytest.mark.asyncio
+async def test_l1_expires_to_redis(redis):
+    user_id = PydanticObjectId()
+    reader = BalanceCache(redis, l1_ttl=0)
+    await BalanceCache(redis).put(user_id, 10, 1)
+    assert await reader.get(user_id) == (10, 1)
+    # Another process charges: with no L1 the next read sees it immediately
+    await BalanceCache(redis).put(user_id, 9, 2)
+    assert await reader.get(user_id) == (9, 2)
+    await reader.invalidate(user_id)
+    assert await reader.get(user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_fails_open_when_redis_errors():
+    class _Broken:
+        async def hmget(self, *args):
+            raise ConnectionError("down")
+
+        def register_script(self, script):
+            async def _run(**kwargs):
+                raise ConnectionError("down")
+            return _run
+
+    cache = BalanceCache(_Broken(), l1_ttl=0)
+    user_id = PydanticObjectId()
+    await cache.put(user_id, 5, 1)
+    assert await cache.get(user_id) is None
+
+
+def test_request_memo_is_scoped():
+    user_id = PydanticObjectId()
+    balance_cache.memoize(user_id, 10, 1)
+    assert balance_cache.get_memoized(user_id) is None
+    token = balance_cache.begin_request_scope()
+    try:
+        balance_cache.memoize(user_id, 10, 1)
+        balance_cache.memoize(user_id, 12, 0)
+        assert balance_cache.get_memoized(user_id) == (10, 1)
+        balance_cache.memoize(user_id, 9, 2)
+        assert balance_cache.get_memoized(user_id) == (9, 2)
+    finally:
+        balance_cache.end_request_scope(token)
+    assert balance_cache.get_memoized(user_id) is None
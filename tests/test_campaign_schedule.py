@@ -0,0 +1,47 @@
+"""Background scheduling of a campaign (test DB, app-password account: no Gmail calls)."""
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_scheduling_keeps_sends_counted_while_it_ran(monkeypatch):
+    from app.db.init import init_db
+    from app.models.campaign import Campaign
+    from app.models.gmail_account import GmailAccount
+    from app.models.recipient_item import RecipientItem
+    from app.models.recipient_list import RecipientList
+    from app.models.scheduled_email import ScheduledEmail
+    from app.models.template import Template
+    from app.models.user import User
+    from app.services import campaigns
+    await init_db()
+    user = User(google_sub="schedule-inc", email="schedule-inc@example.com", name="Schedule")
+    await user.insert()
+    template = Template(user=user, name="t", subject="Hello", body_html="<p>Hi</p>")
+    await template.insert()
+    rlist = RecipientList(user=user, name="leads", storage_path="lists/leads.csv", status="ready")
+    await rlist.insert()
+    await RecipientItem.insert_many([RecipientItem(list=rlist, email=f"p{i}@acme.com", domain="acme.com") for i in range(3)])
+    await GmailAccount(user=user, email="me@example.com", auth_type="app_password").insert()
+    campaign = Campaign(
+        user=user, name="c", template=template, recipient_list_id=str(rlist.id),
+        scheduling_status="in_progress", scheduling_total=3,
+    )
+    await campaign.insert()
+
+    real_pages = campaigns.iter_sendable_pages
+
+    async def _pages_while_sending(*args, **kwargs):
+        # The send cycle counts earlier drafts of this campaign while scheduling is still running
+        await Campaign.find_one(Campaign.id == campaign.id).update({"$inc": {"sent_count": 2, "failed_count": 1}})
+        async for page in real_pages(*args, **kwargs):
+            yield page
+
+    monkeypatch.setattr(campaigns, "iter_sendable_pages", _pages_while_sending)
+    await campaigns.run_schedule_campaign_background(str(campaign.id), str(user.id), "schedule-inc-key")
+
+    done = await Campaign.get(campaign.id)
+    assert (done.scheduling_status, done.status, done.scheduled_count) == ("completed", "scheduled", 3)
+    assert (done.sent_count, done.failed_count) == (2, 1)
+    assert await ScheduledEmail.find(ScheduledEmail.campaign.id == campaign.id).count() == 3
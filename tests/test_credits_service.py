@@ -36,3 +36,226 @@ async def test_apply_ledger_entry():
     )
     assert balance2 == 100
     assert entry.id == entry2.id
+
+
+async def test_parallel_charges_no_lost_updates():
+    import asyncio
+
+    from app.core.exceptions import BadRequestError
+    from app.db.init import init_db
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.user import User
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub=f"test-sub-{asyncio.get_running_loop().time()}", email="race@example.com", name="Race")
+    await user.insert()
+    await credits_service.apply_ledger_entry(user.id, 50, "purchase")
+    results = await asyncio.gather(
+        *(credits_service.apply_ledger_entry(user.id, -1, "verify") for _ in range(100)),
+        return_exceptions=True,
+    )
+    charged = [r for r in results if not isinstance(r, BaseException)]
+    assert all(isinstance(r, BadRequestError) for r in results if isinstance(r, BaseException))
+    # Exactly the covered charges succeed, each sees a distinct balance, nothing is lost or overdrawn
+    assert len(charged) == 50
+    assert sorted(balance for _, balance in charged) == list(range(50))
+    assert await credits_service.get_balance(user.id) == 0
+    entries = await CreditLedgerEntry.find(CreditLedgerEntry.user.id == user.id).to_list()
+    assert len(entries) == 51
+    assert all(e.status == "applied" for e in entries)
+
+
+async def test_parallel_retries_apply_once():
+    import asyncio
+
+    from app.db.init import init_db
+    from app.models.user import User
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub=f"test-sub-{asyncio.get_running_loop().time()}", email="retry@example.com", name="Retry")
+    await user.insert()
+    results = await asyncio.gather(
+        *(credits_service.apply_ledger_entry(user.id, 10, "purchase", idempotency_key="pay-1") for _ in range(100))
+    )
+    assert len({entry.id for entry, _ in results}) == 1
+    assert await credits_service.get_balance(user.id) == 10
+
+
+async def test_rollups_and_ledger_pages():
+    import asyncio
+
+    from app.db.init import init_db
+    from app.models.user import User
+    from app.services import credit_rollups
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub=f"test-sub-{asyncio.get_running_loop().time()}", email="pages@example.com", name="Pages")
+    await user.insert()
+    await credits_service.apply_ledger_entry(user.id, 100, "purchase")
+    for i in range(4):
+        await credits_service.apply_ledger_entry(user.id, 25, "referral", idempotency_key=f"ref-{i}")
+    for _ in range(3):
+        await credits_service.apply_ledger_entry(user.id, -1, "verify")
+    assert await credit_rollups.get_total(user.id, "referral") == 100
+    summary = {r.reason: (r.total, r.entries) for r in await credit_rollups.get_summary(user.id)}
+    assert summary == {"purchase": (100, 1), "referral": (100, 4), "verify": (-3, 3)}
+    seen, after = [], None
+    while True:
+        page = await credits_service.list_ledger(user.id, limit=3, after=after)
+        seen.extend(page)
+        if len(page) < 3:
+            break
+        after = credits_service.ledger_cursor(page[-1])
+    assert len({e.id for e in seen}) == 8
+    assert [e.balance_after for e in seen] == [197, 198, 199, 200, 175, 150, 125, 100]
+
+
+async def test_key_released_by_insufficient_attempt_is_not_a_server_error(monkeypatch):
+    from pymongo.errors import DuplicateKeyError
+
+    from app.core.exceptions import BadRequestError
+    from app.db.init import init_db
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.user import User
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub="test-sub-race", email="race@example.com", name="Race")
+    await user.insert()
+
+    # The first attempt with this key holds its pending entry on every insert and deletes it in between
+    async def _key_taken(self, *args, **kwargs):
+        raise DuplicateKeyError("E11000 duplicate key")
+
+    monkeypatch.setattr(CreditLedgerEntry, "insert", _key_taken)
+    with pytest.raises(BadRequestError, match="Insufficient credits"):
+        await credits_service.apply_ledger_entry(user.id, -5, "verify", idempotency_key="race-1")
+
+
+async def test_migration_dedupes_keys_and_rebuilds_one_balance_per_user():
+    from bson import DBRef
+
+    from app.db.init import init_db
+    from app.models.credit_balance import CreditBalance
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.user import User
+    from app.services import credits as credits_service
+    from scripts.migrate_credit_balances import migrate
+    await init_db()
+    user = User(google_sub="test-sub-migrate", email="migrate@example.com", name="Migrate")
+    await user.insert()
+    ledger = CreditLedgerEntry.get_motor_collection()
+    await ledger.drop_indexes()
+    ref = DBRef("users", user.id)
+    # A retried purchase applied twice, and a legacy second balance document
+    await ledger.insert_many([
+        {"user": ref, "amount": 50, "balance_after": 50, "reason": "purchase", "idempotency_key": "pay-1", "status": "applied"},
+        {"user": ref, "amount": 50, "balance_after": 100, "reason": "purchase", "idempotency_key": "pay-1", "status": "applied"},
+        {"user": ref, "amount": -3, "balance_after": 97, "reason": "verify", "status": "applied"},
+        {"user": ref, "amount": -1, "balance_after": 0, "reason": "verify", "status": "pending"},
+    ])
+    balances = CreditBalance.get_motor_collection()
+    await balances.insert_many([{"user": ref, "balance": 97, "version": 4}, {"user": ref, "balance": 10}])
+
+    assert await migrate(ledger.database, dry_run=True) == (1, 1)
+    assert await ledger.count_documents({"user": ref}) == 4
+    assert await migrate(ledger.database) == (1, 1)
+
+    assert await ledger.count_documents({"user": ref, "idempotency_key": "pay-1"}) == 1
+    docs = await balances.find({"user": ref}).to_list(None)
+    assert [(d["_id"], d["balance"], d["version"]) for d in docs] == [(user.id, 47, 5)]
+    assert await credits_service.get_balance(user.id) == 47
+    # Rollups counted the dropped entry: rebuilt by the next backfill
+    assert await ledger.count_documents({"user": ref, "rolled_up": True}) == 0
+    assert await migrate(ledger.database) == (0, 0)
+
+
+async def test_replayed_entry_is_rolled_up_once():
+    from app.db.init import init_db
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.user import User
+    from app.services import credit_rollups
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub="test-sub-replay", email="replay@example.com", name="Replay")
+    await user.insert()
+    entry, _ = await credits_service.apply_ledger_entry(user.id, 30, "purchase", idempotency_key="pay-replay")
+    # Crash after the rollup increment, before pending -> applied
+    await CreditLedgerEntry.get_motor_collection().update_one(
+        {"_id": entry.id}, {"$set": {"status": "pending", "rolled_up": False}}
+    )
+    assert await credits_service.recover_pending_entries(older_than_seconds=-1) == 1
+    assert await credits_service.get_balance(user.id) == 30
+    summary = {(r.reason, r.total, r.entries) for r in await credit_rollups.get_summary(user.id)}
+    assert summary == {("purchase", 30, 1)}
+
+
+async def test_backfill_finishes_interrupted_batches_once_under_lease():
+    from datetime import datetime, timedelta
+
+    from beanie import PydanticObjectId
+    from bson import DBRef
+
+    from app.db.init import init_db
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.lease import Lease
+    from app.models.user import User
+    from app.services import credit_rollups
+    await init_db()
+    user = User(google_sub="test-sub-backfill", email="backfill@example.com", name="Backfill")
+    await user.insert()
+    ledger = CreditLedgerEntry.get_motor_collection()
+    ref = DBRef("users", user.id)
+    at = datetime(2025, 3, 5)
+    counted, stamped = PydanticObjectId(), PydanticObjectId()
+    # Entries from before rollups: one batch counted but not flagged, one stamped only, one untouched
+    await ledger.insert_many([
+        {"user": ref, "amount": 10, "balance_after": 10, "reason": "purchase", "status": "applied", "created_at": at, "rollup_batch": counted},
+        {"user": ref, "amount": 20, "balance_after": 30, "reason": "purchase", "status": "applied", "created_at": at, "rollup_batch": stamped},
+        {"user": ref, "amount": -5, "balance_after": 25, "reason": "verify", "status": "applied", "created_at": at},
+    ])
+    await credit_rollups._apply_increments(credit_rollups._increments(counted, user.id, "purchase", "2025-03", 10, 1))
+    # Another worker holds an unexpired lease
+    await Lease(id=credit_rollups.BACKFILL_LEASE, owner="other", expires_at=datetime.utcnow() + timedelta(minutes=5)).insert()
+    await credit_rollups.backfill_rollups_once(owner="me")
+    assert await ledger.count_documents({"user": ref, "rolled_up": True}) == 0
+
+    # Its worker crashed: the lease lapses and the next startup takes over
+    await Lease.get_motor_collection().update_one(
+        {"_id": credit_rollups.BACKFILL_LEASE}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    await credit_rollups.backfill_rollups_once(owner="me")
+    assert await ledger.count_documents({"user": ref, "rolled_up": True}) == 3
+    assert await credit_rollups.get_total(user.id, "purchase") == 30
+    assert await credit_rollups.get_total(user.id, "purchase", "2025-03") == 30
+    assert await credit_rollups.get_total(user.id, "verify") == -5
+    lease = await Lease.get(credit_rollups.BACKFILL_LEASE)
+    assert lease.done and lease.owner is None
+    # Done: later startups do not scan the ledger again
+    await credit_rollups.backfill_rollups_once(owner="later")
+    assert (await Lease.get(credit_rollups.BACKFILL_LEASE)).owner is None
+
+
+async def test_worker_startup_runs_backfill_in_background(monkeypatch):
+    import asyncio
+
+    from app.models.lease import Lease
+    from app.services import credit_rollups
+    from app.worker import tasks
+    started = asyncio.Event()
+
+    async def _slow_backfill(lease_owner=None):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(credit_rollups, "backfill_rollups", _slow_backfill)
+    monkeypatch.setattr(tasks.get_settings(), "send_loop_enabled", False)
+    monkeypatch.setattr(tasks.get_settings(), "worker_metrics_port", 0)
+    ctx: dict = {}
+    # Returns while the backfill is still scanning
+    await asyncio.wait_for(tasks.startup(ctx), timeout=5)
+    await asyncio.wait_for(started.wait(), timeout=5)
+    await tasks.shutdown(ctx)
+    with pytest.raises(asyncio.CancelledError):
+        await ctx["rollup_backfill_task"]
+    lease = await Lease.get(credit_rollups.BACKFILL_LEASE)
+    assert lease.owner is None and not lease.done
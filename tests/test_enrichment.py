@@ -0,0 +1,19 @@
+"""Role address choice for enrichment (no DB)."""
+
+from app.services.enrichment import RoleAddressIndex
+
+
+def test_pick_prefers_system_then_verified_then_first_not_invalid():
+    pick = RoleAddressIndex._pick
+    assert pick("acme.com", ["jane@acme.com", "hr@acme.com"], {}) == ("hr@acme.com", "hr", True)
+    assert pick("acme.com", ["jane@acme.com"], {}) == ("jane@acme.com", "system", True)
+    verdicts = {"careers@acme.com": "invalid", "talent@acme.com": "valid"}
+    assert pick("acme.com", [], verdicts) == ("talent@acme.com", "talent", True)
+    assert pick("acme.com", [], {"careers@acme.com": "disposable"}) == ("hr@acme.com", "hr", False)
+    assert pick("acme.com", [], {}) == ("careers@acme.com", "careers", False)
+
+
+def test_choose_falls_back_to_generated_for_unloaded_domains():
+    index = RoleAddressIndex()
+    assert index.choose("Jane@Example.com", "") == ("careers@example.com", "careers", False)
+    assert index.choose("not-an-email", "") == ("not-an-email", "", False)
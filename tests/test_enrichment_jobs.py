@@ -0,0 +1,108 @@
+"""Batched enrichment: ownership, order, chosen_email writes, async threshold, job resume (test DB)."""
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _list_with_items(sub: str, emails: list[str]):
+    from app.models.recipient_item import RecipientItem
+    from app.models.recipient_list import RecipientList
+    from app.models.user import User
+    user = User(google_sub=sub, email=f"{sub}@example.com", name=sub)
+    await user.insert()
+    rlist = RecipientList(user=user, name=sub, storage_path=f"lists/{sub}.csv", status="ready")
+    await rlist.insert()
+    items = [RecipientItem(list=rlist, email=e, domain=e.split("@", 1)[1]) for e in emails]
+    await RecipientItem.insert_many(items)
+    items = await RecipientItem.find(RecipientItem.list.id == rlist.id).sort(+RecipientItem.id).to_list()
+    return user, items
+
+
+async def test_enrich_items_skips_foreign_items_and_keeps_request_order():
+    from beanie import PydanticObjectId
+
+    from app.db.init import init_db
+    from app.models.recipient_item import RecipientItem
+    from app.services import enrichment
+    await init_db()
+    owner, (a1, a2) = await _list_with_items("enrich-owner", ["jane@acme.com", "joe@globex.com"])
+    _, (foreign,) = await _list_with_items("enrich-other", ["ann@initech.com"])
+
+    results = await enrichment.enrich_items(owner.id, [a2.id, foreign.id, a1.id, a2.id, PydanticObjectId()])
+
+    assert [(r.recipient_item.ref.id, r.chosen_email) for r in results] == [
+        (a2.id, "careers@globex.com"),
+        (a1.id, "careers@acme.com"),
+    ]
+    chosen = {i.id: i.chosen_email for i in await RecipientItem.find_all().to_list()}
+    assert chosen[a1.id] == "careers@acme.com"
+    assert chosen[a2.id] == "careers@globex.com"
+    assert chosen[foreign.id] is None
+
+
+async def test_bulk_over_threshold_returns_202_with_queued_job(client, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.init import init_db
+    from app.deps import get_current_user
+    from app.main import app
+    from app.worker import tasks
+    await init_db()
+    user, items = await _list_with_items("enrich-async", [f"p{i}@acme.com" for i in range(3)])
+    queued: list[str] = []
+
+    async def _enqueue(job_id: str) -> None:
+        queued.append(job_id)
+
+    monkeypatch.setattr(tasks, "enqueue_enrich_bulk", _enqueue)
+    monkeypatch.setattr(get_settings(), "enrich_async_threshold", 2)
+    monkeypatch.setattr(get_settings(), "run_enrichment_in_process", False)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        resp = await client.post("/v1/enrich/bulk", json={"recipient_item_ids": [str(i.id) for i in items]})
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert resp.status_code == 202
+    body = resp.json()
+    assert (body["status"], body["total"]) == ("queued", 3)
+    assert queued == [body["job_id"]]
+
+
+async def test_job_resumes_after_last_chunk_and_stays_running_when_interrupted(monkeypatch):
+    from app.db.init import init_db
+    from app.models.enrichment_job import EnrichmentJob
+    from app.models.enrichment_result import EnrichmentResult
+    from app.models.recipient_item import RecipientItem
+    from app.services import enrichment
+    await init_db()
+    user, items = await _list_with_items("enrich-resume", [f"p{i}@acme.com" for i in range(4)])
+    job = EnrichmentJob(
+        user=user, recipient_item_ids=[i.id for i in items], total=4, chunk_size=2,
+        status="running", chunks_done=1, processed_count=2, enriched_count=2,
+    )
+    await job.insert()
+    # Written by the interrupted attempt before it could commit chunk 1
+    stale = EnrichmentResult(user=user, recipient_item=items[2], chosen_email="stale@acme.com", job_id=job.id, job_chunk=1)
+    await stale.insert()
+
+    real_enrich_items = enrichment.enrich_items
+
+    async def _crash(*args, **kwargs):
+        raise ConnectionError("mongo went away")
+
+    monkeypatch.setattr(enrichment, "enrich_items", _crash)
+    with pytest.raises(ConnectionError):
+        await enrichment.run_enrichment_job(str(job.id), final_attempt=False)
+    assert (await EnrichmentJob.get(job.id)).status == "running"
+
+    monkeypatch.setattr(enrichment, "enrich_items", real_enrich_items)
+    await enrichment.run_enrichment_job(str(job.id))
+
+    done = await EnrichmentJob.get(job.id)
+    assert (done.status, done.chunks_done, done.processed_count, done.enriched_count) == ("completed", 2, 4, 4)
+    results = await EnrichmentResult.find(EnrichmentResult.job_id == job.id).to_list()
+    assert sorted(r.recipient_item.ref.id for r in results) == [items[2].id, items[3].id]
+    assert "stale@acme.com" not in {r.chosen_email for r in results}
+    # Chunk 0 belonged to the earlier attempt: its items are not rewritten
+    assert (await RecipientItem.get(items[0].id)).chosen_email is None
@@ -0,0 +1,114 @@
+"""Gmail batch drafts/sends: which failures are retried, and the draft recheck for ambiguous sends."""
+
+from types import SimpleNamespace
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from app.services import gmail
+
+
+def _http_error(status: int) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class _FakeGmail:
+    """Batched calls answer from `outcomes` (per key, per attempt); drafts.get from `existing`."""
+
+    def __init__(self, outcomes: dict[str, list], existing: set[str]) -> None:
+        self.outcomes = outcomes
+        self.existing = existing
+        self.calls: list[str] = []
+
+    def users(self):
+        return self
+
+    def drafts(self):
+        return self
+
+    def create(self, body, **kwargs):
+        return ("create", None)
+
+    def send(self, body, **kwargs):
+        return ("send", body["id"])
+
+    def get(self, id, **kwargs):
+        return ("get", id)
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    service = _FakeGmail({}, set())
+    def _new_batch(callback):
+        batch = SimpleNamespace(callback=callback, requests=[])
+        batch.add = lambda req, request_id: batch.requests.append((request_id, req))
+        return batch
+
+    service.new_batch_http_request = _new_batch
+
+    async def _token(account):
+        return "token"
+
+    async def _execute_batch(batch, token):
+        for request_id, (_, draft_id) in batch.requests:
+            service.calls.append(request_id)
+            outcome = service.outcomes[request_id].pop(0)
+            if isinstance(outcome, Exception):
+                batch.callback(request_id, None, outcome)
+            else:
+                service.existing.discard(draft_id)
+                batch.callback(request_id, {"id": outcome}, None)
+
+    async def _execute(request):
+        _, draft_id = request
+        if draft_id not in service.existing:
+            raise _http_error(404)
+        return {"id": draft_id}
+
+    async def _no_sleep(seconds):
+        return None
+
+    monkeypatch.setattr(gmail, "get_valid_access_token", _token)
+    monkeypatch.setattr(gmail, "get_gmail_service", lambda account_id, token: service)
+    monkeypatch.setattr(gmail, "execute_batch", _execute_batch)
+    monkeypatch.setattr(gmail, "execute", _execute)
+    monkeypatch.setattr(gmail.asyncio, "sleep", _no_sleep)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_send_retries_rate_limit_and_rechecks_server_errors(fake):
+    account = SimpleNamespace(id="acc")
+    fake.outcomes = {
+        "d-429": [_http_error(429), "m-429"],
+        # 503 and the draft is gone: sent or deleted by the user, not resent and not counted as sent
+        "d-gone": [_http_error(503)],
+        # 503 and the draft is still there: not sent, safe to resend
+        "d-unsent": [_http_error(503), "m-unsent"],
+        "d-bad": [_http_error(400)],
+    }
+    fake.existing = {"d-429", "d-unsent", "d-bad"}
+    out = await gmail.send_drafts_batch(account, {k: k for k in fake.outcomes})
+    assert out["d-429"] == "m-429"
+    assert isinstance(out["d-gone"], RuntimeError)
+    assert "missing" in str(out["d-gone"])
+    assert out["d-unsent"] == "m-unsent"
+    assert isinstance(out["d-bad"], HttpError)
+    assert fake.calls.count("d-gone") == 1
+    assert fake.calls.count("d-bad") == 1
+
+
+@pytest.mark.asyncio
+async def test_create_retries_rate_limit_only(fake):
+    account = SimpleNamespace(id="acc", email="me@example.com")
+    fake.outcomes = {
+        "k-429": [_http_error(429), "d-1"],
+        # 503 may have created the draft: not retried, left to the campaign
+        "k-503": [_http_error(503), "d-2"],
+    }
+    messages = {key: ("to@acme.com", "Hello", "<p>Hi</p>") for key in fake.outcomes}
+    out = await gmail.create_drafts_batch(account, messages)
+    assert out["k-429"] == "d-1"
+    assert isinstance(out["k-503"], HttpError)
+    assert fake.calls.count("k-503") == 1
@@ -0,0 +1,128 @@
+"""MX cache and bulk classification with a fake resolver (no network)."""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import dns.exception
+import dns.resolver
+import pytest
+
+from app.services import domain_info, verification
+from app.services.mx_cache import MxCache
+
+
+class _RRset:
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+
+
+class _MX:
+    def __init__(self, preference: int, exchange: str) -> None:
+        self.preference = preference
+        self.exchange = exchange
+
+
+class _Answer:
+    def __init__(self, ttl: int) -> None:
+        self.rrset = _RRset(ttl)
+
+    def __iter__(self):
+        return iter([_MX(20, "alt.mx.example."), _MX(10, "mx.example.")])
+
+
+class FakeResolver:
+    def __init__(self, records: dict[str, object]) -> None:
+        self.records = records
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def resolve(self, domain: str, rdtype: str, lifetime: float | None = None):
+        self.calls.append(domain)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            record = self.records.get(domain, dns.resolver.NXDOMAIN())
+            if isinstance(record, Exception):
+                raise record
+            return _Answer(record)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_each_domain_resolved_once_with_bounded_concurrency():
+    resolver = FakeResolver({f"d{i}.com": 300 for i in range(20)})
+    cache = MxCache(concurrency=4, resolver=resolver)
+    domains = [f"d{i % 20}.com" for i in range(200)] + ["missing.com", "missing.com"]
+    results = await asyncio.gather(*(cache.has_mx(d) for d in domains))
+    assert sum(results) == 200
+    assert sorted(resolver.calls) == sorted([f"d{i}.com" for i in range(20)] + ["missing.com"])
+    assert resolver.max_in_flight <= 4
+
+
+@pytest.mark.asyncio
+async def test_negative_answers_cached_but_timeouts_retried():
+    resolver = FakeResolver({"slow.com": dns.exception.Timeout(), "nomx.com": dns.resolver.NoAnswer()})
+    cache = MxCache(resolver=resolver)
+    for _ in range(2):
+        assert await cache.has_mx("nomx.com") is False
+        assert await cache.has_mx("slow.com") is False
+    assert resolver.calls.count("nomx.com") == 1
+    assert resolver.calls.count("slow.com") == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_resolved_again():
+    resolver = FakeResolver({"short.com": 1})
+    cache = MxCache(min_ttl=0, resolver=resolver)
+    assert await cache.has_mx("short.com")
+    await asyncio.sleep(1.05)
+    assert await cache.has_mx("short.com")
+    assert resolver.calls == ["short.com", "short.com"]
+
+
+@pytest.mark.asyncio
+async def test_verify_emails_classifies_from_one_lookup_per_domain(monkeypatch):
+    resolver = FakeResolver({"example.com": 300, "mailinator.com": 300})
+    cache = MxCache(resolver=resolver)
+    monkeypatch.setattr(verification, "get_mx_cache", lambda: cache)
+    emails = [f"user{i}@Example.com" for i in range(50)] + ["bad@", "x@mailinator.com", "y@gone.invalid"]
+    outcomes = await verification.verify_emails(emails)
+    assert [o.result for o in outcomes[-4:]] == ["valid", "invalid", "disposable", "unknown"]
+    assert outcomes[0].email == "user0@example.com" and outcomes[0].mx_valid
+    assert sorted(resolver.calls) == ["example.com", "gone.invalid", "mailinator.com"]
+
+
+@pytest.mark.asyncio
+async def test_shared_store_consulted_before_dns_and_filled_after(monkeypatch):
+    stored = {"known.com": SimpleNamespace(has_mx=True, expires_at=datetime.utcnow() + timedelta(hours=1))}
+    saved = []
+
+    async def load_fresh(domains):
+        return {d: stored[d] for d in domains if d in stored}
+
+    async def save_mx_results(rows):
+        saved.extend(rows)
+
+    monkeypatch.setattr(domain_info, "load_fresh", load_fresh)
+    monkeypatch.setattr(domain_info, "save_mx_results", save_mx_results)
+    resolver = FakeResolver({"new.com": 300})
+    cache = MxCache(resolver=resolver, persist=True, store_ttl=86400)
+    assert await cache.resolve_many(["known.com", "new.com", "gone.com"]) == {
+        "known.com": True,
+        "new.com": True,
+        "gone.com": False,
+    }
+    assert sorted(resolver.calls) == ["gone.com", "new.com"]
+    assert sorted(saved) == [("gone.com", False, [], 300.0), ("new.com", True, ["mx.example", "alt.mx.example"], 86400)]
+
+
+def test_disposable_list_loaded_from_bundled_file_with_subdomains():
+    assert len(domain_info.disposable_domains()) > 300
+    assert domain_info.is_disposable_domain("mailinator.com")
+    assert domain_info.is_disposable_domain("inbox.Mailinator.com")
+    assert not domain_info.is_disposable_domain("example.com")
+    assert not domain_info.is_disposable_domain("com")
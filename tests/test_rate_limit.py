@@ -0,0 +1,69 @@
+"""Redis token bucket + daily quota (Lua script) against fakeredis."""
+
+import pytest
+
+from app.services.rate_limit import return_send_tokens, take_send_tokens, take_tokens
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_bucket_grants_burst_then_partial(redis):
+    grant = await take_tokens(redis, "b:1", 3, per_second=1, capacity=5, now_ms=0)
+    assert grant.granted == 3 and grant.retry_after_seconds is None
+    grant = await take_tokens(redis, "b:1", 4, per_second=1, capacity=5, now_ms=0)
+    assert grant.granted == 2
+    assert grant.retry_after_seconds == pytest.approx(1.0)
+    assert not grant.daily_exhausted
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time(redis):
+    await take_tokens(redis, "b:1", 5, per_second=2, capacity=5, now_ms=0)
+    grant = await take_tokens(redis, "b:1", 5, per_second=2, capacity=5, now_ms=1500)
+    assert grant.granted == 3
+    # Refill is capped at capacity
+    grant = await take_tokens(redis, "b:1", 10, per_second=2, capacity=5, now_ms=60_000)
+    assert grant.granted == 5
+
+
+@pytest.mark.asyncio
+async def test_daily_quota_is_shared_and_exhausts(redis):
+    kwargs = dict(per_second=100, capacity=100, daily_key="d:1", daily_cap=4, now_ms=0)
+    assert (await take_tokens(redis, "b:1", 3, **kwargs)).granted == 3
+    # Another bucket (e.g. another worker's view) still counts against the same daily key
+    grant = await take_tokens(redis, "b:2", 3, **kwargs)
+    assert grant.granted == 1
+    assert grant.daily_exhausted and grant.retry_after_seconds is None
+    assert await redis.get("d:1") == "4"
+    assert (await take_tokens(redis, "b:1", 1, **kwargs)).granted == 0
+
+
+@pytest.mark.asyncio
+async def test_fails_open_when_redis_errors():
+    class _Broken:
+        def register_script(self, _):
+            async def _call(**_):
+                raise ConnectionError("down")
+            return _call
+
+    grant = await take_tokens(_Broken(), "b:1", 7, per_second=1, capacity=1)
+    assert grant.granted == 7
+
+
+@pytest.mark.asyncio
+async def test_failed_sends_return_their_tokens(redis, monkeypatch):
+    monkeypatch.setattr("app.services.rate_limit.gmail_daily_cap", lambda: 5)
+    assert (await take_send_tokens(redis, "acc", 5, daily_limit=5)).granted == 5
+    assert (await take_send_tokens(redis, "acc", 1, daily_limit=5)).daily_exhausted
+    # 3 of the 5 sends failed: their quota is usable again, and never refunded below zero
+    await return_send_tokens(redis, "acc", 3)
+    assert (await take_send_tokens(redis, "acc", 5, daily_limit=5)).granted == 3
+    await return_send_tokens(redis, "acc", 50)
+    assert (await take_send_tokens(redis, "acc", 10, daily_limit=5)).granted == 5
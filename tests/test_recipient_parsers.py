@@ -0,0 +1,67 @@
+"""Streaming CSV/XLSX parsers for recipient list uploads (no DB)."""
+
+import io
+
+import openpyxl
+import pytest
+
+from app.services.recipients import (
+    _body_size,
+    infer_schema,
+    iter_csv_rows,
+    iter_row_batches,
+    iter_xlsx_rows,
+    prepare_row_batch,
+)
+
+
+def test_iter_csv_rows_decodes_incrementally():
+    data = "email,name\n" + "".join(f"user{i}@example.com,Zoë {i}\n" for i in range(5000))
+    rows = iter_csv_rows(io.BytesIO(data.encode()))
+    first = next(rows)
+    assert first == {"email": "user0@example.com", "name": "Zoë 0"}
+    assert sum(1 for _ in rows) == 4999
+
+
+def test_iter_xlsx_rows_skips_blank_rows_and_names_missing_headers():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["email", None])
+    ws.append(["a@example.com", "Acme"])
+    ws.append([None, None])
+    ws.append(["b@example.com", None])
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    assert list(iter_xlsx_rows(buf)) == [
+        {"email": "a@example.com", "col1": "Acme"},
+        {"email": "b@example.com", "col1": None},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_row_batches_pulls_fixed_size_batches():
+    rows = iter_csv_rows(io.BytesIO(("email\n" + "x@example.com\n" * 2500).encode()))
+    sizes = [len(batch) async for batch in iter_row_batches(rows, 1000)]
+    assert sizes == [1000, 1000, 500]
+
+
+def test_infer_schema_picks_column_with_emails_and_prepare_row_batch_dedupes():
+    rows = [
+        {"id": "1", "Contact": " A@Example.com", "Name": "A", "Company": "Acme"},
+        {"id": "2", "Contact": "not-an-email", "Name": "B", "Company": "Acme", "alt": "b@example.com"},
+        {"id": "3", "Contact": "a@example.com", "Name": "C", "Company": "Acme"},
+    ]
+    schema = infer_schema(rows)
+    assert schema.describe() == {"email_column": "Contact", "name_columns": ["Name"], "company_columns": ["Company"]}
+    candidates, counts = prepare_row_batch(rows, schema, first_row_index=10)
+    assert {email: idx for email, (_, idx) in candidates.items()} == {"a@example.com": 10, "b@example.com": 11}
+    assert counts["duplicate"] == 1 and counts["invalid"] == 0
+
+
+def test_body_size_measures_bytes_and_seekable_uploads_without_moving_them():
+    assert _body_size(b"email\n") == 6
+    body = io.BytesIO(b"email\na@example.com\n")
+    body.read(2)
+    assert _body_size(body) == 18
+    assert body.tell() == 2
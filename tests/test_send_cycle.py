@@ -0,0 +1,81 @@
+"""One send cycle (send_due_page): deferred pages and send token refunds (test DB, fake Redis)."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    from app.worker import cron
+    r = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(cron, "get_redis", lambda: r)
+    return r
+
+
+async def _due_drafts(sub: str, count: int, daily_send_limit: int = 500):
+    from app.db.init import init_db
+    from app.models.campaign import Campaign
+    from app.models.gmail_account import GmailAccount
+    from app.models.scheduled_email import ScheduledEmail
+    from app.models.template import Template
+    from app.models.user import User
+    await init_db()
+    user = User(google_sub=sub, email=f"{sub}@example.com", name=sub)
+    await user.insert()
+    template = Template(user=user, name="t", subject="Hello", body_html="<p>Hi</p>")
+    await template.insert()
+    campaign = Campaign(user=user, name=sub, template=template, status="scheduled")
+    await campaign.insert()
+    account = GmailAccount(user=user, email=f"{sub}@gmail.com", daily_send_limit=daily_send_limit)
+    await account.insert()
+    due = datetime.now(timezone.utc) - timedelta(minutes=1)
+    await ScheduledEmail.insert_many([
+        ScheduledEmail(
+            campaign=campaign, gmail_account=account, recipient_email=f"r{i}@acme.com", recipient_item_id=f"item-{i}",
+            subject="Hello", body_html="<p>Hi</p>", send_at=due, status="drafted", gmail_draft_id=f"d{i}",
+        )
+        for i in range(count)
+    ])
+    return campaign, account
+
+
+async def test_page_with_every_row_deferred_completes(redis, monkeypatch):
+    from app.models.campaign import Campaign
+    from app.models.scheduled_email import ScheduledEmail
+    from app.services.rate_limit import TokenGrant
+    from app.worker import cron
+    campaign, _ = await _due_drafts("cycle-deferred", 2)
+
+    async def _over_quota(*args, **kwargs):
+        return TokenGrant(0, None, daily_exhausted=True)
+
+    monkeypatch.setattr(cron, "take_send_tokens", _over_quota)
+    assert await cron.send_due_page() == 2
+
+    rows = await ScheduledEmail.find(ScheduledEmail.campaign.id == campaign.id).to_list()
+    assert {r.status for r in rows} == {"drafted"}
+    assert all(r.send_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) for r in rows)
+    assert (await Campaign.get(campaign.id)).sent_count == 0
+
+
+async def test_account_error_returns_send_tokens(redis, monkeypatch):
+    from app.models.scheduled_email import ScheduledEmail
+    from app.services.rate_limit import take_send_tokens
+    from app.worker import cron
+    campaign, account = await _due_drafts("cycle-account-error", 3, daily_send_limit=3)
+
+    async def _broken_batch(account, drafts):
+        return None  # not a result mapping: fails the whole account, not one email
+
+    monkeypatch.setattr(cron, "send_drafts_batch", _broken_batch)
+    assert await cron.send_due_page() == 3
+
+    rows = await ScheduledEmail.find(ScheduledEmail.campaign.id == campaign.id).to_list()
+    assert {r.status for r in rows} == {"failed"}
+    # The day's quota of 3 is available again
+    assert (await take_send_tokens(redis, str(account.id), 3, daily_limit=3)).granted == 3
@@ -0,0 +1,96 @@
+"""SMTP session pool against a local aiosmtpd server (no TLS, accept-all AUTH)."""
+
+import smtplib
+import socket
+
+import pytest
+
+from app.services.smtp_pool import SmtpSessionPool, build_message
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+
+class _Handler:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+        self.fail_next_with: str | None = None
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        if self.fail_next_with:
+            reply, self.fail_next_with = self.fail_next_with, None
+            return reply
+        self.messages.append(envelope.content.decode())
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = _Handler()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=_free_port(),
+        authenticator=lambda *args: AuthResult(success=True),
+        auth_require_tls=False,
+    )
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def _pool(controller, **kwargs) -> SmtpSessionPool:
+    return SmtpSessionPool(controller.hostname, controller.port, starttls=False, **kwargs)
+
+
+def _send(pool: SmtpSessionPool, to: str) -> None:
+    pool.send("me@example.com", "app-password", to, build_message("me@example.com", to, "Hi", "<p>Hi</p>"))
+
+
+def test_reuses_connection_across_messages(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+    for i in range(5):
+        _send(pool, f"r{i}@example.com")
+    pool.close_all()
+    assert len(handler.messages) == 5
+    assert pool.connections_opened == 1
+
+
+def test_reconnects_after_message_cap(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller, max_messages_per_connection=2)
+    for i in range(5):
+        _send(pool, f"r{i}@example.com")
+    pool.close_all()
+    assert len(handler.messages) == 5
+    assert pool.connections_opened == 3
+
+
+def test_reconnects_on_dropped_connection_and_421(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+    _send(pool, "a@example.com")
+    pool._sessions["me@example.com"].smtp.sock.shutdown(socket.SHUT_RDWR)
+    _send(pool, "b@example.com")
+    handler.fail_next_with = "421 Service not available, closing channel"
+    _send(pool, "c@example.com")
+    pool.close_all()
+    assert len(handler.messages) == 3
+    assert pool.connections_opened == 3
+
+
+def test_permanent_error_is_raised(smtp_server):
+    controller, handler = smtp_server
+    pool = _pool(controller)
+    handler.fail_next_with = "554 Transaction failed"
+    with pytest.raises(smtplib.SMTPDataError):
+        _send(pool, "a@example.com")
+    pool.close_all()
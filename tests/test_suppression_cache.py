@@ -0,0 +1,123 @@
+"""Global suppression cache: Bloom filter (no DB), then version catch-up, rebuild and exact checks (DB)."""
+
+import uuid
+
+import pytest
+
+from app.services.suppression_cache import BloomFilter, GlobalSuppressionCache
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    emails = [f"user{i}@example.com" for i in range(5000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+    assert bloom.count == 5000
+
+
+def test_bloom_filter_false_positive_rate_near_target():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"user{i}@example.com")
+    false_positives = sum(f"other{i}@example.org" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.03
+
+
+def test_bloom_filter_is_compact():
+    bloom = BloomFilter(capacity=1_000_000, error_rate=0.01)
+    # ~9.6 bits per entry at 1%
+    assert len(bloom.bits) < 1_300_000
+
+
+def _email(tag: str) -> str:
+    return f"{tag}-{uuid.uuid4().hex[:12]}@example.com"
+
+
+async def _fresh_cache() -> GlobalSuppressionCache:
+    from app.db.init import init_db
+    await init_db()
+    cache = GlobalSuppressionCache(refresh_seconds=0, full_rebuild_seconds=3600)
+    await cache.refresh(full=True)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_add_suppression_bumps_global_version_only(monkeypatch):
+    from app.models.counter import Counter
+    from app.services import suppression
+    from app.services.suppression_cache import GLOBAL_SUPPRESSION_COUNTER
+    await _fresh_cache()
+    monkeypatch.setattr(suppression, "get_global_suppression_cache", lambda: None)
+    before = await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER)
+    await suppression.add_suppression(_email("user"), user_id="u-1")
+    assert await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER) == before
+    email = _email("global")
+    await suppression.add_suppression(email)
+    assert await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER) == before + 1
+    # Adding it again is a no-op
+    await suppression.add_suppression(email)
+    assert await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_catch_up_sees_entries_added_by_other_processes(monkeypatch):
+    from app.models.counter import Counter
+    from app.services import suppression
+    from app.services.suppression_cache import GLOBAL_SUPPRESSION_COUNTER
+    cache = await _fresh_cache()
+    # Another process adds: our filter is not told directly
+    monkeypatch.setattr(suppression, "get_global_suppression_cache", lambda: None)
+    email = _email("other")
+    await suppression.add_suppression(email)
+    assert not cache.might_contain(email)
+    await cache.ensure_fresh()
+    assert cache.might_contain(email)
+    assert cache.version == await Counter.current_value(GLOBAL_SUPPRESSION_COUNTER)
+
+
+@pytest.mark.asyncio
+async def test_late_insert_below_version_converges_within_overlap():
+    from app.models.suppression_entry import SuppressionEntry
+    from app.services.suppression_cache import next_global_version
+    cache = await _fresh_cache()
+    # Writer A takes a seq, writer B takes the next one and inserts first
+    late_seq = await next_global_version()
+    early = _email("early")
+    await SuppressionEntry(email=early, user_id=None, seq=await next_global_version()).insert()
+    await cache.ensure_fresh()
+    assert cache.might_contain(early)
+    # A inserts after the cache already moved past its seq; the counter does not move again
+    late = _email("late")
+    await SuppressionEntry(email=late, user_id=None, seq=late_seq).insert()
+    await cache.ensure_fresh()
+    assert cache.might_contain(late)
+
+
+@pytest.mark.asyncio
+async def test_full_rebuild_drops_removed_entries():
+    from app.models.suppression_entry import SuppressionEntry
+    from app.services.suppression_cache import next_global_version
+    cache = await _fresh_cache()
+    email = _email("removed")
+    entry = SuppressionEntry(email=email, user_id=None, seq=await next_global_version())
+    await entry.insert()
+    await cache.ensure_fresh()
+    assert cache.might_contain(email)
+    await entry.delete()
+    await cache.refresh(full=True)
+    assert not cache.might_contain(email)
+
+
+@pytest.mark.asyncio
+async def test_filter_hits_are_checked_against_the_db(monkeypatch):
+    from app.services import suppression
+    cache = await _fresh_cache()
+    monkeypatch.setattr(suppression, "get_global_suppression_cache", lambda: cache)
+    real = _email("real")
+    await suppression.add_suppression(real)
+    # A Bloom false positive: in the filter, not in the collection
+    ghost = _email("ghost")
+    cache.add_local(ghost)
+    assert cache.might_contain(ghost)
+    assert await suppression.are_suppressed([real, ghost, _email("clean")]) == {real}
@@ -0,0 +1,167 @@
+"""Bulk verification jobs: upfront charge, chunk resume, list cursor, refunds (test DB, fake MX)."""
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+class _AllMx:
+    async def resolve_many(self, domains):
+        return {d: True for d in domains}
+
+
+@pytest.fixture(autouse=True)
+def fake_mx(monkeypatch):
+    from app.services import verification
+    monkeypatch.setattr(verification, "get_mx_cache", lambda: _AllMx())
+
+
+async def _user_with_credits(sub: str, credits: int):
+    from app.db.init import init_db
+    from app.models.user import User
+    from app.services import credits as credits_service
+    await init_db()
+    user = User(google_sub=sub, email=f"{sub}@example.com", name=sub)
+    await user.insert()
+    if credits:
+        await credits_service.apply_ledger_entry(user.id, credits, "purchase", idempotency_key=f"{sub}-topup")
+    return user
+
+
+async def _job(user, **fields):
+    from app.models.verification_job import VerificationJob
+    job = VerificationJob(user=user, **fields)
+    await job.insert()
+    return job
+
+
+async def test_charge_applies_once_per_idempotency_key(monkeypatch):
+    from app.models.credit_ledger import CreditLedgerEntry
+    from app.models.verification_job import VerificationJob
+    from app.services import credits as credits_service
+    from app.services import verification
+    user = await _user_with_credits("verify-charge", 10)
+    emails = [f"u{i}@acme.com" for i in range(4)]
+    job = await _job(user, emails=emails, total=4, chunk_size=2, idempotency_key="bulk-1")
+
+    real_chunk = verification._verify_chunk
+
+    async def _crash(*args, **kwargs):
+        raise ConnectionError("mongo went away")
+
+    monkeypatch.setattr(verification, "_verify_chunk", _crash)
+    with pytest.raises(ConnectionError):
+        await verification.run_verification_job(str(job.id), final_attempt=False)
+    # Interrupted after the charge: left running for the retry, not failed
+    assert (await VerificationJob.get(job.id)).status == "running"
+    # Redelivered as if the status update had been lost: the ledger key stops a second charge
+    await VerificationJob.find_one(VerificationJob.id == job.id).update({"$set": {"status": "queued"}})
+    monkeypatch.setattr(verification, "_verify_chunk", real_chunk)
+    await verification.run_verification_job(str(job.id))
+
+    done = await VerificationJob.get(job.id)
+    assert done.status == "completed"
+    assert done.processed_count == 4
+    assert await credits_service.get_balance(user.id) == 6
+    charges = await CreditLedgerEntry.find(
+        CreditLedgerEntry.user.id == user.id, CreditLedgerEntry.reason == "verify"
+    ).count()
+    assert charges == 1
+
+
+async def test_resume_drops_results_of_uncommitted_chunk():
+    from app.models.email_verification_result import EmailVerificationResult
+    from app.models.verification_job import VerificationJob
+    from app.services import credits as credits_service
+    from app.services import verification
+    user = await _user_with_credits("verify-resume", 4)
+    emails = ["a@acme.com", "b@acme.com", "c@acme.com", "d@acme.com"]
+    job = await _job(user, emails=emails, total=4, chunk_size=2, status="running", chunks_done=1, processed_count=2)
+    kept = EmailVerificationResult(user=user, email="a@acme.com", result="valid", job_id=job.id, metadata={"chunk": 0})
+    stale = EmailVerificationResult(user=user, email="stale@acme.com", result="valid", job_id=job.id, metadata={"chunk": 1})
+    await EmailVerificationResult.insert_many([kept, stale])
+
+    await verification.run_verification_job(str(job.id))
+
+    results = await verification.get_job_results(job.id)
+    assert [(r.email, r.metadata["chunk"]) for r in results] == [
+        ("a@acme.com", 0), ("c@acme.com", 1), ("d@acme.com", 1),
+    ]
+    done = await VerificationJob.get(job.id)
+    assert (done.status, done.chunks_done, done.processed_count) == ("completed", 2, 4)
+    # Already running: resumed without charging again
+    assert await credits_service.get_balance(user.id) == 4
+
+
+async def test_list_mode_advances_last_item_id_and_resumes_after_it():
+    from app.models.recipient_item import RecipientItem
+    from app.models.recipient_list import RecipientList
+    from app.models.verification_job import VerificationJob
+    from app.services import verification
+    user = await _user_with_credits("verify-list", 10)
+    rlist = RecipientList(user=user, name="leads", storage_path="lists/leads.csv", status="ready")
+    await rlist.insert()
+    items = [RecipientItem(list=rlist, email=f"p{i}@acme.com", domain="acme.com") for i in range(5)]
+    await RecipientItem.insert_many(items)
+    items = await RecipientItem.find(RecipientItem.list.id == rlist.id).sort(+RecipientItem.id).to_list()
+
+    # Two items were verified by an earlier attempt; the cursor skips them
+    job = await _job(
+        user, list_id=rlist.id, total=5, chunk_size=2, status="running",
+        chunks_done=1, processed_count=2, last_item_id=items[1].id,
+    )
+    await verification.run_verification_job(str(job.id))
+
+    done = await VerificationJob.get(job.id)
+    assert done.status == "completed"
+    assert done.last_item_id == items[-1].id
+    assert (done.chunks_done, done.processed_count) == (3, 5)
+    results = await verification.get_job_results(job.id)
+    assert [r.email for r in results] == ["p2@acme.com", "p3@acme.com", "p4@acme.com"]
+    statuses = {i.email: i.verification_status for i in await RecipientItem.find(RecipientItem.list.id == rlist.id).to_list()}
+    assert statuses == {"p0@acme.com": "pending", "p1@acme.com": "pending", "p2@acme.com": "valid", "p3@acme.com": "valid", "p4@acme.com": "valid"}
+
+
+async def test_insufficient_balance_fails_job_without_results():
+    from app.models.email_verification_result import EmailVerificationResult
+    from app.models.verification_job import VerificationJob
+    from app.services import credits as credits_service
+    from app.services import verification
+    user = await _user_with_credits("verify-broke", 1)
+    job = await _job(user, emails=["a@acme.com", "b@acme.com"], total=2, chunk_size=2)
+
+    await verification.run_verification_job(str(job.id))
+
+    done = await VerificationJob.get(job.id)
+    assert done.status == "failed"
+    assert "Insufficient" in (done.error or "")
+    assert await EmailVerificationResult.find(EmailVerificationResult.job_id == job.id).count() == 0
+    assert await credits_service.get_balance(user.id) == 1
+
+
+async def test_final_attempt_refunds_unverified_emails(monkeypatch):
+    from app.models.verification_job import VerificationJob
+    from app.services import credits as credits_service
+    from app.services import verification
+    user = await _user_with_credits("verify-refund", 10)
+    emails = [f"u{i}@acme.com" for i in range(6)]
+    job = await _job(user, emails=emails, total=6, chunk_size=2)
+    real_chunk = verification._verify_chunk
+
+    async def _fail_second_chunk(job, user_id, chunk, *args):
+        if chunk == 1:
+            raise ConnectionError("mongo went away")
+        await real_chunk(job, user_id, chunk, *args)
+
+    monkeypatch.setattr(verification, "_verify_chunk", _fail_second_chunk)
+    with pytest.raises(ConnectionError):
+        await verification.run_verification_job(str(job.id), final_attempt=True)
+    # A second failure report must not refund twice
+    await VerificationJob.find_one(VerificationJob.id == job.id).update({"$set": {"status": "running"}})
+    with pytest.raises(ConnectionError):
+        await verification.run_verification_job(str(job.id), final_attempt=True)
+
+    done = await VerificationJob.get(job.id)
+    assert (done.status, done.processed_count) == ("failed", 2)
+    # Charged 6, verified 2, refunded 4
+    assert await credits_service.get_balance(user.id) == 8